@@ -1,10 +1,12 @@
 from fastapi import APIRouter, HTTPException
 from typing import Dict, Optional
+import time
 from pydantic import BaseModel
 
 from app.config import settings
 from app.services.rag import rag_service
-from openai import OpenAI
+from app.utils.concurrency import run_io
+from app.utils.metrics import chat_duration
 
 router = APIRouter()
 
@@ -19,6 +21,7 @@ class ChatResponse(BaseModel):
 @router.post("/", response_model=ChatResponse)
 async def chat(request: ChatRequest):
     """Chat with documents using RAG"""
+    start = time.perf_counter()
     try:
         # If no OpenAI key, return a placeholder response
         if settings.OPENAI_API_KEY == "placeholder-openai-key":
@@ -43,6 +46,7 @@ async def chat(request: ChatRequest):
                 context = doc_results[0]['snippet'] + "\n\n" + context
         
         # Generate response using OpenAI
+        from openai import OpenAI
         client = OpenAI(api_key=settings.OPENAI_API_KEY)
         
         system_prompt = """You are a helpful assistant that answers questions about handwritten notes and documents. 
@@ -56,7 +60,8 @@ User question: {request.message}
 
 Please provide a helpful answer based on the context above."""
         
-        response = client.chat.completions.create(
+        response = await run_io(
+            client.chat.completions.create,
             model="gpt-3.5-turbo",
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -73,4 +78,6 @@ Please provide a helpful answer based on the context above."""
         
     except Exception as e:
         print(f"Chat error: {str(e)}")
-        raise HTTPException(500, f"Chat error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(500, f"Chat error: {str(e)}")
+    finally:
+        chat_duration.observe(time.perf_counter() - start)
\ No newline at end of file
@@ -1,66 +1,100 @@
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict
+from fastapi import APIRouter, HTTPException, Query
+from typing import Dict, Optional
 import os
 import json
-from datetime import datetime
+import base64
 
 from app.config import settings
-from app.models.document import Document, ProcessingStatus
+from app.models.document import Document
+from app.services.registry import document_registry
+from app.services.checkpoints import checkpoint_store
+from app.services.rag import rag_service
+from app.services.processor import document_processor
 
 router = APIRouter()
 
-def get_document_info(document_id: str) -> Dict:
-    """Get document information"""
-    # Check upload directory
-    upload_files = os.listdir(settings.UPLOAD_DIR)
-    original_file = None
+# Artifacts written to PROCESSED_DIR for each document
+PROCESSED_SUFFIXES = ["_ocr.txt", ".pdf", "_latex.pdf", "_result.json"]
+
+# Fields that can be projected in document listings
+LIST_FIELDS = {"id", "title", "status", "created_at", "updated_at", "original_file_path", "size", "user_id"}
+DEFAULT_LIST_FIELDS = ["id", "title", "status", "created_at"]
+MAX_PAGE_SIZE = 200
+
+def encode_cursor(order_by: str, document: Dict) -> str:
+    """Encode the position after a document as an opaque cursor"""
+    payload = json.dumps([order_by, document["created_at"], document["id"]])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+def decode_cursor(cursor: str, order_by: str) -> Dict:
+    """Decode a cursor produced by encode_cursor"""
+    try:
+        cursor_order, created_at, document_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise HTTPException(400, "Invalid cursor")
     
-    for file in upload_files:
-        if file.startswith(document_id):
-            original_file = file
-            break
+    if cursor_order != order_by:
+        raise HTTPException(400, "Cursor does not match order_by")
+    
+    return {"created_at": created_at, "id": document_id}
+
+def get_document_info(document_id: str, include_text: bool = True) -> Optional[Dict]:
+    """Get document information"""
+    document = document_registry.get(document_id)
     
-    if not original_file:
+    if not document:
         return None
     
-    # Check if processed
-    ocr_file = os.path.join(settings.PROCESSED_DIR, f"{document_id}_ocr.txt")
-    has_ocr = os.path.exists(ocr_file)
+    doc_info = {
+        "id": document["id"],
+        "title": document["title"],
+        "original_file_path": document["original_file_path"],
+        "status": document["status"],
+        "created_at": document["created_at"]
+    }
     
-    ocr_text = None
-    if has_ocr:
-        with open(ocr_file, "r", encoding="utf-8") as f:
-            ocr_text = f.read()
+    # Only single-document lookups read the OCR text
+    if include_text:
+        ocr_text = None
+        if document["ocr_path"] and os.path.exists(document["ocr_path"]):
+            with open(document["ocr_path"], "r", encoding="utf-8") as f:
+                ocr_text = f.read()
+        doc_info["ocr_text"] = ocr_text
     
-    return {
-        "id": document_id,
-        "title": original_file,
-        "original_file_path": os.path.join(settings.UPLOAD_DIR, original_file),
-        "status": ProcessingStatus.COMPLETED if has_ocr else ProcessingStatus.PENDING,
-        "ocr_text": ocr_text,
-        "created_at": datetime.fromtimestamp(
-            os.path.getctime(os.path.join(settings.UPLOAD_DIR, original_file))
-        ).isoformat()
-    }
+    return doc_info
 
 @router.get("/")
-async def list_documents() -> List[Dict]:
-    """List all documents"""
-    documents = []
-    
-    # Get all files from upload directory
-    upload_files = os.listdir(settings.UPLOAD_DIR)
-    
-    for file in upload_files:
-        if file.endswith('.gitkeep'):
-            continue
-            
-        document_id = file.split('.')[0]
-        doc_info = get_document_info(document_id)
-        if doc_info:
-            documents.append(doc_info)
-    
-    return documents
+async def list_documents(
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    order_by: str = Query("created_at", pattern="^(created_at|id)$"),
+    fields: Optional[str] = None
+) -> Dict:
+    """List documents one page at a time"""
+    projection = DEFAULT_LIST_FIELDS
+    if fields:
+        projection = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = set(projection) - LIST_FIELDS
+        if unknown:
+            raise HTTPException(400, f"Unknown fields: {', '.join(sorted(unknown))}")
+    
+    after = decode_cursor(cursor, order_by) if cursor else None
+    
+    # Fetch one extra row to know whether another page exists
+    rows = document_registry.list_page(
+        limit=limit + 1,
+        order_by=order_by,
+        after=after,
+        columns=list(projection)
+    )
+    
+    page = rows[:limit]
+    next_cursor = encode_cursor(order_by, page[-1]) if len(rows) > limit else None
+    
+    return {
+        "items": [{field: row[field] for field in projection} for row in page],
+        "next_cursor": next_cursor
+    }
 
 @router.get("/{document_id}")
 async def get_document(document_id: str) -> Dict:
@@ -75,27 +109,33 @@ async def get_document(document_id: str) -> Dict:
 @router.delete("/{document_id}")
 async def delete_document(document_id: str) -> Dict:
     """Delete a document"""
+    document = document_registry.get(document_id)
+    
+    if not document:
+        raise HTTPException(404, "Document not found")
+    
+    # Stop any processing and unregister first; a running job that finishes
+    # after this discards its outputs because the document no longer exists
+    document_processor.cancel_document(document_id)
+    document_registry.delete(document_id)
+    
     # Find and delete files
     deleted_files = []
     
-    # Check upload directory
-    upload_files = os.listdir(settings.UPLOAD_DIR)
-    for file in upload_files:
-        if file.startswith(document_id):
-            os.remove(os.path.join(settings.UPLOAD_DIR, file))
-            deleted_files.append(file)
-    
-    # Check processed directory
-    processed_files = os.listdir(settings.PROCESSED_DIR)
-    for file in processed_files:
-        if file.startswith(document_id):
-            os.remove(os.path.join(settings.PROCESSED_DIR, file))
-            deleted_files.append(file)
-    
-    if not deleted_files:
-        raise HTTPException(404, "Document not found")
+    candidate_paths = [document["original_file_path"]] + [
+        os.path.join(settings.PROCESSED_DIR, f"{document_id}{suffix}")
+        for suffix in PROCESSED_SUFFIXES
+    ]
+    
+    for file_path in candidate_paths:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+            deleted_files.append(os.path.basename(file_path))
+    
+    checkpoint_store.clear(document_id)
+    await rag_service.delete_document(document_id)
     
     return {
         "message": "Document deleted successfully",
         "deleted_files": deleted_files
-    }
\ No newline at end of file
+    }
@@ -1,52 +1,116 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from typing import Dict
+from fastapi import APIRouter, HTTPException, Request, Header, Query
+from fastapi.responses import StreamingResponse
+from typing import Dict, Any, Optional
 import os
+import json
 
 from app.config import settings
 from app.services.processor import document_processor
 from app.models.document import ProcessingStatus
+from app.services.registry import document_registry
+from app.services.job_queue import job_queue, JobPriority
+from app.services.stats import stage_stats
+from app.services.events import event_bus
+from app.services.progress import progress_broker
+from app.services.admission import admission_controller
+from app.services.stage_cache import stage_cache
 
 router = APIRouter()
 
-async def process_document_task(document_id: str, file_path: str):
-    """Background task to process document"""
-    try:
-        result = await document_processor.process_document(document_id, file_path)
-        print(f"Document {document_id} processed: {result['status']}")
-    except Exception as e:
-        print(f"Error processing document {document_id}: {str(e)}")
+# Standalone workers, or processing without the worker pool, do not forward
+# progress events, so streams also check the registry this often
+STATUS_POLL_SECONDS = 5.0
+
+ACTIVE_STATUSES = (ProcessingStatus.QUEUED, ProcessingStatus.PROCESSING)
 
 @router.post("/{document_id}")
 async def process_document(
     document_id: str,
-    background_tasks: BackgroundTasks
+    priority: Optional[JobPriority] = Query(None),
+    user_id: Optional[str] = Header(None, alias="X-User-Id")
 ) -> Dict:
     """Start processing a document"""
     
     # Check if file exists
-    upload_files = os.listdir(settings.UPLOAD_DIR)
-    file_path = None
+    document = document_registry.get(document_id)
+    
+    if not document or not os.path.exists(document["original_file_path"]):
+        raise HTTPException(404, "Document not found")
+    
+    # Requests for documents that are already queued or running are not new work
+    if not job_queue.get_active(document_id):
+        admission_controller.admit()
+    
+    # Multi-page PDFs are batch imports unless the client says otherwise
+    if priority is None:
+        is_multipage = document["original_file_path"].lower().endswith('.pdf')
+        priority = JobPriority.BULK if is_multipage else JobPriority.INTERACTIVE
+    
+    # Hand off to the worker pool through the durable queue
+    job_id, created = job_queue.enqueue(
+        document_id,
+        document["original_file_path"],
+        user_id=user_id or document.get("user_id"),
+        priority=priority
+    )
     
-    for file in upload_files:
-        if file.startswith(document_id):
-            file_path = os.path.join(settings.UPLOAD_DIR, file)
-            break
+    # A repeated request must not reset the status or progress of the active run
+    if not created:
+        return {
+            "message": "Processing already queued",
+            "document_id": document_id,
+            "job_id": job_id,
+            "priority": priority,
+            "status": document_registry.get(document_id)["status"]
+        }
     
-    if not file_path:
+    document_registry.set_status(document_id, ProcessingStatus.QUEUED)
+    event_bus.publish("document_queued", {"document_id": document_id, "job_id": job_id})
+    
+    return {
+        "message": "Processing queued",
+        "document_id": document_id,
+        "job_id": job_id,
+        "priority": priority,
+        "status": ProcessingStatus.QUEUED
+    }
+
+@router.post("/{document_id}/cancel")
+async def cancel_processing(document_id: str) -> Dict:
+    """Cancel queued processing and stop a running job at its next cancellation point"""
+    if not document_registry.get(document_id):
         raise HTTPException(404, "Document not found")
     
-    # Add to background tasks
-    background_tasks.add_task(process_document_task, document_id, file_path)
+    cancelled = document_processor.cancel_document(document_id)
     
     return {
-        "message": "Processing started",
         "document_id": document_id,
-        "status": ProcessingStatus.PROCESSING
+        "cancelled_queued": cancelled["queued"],
+        "cancelling_running": cancelled["running"],
+        "status": document_registry.get(document_id)["status"]
     }
 
+@router.get("/stats")
+async def get_stage_stats() -> Dict:
+    """Aggregated per-stage timing and resource usage by document class"""
+    return stage_stats.snapshot()
+
+@router.get("/cache")
+async def get_cache_stats() -> Dict:
+    """Size of the stage output cache per stage"""
+    return stage_cache.stats()
+
 @router.get("/{document_id}/status")
 async def get_processing_status(document_id: str) -> Dict:
     """Get detailed processing status"""
+    document = document_registry.get(document_id)
+    
+    # A stale result file may exist while the document is requeued
+    if document and document["status"] in (ProcessingStatus.QUEUED, ProcessingStatus.PROCESSING):
+        return {
+            "document_id": document_id,
+            "status": document["status"]
+        }
     
     # Check for processing result
     result = await document_processor.get_processing_result(document_id)
@@ -54,17 +118,66 @@ async def get_processing_status(document_id: str) -> Dict:
     if result:
         return result
     
-    # Check if file exists
-    upload_files = os.listdir(settings.UPLOAD_DIR)
-    for file in upload_files:
-        if file.startswith(document_id):
-            return {
-                "document_id": document_id,
-                "status": ProcessingStatus.PENDING
-            }
+    # Fall back to the registry status
+    if document:
+        return {
+            "document_id": document_id,
+            "status": document["status"]
+        }
     
     raise HTTPException(404, "Document not found")
 
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Encode one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@router.get("/{document_id}/events")
+async def stream_processing_events(document_id: str, request: Request):
+    """Stream stage transitions and partial results as server-sent events"""
+    document = document_registry.get(document_id)
+    
+    if not document:
+        raise HTTPException(404, "Document not found")
+    
+    async def finish(status: str):
+        yield format_sse("status", {"document_id": document_id, "status": status})
+        # Clients close on "result", so one is always sent, even without a result file
+        result = await document_processor.get_processing_result(document_id)
+        yield format_sse("result", result or {"document_id": document_id, "status": status})
+    
+    async def events():
+        # Nothing more will happen to a document that is not queued or running
+        if document["status"] not in ACTIVE_STATUSES:
+            async for message in finish(document["status"]):
+                yield message
+            return
+        
+        yield format_sse("status", {"document_id": document_id, "status": document["status"]})
+        
+        async for event in progress_broker.stream(document_id, keepalive=STATUS_POLL_SECONDS):
+            if await request.is_disconnected():
+                break
+            if event is None:
+                # No events arrive when the run happens in a process that does not forward them
+                current = document_registry.get(document_id)
+                if current is None or current["status"] not in ACTIVE_STATUSES:
+                    async for message in finish(current["status"] if current else ProcessingStatus.CANCELLED):
+                        yield message
+                    break
+                yield ": keepalive\n\n"
+                continue
+            
+            kind, payload = event
+            yield format_sse(kind, payload)
+            if kind == "document_finished":
+                break
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/{document_id}/download/{file_type}")
 async def download_processed_file(document_id: str, file_type: str):
     """Download processed files"""
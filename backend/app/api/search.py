@@ -1,11 +1,13 @@
 from fastapi import APIRouter, HTTPException, Query
 from typing import List, Optional
 import os
+import time
 
 from app.config import settings
 from app.models.document import SearchQuery, SearchResult
 from app.services.rag import rag_service
 from app.services.processor import document_processor
+from app.utils.metrics import search_duration
 
 router = APIRouter()
 
@@ -45,6 +47,7 @@ async def search_documents(query: SearchQuery):
 
 async def _simple_text_search(query: SearchQuery) -> List[SearchResult]:
     """Fallback simple text search"""
+    start = time.perf_counter()
     results = []
     
     # Get all processed documents
@@ -88,6 +91,7 @@ async def _simple_text_search(query: SearchQuery) -> List[SearchResult]:
             print(f"Error searching file {file}: {str(e)}")
     
     results.sort(key=lambda x: x.score, reverse=True)
+    search_duration.observe(time.perf_counter() - start, backend="simple_text")
     return results[:query.limit]
 
 @router.get("/suggestions")
@@ -1,11 +1,15 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from typing import List
+from fastapi import APIRouter, UploadFile, File, HTTPException, Header
+from typing import List, Tuple, Optional
 import os
 import uuid
-from datetime import datetime
+import hashlib
+import aiofiles
+import aiofiles.os
 
 from app.config import settings
-from app.models.document import Document, ProcessingStatus
+from app.services.dedup import dedup_registry
+from app.services.registry import document_registry
+from app.services.admission import admission_controller
 
 router = APIRouter()
 
@@ -13,15 +17,51 @@ ALLOWED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.pdf'}
 
 def validate_file(file: UploadFile) -> bool:
     """Validate file type and size"""
-    if file.size > settings.MAX_UPLOAD_SIZE:
+    # Whole requests are bounded by BodySizeLimitMiddleware; this catches single
+    # files in a batch, whose size the multipart parser has already counted
+    if file.size is not None and file.size > settings.MAX_UPLOAD_SIZE:
         return False
     
     ext = os.path.splitext(file.filename)[1].lower()
     return ext in ALLOWED_EXTENSIONS
 
+async def save_upload_stream(file: UploadFile, file_path: str) -> Tuple[str, int]:
+    """Stream an upload to disk in chunks, returning its SHA-256 and size"""
+    sha256 = hashlib.sha256()
+    size = 0
+    tmp_path = f"{file_path}.part"
+    
+    try:
+        async with aiofiles.open(tmp_path, "wb") as f:
+            while True:
+                chunk = await file.read(settings.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                
+                size += len(chunk)
+                if size > settings.MAX_UPLOAD_SIZE:
+                    raise HTTPException(413, "File exceeds maximum upload size")
+                
+                sha256.update(chunk)
+                await f.write(chunk)
+        
+        await aiofiles.os.replace(tmp_path, file_path)
+    except BaseException:
+        # Never leave partial uploads behind
+        if await aiofiles.os.path.exists(tmp_path):
+            await aiofiles.os.remove(tmp_path)
+        raise
+    
+    return sha256.hexdigest(), size
+
 @router.post("/single")
-async def upload_single_file(file: UploadFile = File(...)):
+async def upload_single_file(
+    file: UploadFile = File(...),
+    user_id: Optional[str] = Header(None, alias="X-User-Id")
+):
     """Upload a single file"""
+    admission_controller.admit()
+    
     if not validate_file(file):
         raise HTTPException(400, "Invalid file type or size")
     
@@ -33,36 +73,47 @@ async def upload_single_file(file: UploadFile = File(...)):
     
     # Save file
     try:
-        content = await file.read()
-        with open(file_path, "wb") as f:
-            f.write(content)
+        content_hash, file_size = await save_upload_stream(file, file_path)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(500, f"Failed to save file: {str(e)}")
     
     # Create document record
-    document = {
-        "id": file_id,
-        "title": file.filename,
-        "original_file_path": file_path,
-        "status": ProcessingStatus.PENDING,
-        "created_at": datetime.utcnow(),
-        "updated_at": datetime.utcnow()
-    }
+    document_registry.create(
+        document_id=file_id,
+        title=file.filename,
+        original_file_path=file_path,
+        content_hash=content_hash,
+        size=file_size,
+        user_id=user_id
+    )
+    
+    # Identical content will alias the existing artifacts at processing time
+    duplicate_of = dedup_registry.find_processed(content_hash, exclude_id=file_id)
     
     return {
         "message": "File uploaded successfully",
         "document_id": file_id,
-        "filename": file.filename
+        "filename": file.filename,
+        "size": file_size,
+        "sha256": content_hash,
+        "duplicate_of": duplicate_of
     }
 
 @router.post("/batch")
-async def upload_batch_files(files: List[UploadFile] = File(...)):
+async def upload_batch_files(
+    files: List[UploadFile] = File(...),
+    user_id: Optional[str] = Header(None, alias="X-User-Id")
+):
     """Upload multiple files"""
+    admission_controller.admit()
+    
     results = []
     
     for file in files:
         try:
-            result = await upload_single_file(file)
+            result = await upload_single_file(file, user_id=user_id)
             results.append(result)
         except HTTPException as e:
             results.append({
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from pydantic import Field
+from pydantic import Field, model_validator
 from typing import Optional
 import os
 
@@ -20,17 +20,65 @@ class Settings(BaseSettings):
     UPLOAD_DIR: str = "./data/uploads"
     PROCESSED_DIR: str = "./data/processed"
     CACHE_DIR: str = "./data/cache"
+    DATABASE_PATH: str = "./data/ocr_rag.db"
     MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10MB
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # 1MB
+    MAX_BATCH_UPLOAD_SIZE: int = 100 * 1024 * 1024  # whole request body of a batch upload
     
     # Processing
     OCR_BATCH_SIZE: int = 5
+    OCR_BATCH_WAIT_MS: int = 50
+    OCR_TILE_SIZE: int = 2560  # larger pages are OCRed in tiles of this many pixels; 0 disables tiling
+    OCR_TILE_OVERLAP: int = 160  # should exceed the tallest text line; must be below OCR_TILE_SIZE
+    OCR_BATCH_MAX_PIXELS: int = 0  # bounds the detector input of one batch; 0 allows OCR_BATCH_SIZE full tiles
+    OCR_TARGET_TEXT_HEIGHT: int = 32  # pages with larger glyphs are downscaled to this; 0 disables
+    OCR_MIN_SCALE: float = 0.25
+    DETECTION_MAX_SIDE: int = 1600  # region detectors decode at 1/2-1/8 scale down to this; 0 disables
     MAX_WORKERS: int = 4
+    WORKER_POOL_ENABLED: bool = True
+    WORKER_MODE: str = "spawn"  # "prefork" shares loaded models copy-on-write
+    WORKER_POLL_INTERVAL: float = 1.0
+    WORKER_SHUTDOWN_TIMEOUT: float = 60.0
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_LEASE_SECONDS: float = 600.0
+    CANCEL_POLL_INTERVAL: float = 1.0
+    PDF_DPI: int = 200
+    PREPROCESS_MODE: str = "auto"  # "auto" picks per page; "none", "light" or "full" forces a denoising chain
+    STAGE_EXECUTOR_THREADS: int = 2
+    IO_EXECUTOR_THREADS: int = 16  # blocking network calls (OpenAI, Supabase), kept off the stage threads
+    THREADS_PER_WORKER: int = 0  # torch/BLAS threads per worker; 0 splits the cores across MAX_WORKERS
+    OPENCV_THREADS: int = 1
+    PDF_PAGE_THREADS: int = 0  # PDF pages OCRed at once per worker; 0 uses the per-worker thread budget
+    
+    # Content-addressed cache of stage outputs under CACHE_DIR
+    STAGE_CACHE_ENABLED: bool = True
+    STAGE_CACHE_MAX_MB: int = 2048
+    
+    # Models load on first use; these are loaded in the background at startup
+    API_WARMUP_MODELS: list[str] = ["sentence_transformer"]
+    WORKER_WARMUP_MODELS: list[str] = ["easyocr", "pix2tex", "sentence_transformer"]
+    MODEL_RETRY_SECONDS: float = 30.0  # wait before retrying a failed load, doubling per failure
+    
+    # Scheduling
+    TENANT_WEIGHTS: dict[str, float] = {}
+    BULK_AGING_SECONDS: float = 300.0
+    
+    # Admission control (0 disables a limit)
+    MAX_QUEUE_DEPTH: int = 100
+    MAX_IN_FLIGHT_JOBS: int = 0
+    MIN_FREE_MEMORY_MB: int = 1024
+    ADMISSION_RETRY_AFTER: int = 10
     
     # CORS
     BACKEND_CORS_ORIGINS: list[str] = ["http://localhost:3000"]
     BACKEND_URL: str = Field(default="http://localhost:8000", description="Backend URL")
     FRONTEND_URL: str = Field(default="http://localhost:3000", description="Frontend URL")
 
+    @model_validator(mode="after")
+    def check_tiling(self):
+        if self.OCR_TILE_SIZE and not 0 <= self.OCR_TILE_OVERLAP < self.OCR_TILE_SIZE:
+            raise ValueError("OCR_TILE_OVERLAP must be non-negative and smaller than OCR_TILE_SIZE")
+        return self
     
     class Config:
         env_file = ".env"
@@ -1,8 +1,10 @@
 import cv2
 import numpy as np
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, Union
 from enum import Enum
 
+from app.core.page import Page
+
 class DiagramType(Enum):
     FLOWCHART = "flowchart"
     CIRCUIT = "circuit"
@@ -17,22 +19,27 @@ class DiagramDetector:
     def __init__(self):
         self.min_diagram_area = 5000  # Minimum area for diagram detection
         
-    def detect_diagrams(self, image_path: str) -> List[Dict]:
+    def detect_diagrams(self, image: Union[str, Page]) -> List[Dict]:
         """Detect diagrams in image"""
-        image = cv2.imread(image_path)
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        # Detection runs on a reduced-resolution decode; pixel thresholds shrink
+        # with it and boxes are scaled back to full resolution at the end
+        page = Page.open(image)
+        gray = page.reduced_gray
+        factor = page.reduction
+        # One Canny pass serves flowcharts, graphs and math region detection
+        edges = page.reduced_edges
         
         diagrams = []
         
         # Detect different types of diagrams
-        diagrams.extend(self._detect_circuits(gray))
-        diagrams.extend(self._detect_flowcharts(gray))
-        diagrams.extend(self._detect_graphs(gray))
-        diagrams.extend(self._detect_tables(gray))
+        diagrams.extend(self._detect_circuits(gray, factor))
+        diagrams.extend(self._detect_flowcharts(edges, factor))
+        diagrams.extend(self._detect_graphs(edges, factor))
+        diagrams.extend(self._detect_tables(gray, factor))
         
-        return diagrams
+        return [{**d, 'bbox': tuple(int(v) * factor for v in d['bbox'])} for d in diagrams]
     
-    def _detect_circuits(self, gray: np.ndarray) -> List[Dict]:
+    def _detect_circuits(self, gray: np.ndarray, factor: int = 1) -> List[Dict]:
         """Detect circuit diagrams"""
         circuits = []
         
@@ -42,11 +49,11 @@ class DiagramDetector:
             gray, 
             cv2.HOUGH_GRADIENT, 
             dp=1, 
-            minDist=20,
+            minDist=max(1, 20 // factor),
             param1=50, 
-            param2=30, 
-            minRadius=10, 
-            maxRadius=50
+            param2=max(10, 30 // factor), 
+            minRadius=max(1, 10 // factor), 
+            maxRadius=50 // factor
         )
         
         if circles is not None and len(circles[0]) > 3:
@@ -66,12 +73,11 @@ class DiagramDetector:
         
         return circuits
     
-    def _detect_flowcharts(self, gray: np.ndarray) -> List[Dict]:
+    def _detect_flowcharts(self, edges: np.ndarray, factor: int = 1) -> List[Dict]:
         """Detect flowchart diagrams"""
         flowcharts = []
         
         # Detect rectangles and diamonds (flowchart shapes)
-        edges = cv2.Canny(gray, 50, 150)
         contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         
         rectangles = []
@@ -83,7 +89,7 @@ class DiagramDetector:
             # Rectangle has 4 vertices
             if len(approx) == 4:
                 x, y, w, h = cv2.boundingRect(contour)
-                if w * h > self.min_diagram_area:
+                if w * h * factor * factor > self.min_diagram_area:
                     rectangles.append((x, y, w, h))
         
         # If multiple rectangles are found in proximity, likely a flowchart
@@ -104,7 +110,7 @@ class DiagramDetector:
         
         return flowcharts
     
-    def _detect_graphs(self, gray: np.ndarray) -> List[Dict]:
+    def _detect_graphs(self, edges: np.ndarray, factor: int = 1) -> List[Dict]:
         """Detect graph/tree structures"""
         graphs = []
         
@@ -112,16 +118,20 @@ class DiagramDetector:
         # This is simplified - real implementation would be more complex
         
         # Detect lines using Hough transform
-        edges = cv2.Canny(gray, 50, 150)
-        lines = cv2.HoughLinesP(edges, 1, np.pi/180, threshold=50, minLineLength=30, maxLineGap=10)
+        lines = cv2.HoughLinesP(
+            edges, 1, np.pi/180,
+            threshold=max(10, 50 // factor),
+            minLineLength=max(5, 30 // factor),
+            maxLineGap=max(1, 10 // factor)
+        )
         
         if lines is not None and len(lines) > 5:
             # Multiple connected lines might be a graph
             x_coords = []
             y_coords = []
             
-            for line in lines:
-                x1, y1, x2, y2 = line[0]
+            # OpenCV 4 returns (N, 1, 4), OpenCV 5 (N, 4)
+            for x1, y1, x2, y2 in lines.reshape(-1, 4):
                 x_coords.extend([x1, x2])
                 y_coords.extend([y1, y2])
             
@@ -129,7 +139,7 @@ class DiagramDetector:
                 x_min, x_max = min(x_coords), max(x_coords)
                 y_min, y_max = min(y_coords), max(y_coords)
                 
-                area = (x_max - x_min) * (y_max - y_min)
+                area = (x_max - x_min) * (y_max - y_min) * factor * factor
                 if area > self.min_diagram_area:
                     graphs.append({
                         'type': DiagramType.GRAPH.value,
@@ -140,13 +150,14 @@ class DiagramDetector:
         
         return graphs
     
-    def _detect_tables(self, gray: np.ndarray) -> List[Dict]:
+    def _detect_tables(self, gray: np.ndarray, factor: int = 1) -> List[Dict]:
         """Detect table structures"""
         tables = []
         
         # Detect horizontal and vertical lines
-        horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (40, 1))
-        vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, 40))
+        line_length = max(5, 40 // factor)
+        horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (line_length, 1))
+        vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, line_length))
         
         # Apply morphology operations
         _, binary = cv2.threshold(gray, 127, 255, cv2.THRESH_BINARY_INV)
@@ -160,7 +171,9 @@ class DiagramDetector:
         # Count intersections
         intersection_points = cv2.findNonZero(intersections)
         
-        if intersection_points is not None and len(intersection_points) > 4:
+        # Each intersection covers factor^2 fewer pixels at reduced resolution
+        cells = len(intersection_points) * factor * factor if intersection_points is not None else 0
+        if cells > 4:
             # Multiple intersections suggest a table
             points = intersection_points.reshape(-1, 2)
             x_min, y_min = np.min(points, axis=0)
@@ -169,8 +182,8 @@ class DiagramDetector:
             tables.append({
                 'type': DiagramType.TABLE.value,
                 'bbox': (x_min, y_min, x_max - x_min, y_max - y_min),
-                'confidence': min(len(intersection_points) / 20, 1.0),
-                'cells': len(intersection_points)
+                'confidence': min(cells / 20, 1.0),
+                'cells': cells
             })
         
         return tables
@@ -1,18 +1,24 @@
 import cv2
 import numpy as np
-from typing import List, Dict, Tuple, Optional, Any
+from typing import List, Dict, Tuple, Optional, Any, Union
 import re
-from PIL import Image
-import tempfile
-import os
+
+from app.core.model_registry import model_registry
+from app.utils.cancellation import check_cancelled
+from app.config import settings
+from app.core.page import Page
+from app.services.stage_cache import stage_cache
+
+# Bump when pix2tex extraction changes, to invalidate cached results
+PIX2TEX_VERSION = 2
+MAX_MATH_REGIONS = 5
 
 class MathOCR:
     """Specialized OCR for mathematical expressions"""
     
     def __init__(self):
-        # Initialize pix2tex model
-        self.model = None
-        self._load_model()
+        # pix2tex loads on first use
+        self._model = model_registry.register("pix2tex", self._load_model)
         
         # Mathematical symbols mapping
         self.math_symbols = {
@@ -34,19 +40,23 @@ class MathOCR:
             'omega': 'ω'
         }
     
-    def _load_model(self):
+    @staticmethod
+    def _load_model():
         """Load pix2tex model"""
+        from pix2tex.cli import LatexOCR
+        return LatexOCR()
+    
+    @property
+    def model(self):
+        """The pix2tex model, or None when it cannot be loaded"""
         try:
-            # Initialize pix2tex
-            from pix2tex.cli import LatexOCR
-            self.model = LatexOCR()
-            print("Pix2tex model loaded successfully")
-        except Exception as e:
-            print(f"Failed to load pix2tex model: {str(e)}")
-            self.model = None
+            return self._model.get()
+        except Exception:
+            return None
     
-    def extract_math_from_image(self, image_path: str) -> Dict[str, Any]:
+    def extract_math_from_image(self, image: Union[str, Page]) -> Dict[str, Any]:
         """Extract mathematical expressions from image using pix2tex"""
+        page = Page.open(image)
         results = {
             'latex_expressions': [],
             'math_regions': [],
@@ -55,15 +65,19 @@ class MathOCR:
         
         if not self.model:
             print("Pix2tex model not available, using fallback")
-            return self._fallback_math_extraction(image_path)
+            return self._fallback_math_extraction(page)
+        
+        cache_key = stage_cache.make_key("pix2tex", PIX2TEX_VERSION, page.content_hash, {
+            "max_regions": MAX_MATH_REGIONS,
+            "detection_max_side": settings.DETECTION_MAX_SIDE
+        })
+        cached = stage_cache.get_json("pix2tex", cache_key)
+        if cached is not None:
+            return cached
         
         try:
-            # Open image
-            img = Image.open(image_path)
-            
-            # Convert to RGB if necessary
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
+            # RGB view of the page decoded for the whole pipeline
+            img = page.pil
             
             # Extract LaTeX using pix2tex
             latex_result = self.model(img)
@@ -73,58 +87,54 @@ class MathOCR:
                 results['success'] = True
                 
             # Detect math regions for more targeted extraction
-            math_regions = self.detect_math_regions(image_path)
+            math_regions = self.detect_math_regions(page)
             
             # Extract LaTeX from each region
-            for region in math_regions[:5]:  # Limit to 5 regions
+            for region in math_regions[:MAX_MATH_REGIONS]:
+                check_cancelled()
                 x, y, w, h = region['bbox']
                 
                 # Crop region
                 region_img = img.crop((x, y, x + w, y + h))
                 
-                # Save to temporary file
-                with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp:
-                    region_img.save(tmp.name)
-                    
-                    try:
-                        # Extract LaTeX from region
-                        region_latex = self.model(Image.open(tmp.name))
-                        if region_latex and region_latex not in results['latex_expressions']:
-                            results['latex_expressions'].append(region_latex)
-                            results['math_regions'].append({
-                                'bbox': region['bbox'],
-                                'latex': region_latex
-                            })
-                    except:
-                        pass
-                    finally:
-                        os.unlink(tmp.name)
+                try:
+                    # Extract LaTeX from region; the crop is passed directly instead of
+                    # round-tripping through a temporary PNG
+                    region_latex = self.model(region_img)
+                    if region_latex and region_latex not in results['latex_expressions']:
+                        results['latex_expressions'].append(region_latex)
+                        results['math_regions'].append({
+                            'bbox': region['bbox'],
+                            'latex': region_latex
+                        })
+                except:
+                    pass
             
+            stage_cache.put_json("pix2tex", cache_key, results)
             return results
             
         except Exception as e:
             print(f"Error in pix2tex extraction: {str(e)}")
-            return self._fallback_math_extraction(image_path)
+            return self._fallback_math_extraction(page)
     
-    def _fallback_math_extraction(self, image_path: str) -> Dict[str, Any]:
+    def _fallback_math_extraction(self, page: Page) -> Dict[str, Any]:
         """Fallback method when pix2tex is not available"""
         return {
             'latex_expressions': [],
-            'math_regions': self.detect_math_regions(image_path),
+            'math_regions': self.detect_math_regions(page),
             'success': False
         }
     
-    def detect_math_regions(self, image_path: str) -> List[Dict]:
+    def detect_math_regions(self, image: Union[str, Page]) -> List[Dict]:
         """Detect regions likely containing mathematical expressions"""
         try:
-            image = cv2.imread(image_path)
-            if image is None:
-                return []
-                
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            # Coarse structure is enough to find regions; boxes are scaled back to full resolution
+            page = Page.open(image)
+            gray = page.reduced_gray
+            factor = page.reduction
             
-            # Apply edge detection
-            edges = cv2.Canny(gray, 50, 150)
+            # Edge detection is shared with the diagram detector
+            edges = page.reduced_edges
             
             # Find contours
             contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
@@ -135,12 +145,12 @@ class MathOCR:
                 
                 # Filter based on aspect ratio and size (math expressions tend to be horizontal)
                 aspect_ratio = w / h if h > 0 else 0
-                area = w * h
+                area = w * h * factor * factor
                 
                 if 0.5 < aspect_ratio < 10 and area > 500:
                     math_regions.append({
-                        'bbox': (x, y, w, h),
-                        'confidence': self._calculate_math_confidence(gray[y:y+h, x:x+w])
+                        'bbox': (x * factor, y * factor, w * factor, h * factor),
+                        'confidence': self._calculate_math_confidence(gray[y:y+h, x:x+w], factor)
                     })
             
             return sorted(math_regions, key=lambda r: r['confidence'], reverse=True)
@@ -148,15 +158,16 @@ class MathOCR:
             print(f"Error detecting math regions: {str(e)}")
             return []
     
-    def _calculate_math_confidence(self, region: np.ndarray) -> float:
+    def _calculate_math_confidence(self, region: np.ndarray, factor: int = 1) -> float:
         """Calculate confidence that a region contains math"""
         try:
             # Simple heuristic based on density of non-text patterns
             _, binary = cv2.threshold(region, 127, 255, cv2.THRESH_BINARY)
             
             # Count horizontal and vertical lines (common in fractions, matrices)
-            horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (25, 1))
-            vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, 25))
+            line_length = max(3, 25 // factor)
+            horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (line_length, 1))
+            vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, line_length))
             
             h_lines = cv2.morphologyEx(binary, cv2.MORPH_OPEN, horizontal_kernel)
             v_lines = cv2.morphologyEx(binary, cv2.MORPH_OPEN, vertical_kernel)
@@ -171,10 +182,10 @@ class MathOCR:
         except:
             return 0.0
     
-    def process_math_image(self, image_path: str, text: str = "") -> Dict:
+    def process_math_image(self, image: Union[str, Page], text: str = "") -> Dict:
         """Process image for mathematical content"""
         # Extract math using pix2tex
-        pix2tex_results = self.extract_math_from_image(image_path)
+        pix2tex_results = self.extract_math_from_image(image)
         
         # Also try to extract from OCR text
         text_expressions = self.extract_latex_from_text(text) if text else []
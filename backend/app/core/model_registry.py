@@ -0,0 +1,111 @@
+import time
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from app.config import settings
+from app.utils.metrics import model_load_seconds
+
+# Longest wait between attempts to load a model that keeps failing
+MAX_RETRY_SECONDS = 600.0
+
+class LazyModel:
+    """A heavy model or client that is loaded on first use"""
+
+    def __init__(self, name: str, loader: Callable[[], Any]):
+        self.name = name
+        self._loader = loader
+        self._model: Any = None
+        self._lock = threading.Lock()
+        self.state = "not_loaded"
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self.failures = 0
+        self.retry_at: Optional[float] = None
+
+    def get(self) -> Any:
+        """Return the model, loading it once (concurrent callers wait for the first load)"""
+        if self.state == "ready":
+            return self._model
+
+        with self._lock:
+            if self.state == "ready":
+                return self._model
+            # A failed load (e.g. a download or a remote service that was down) is
+            # retried after a backoff instead of failing every later call
+            if self.state == "failed" and time.time() < self.retry_at:
+                raise RuntimeError(f"{self.name} failed to load: {self.error}")
+
+            self.state = "loading"
+            load_start = time.perf_counter()
+            try:
+                self._model = self._loader()
+            except Exception as e:
+                self.state = "failed"
+                self.error = str(e)
+                self.failures += 1
+                delay = min(settings.MODEL_RETRY_SECONDS * 2 ** (self.failures - 1), MAX_RETRY_SECONDS)
+                self.retry_at = time.time() + delay
+                print(f"Failed to load {self.name} (retrying in {delay:.0f}s): {str(e)}")
+                raise
+
+            self.load_seconds = time.perf_counter() - load_start
+            self.state = "ready"
+            self.error = None
+            self.failures = 0
+            self.retry_at = None
+            model_load_seconds.set(self.load_seconds, model=self.name)
+            print(f"Loaded {self.name} in {self.load_seconds:.1f}s")
+
+        return self._model
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "load_seconds": self.load_seconds,
+            "error": self.error,
+            "failures": self.failures,
+            "retry_at": self.retry_at
+        }
+
+class ModelRegistry:
+    """Tracks lazily loaded models so they can be warmed up and reported"""
+
+    def __init__(self):
+        self._models: Dict[str, LazyModel] = {}
+
+    def register(self, name: str, loader: Callable[[], Any]) -> LazyModel:
+        model = LazyModel(name, loader)
+        self._models[name] = model
+        return model
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Readiness of every registered model"""
+        return {name: model.status() for name, model in self._models.items()}
+
+    def ready(self, names: Iterable[str]) -> bool:
+        """Whether the given models have finished loading"""
+        return all(name in self._models and self._models[name].state == "ready" for name in names)
+
+    def warm_up(self, names: Iterable[str], background: bool = True) -> Optional[threading.Thread]:
+        """Load models ahead of the first request, optionally in a background thread"""
+        def load_all():
+            for name in names:
+                model = self._models.get(name)
+                if model is None:
+                    print(f"Unknown model for warm-up: {name}")
+                    continue
+                try:
+                    model.get()
+                except Exception:
+                    pass
+
+        if not background:
+            load_all()
+            return None
+
+        thread = threading.Thread(target=load_all, name="model-warmup", daemon=True)
+        thread.start()
+        return thread
+
+# Global model registry instance
+model_registry = ModelRegistry()
@@ -1,27 +1,80 @@
-import easyocr
 import cv2
 import numpy as np
 from PIL import Image
-from typing import Tuple, List, Dict, Any
+from typing import Tuple, List, Dict, Any, Iterator, Union, Optional
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import os
 import time
+import contextvars
+import threading
 
+from app.config import settings
 from app.models.document import OCRResult
+from app.core.ocr_batcher import OCRBatcher
+from app.core.tiling import split_tiles, merge_tile_results
+from app.core.page import Page
+from app.utils.profiling import stage_timer
+from app.core.model_registry import model_registry
+from app.utils.cancellation import check_cancelled
+from app.utils.threads import thread_budget
+from app.utils.image import image_processor
+from app.services.stage_cache import stage_cache
+
+# Bump when the output of preprocessing or recognition changes, to invalidate cached results
+PREPROCESS_VERSION = 2
+RECOGNIZER_VERSION = 1
 
 class OCREngine:
     def __init__(self):
-        # Initialize EasyOCR with English
-        self.reader = easyocr.Reader(['en'], gpu=False)
+        # EasyOCR (and torch) load on first use
+        self._reader = model_registry.register("easyocr", self._load_reader)
+        self._batcher = None
+        self._batcher_lock = threading.Lock()
+    
+    @staticmethod
+    def _load_reader():
+        """Initialize EasyOCR with English"""
+        import easyocr
+        return easyocr.Reader(['en'], gpu=False)
+    
+    @property
+    def reader(self):
+        return self._reader.get()
+    
+    @property
+    def batcher(self) -> OCRBatcher:
+        """Concurrent pages share recognizer batches"""
+        if self._batcher is None:
+            with self._batcher_lock:
+                if self._batcher is None:
+                    self._batcher = OCRBatcher(self.reader)
+        return self._batcher
+    
+    def choose_preprocessing(self, gray: np.ndarray) -> Dict[str, Any]:
+        """Decide how much denoising a page needs from its estimated quality"""
+        if settings.PREPROCESS_MODE != "auto":
+            return {"denoise": settings.PREPROCESS_MODE}
         
-    def preprocess_image(self, image_path: str) -> np.ndarray:
+        quality = image_processor.estimate_quality(gray)
+        return {"denoise": image_processor.choose_denoise(quality), **quality}
+    
+    def preprocess_image(self, image: Union[str, np.ndarray, Page], denoise: Optional[str] = None) -> np.ndarray:
         """Preprocess image for better OCR results"""
-        # Read image
-        image = cv2.imread(image_path)
-        
-        # Convert to grayscale
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        # Grayscale input is used as is; anything else goes through the shared page views
+        if isinstance(image, np.ndarray) and image.ndim == 2:
+            gray = image
+        else:
+            gray = Page.open(image).gray
         
-        # Apply denoising
-        denoised = cv2.fastNlMeansDenoising(gray)
+        # Apply denoising; NLM takes seconds on large photos, so clean pages skip it
+        if denoise is None:
+            denoise = self.choose_preprocessing(gray)["denoise"]
+        if denoise == "full":
+            denoised = cv2.fastNlMeansDenoising(gray)
+        elif denoise == "light":
+            denoised = cv2.medianBlur(gray, 3)
+        else:
+            denoised = gray
         
         # Apply adaptive thresholding
         thresh = cv2.adaptiveThreshold(
@@ -47,15 +100,95 @@ class OCREngine:
         
         return has_math, math_expressions
     
-    def process_image(self, image_path: str) -> OCRResult:
-        """Process image and extract text"""
-        start_time = time.time()
+    def rescale_for_text(self, page: Page) -> Tuple[np.ndarray, float, Optional[float]]:
+        """Downscale a page so its glyphs are about the target height the detector needs"""
+        gray = page.gray
+        target = settings.OCR_TARGET_TEXT_HEIGHT
+        if not target:
+            return gray, 1.0, None
+        
+        text_height = image_processor.estimate_text_height(page)
+        # Resampling costs more than it saves when the text is already close to the target
+        if text_height is None or text_height <= target * 1.25:
+            return gray, 1.0, text_height
+        
+        scale = max(target / text_height, settings.OCR_MIN_SCALE)
+        return cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA), scale, text_height
+    
+    def _preprocess_cached(self, gray: np.ndarray, page_hash: str, denoise: str, scale: float) -> np.ndarray:
+        """Preprocess a page, reusing the cached result for identical content"""
+        key = stage_cache.make_key("preprocess", PREPROCESS_VERSION, page_hash, {"denoise": denoise, "scale": round(scale, 4)})
+        data = stage_cache.get("preprocess", key)
+        if data is not None:
+            cached = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_GRAYSCALE)
+            if cached is not None:
+                return cached
+        
+        with stage_timer("preprocess") as metrics:
+            processed_image = self.preprocess_image(gray, denoise)
+            metrics["output_bytes"] = processed_image.nbytes
+        
+        # PNG keeps the binarized page lossless and small
+        encoded, buffer = cv2.imencode('.png', processed_image)
+        if encoded:
+            stage_cache.put("preprocess", key, buffer.tobytes())
+        
+        return processed_image
+    
+    def _readtext(self, image: np.ndarray) -> List:
+        """OCR a page, in overlapping tiles when it is larger than the tile size"""
+        tile_size = settings.OCR_TILE_SIZE
+        height, width = image.shape[:2]
+        if not tile_size or max(height, width) <= tile_size:
+            return self.batcher.readtext(image)
+        
+        # Detection memory grows with the pixel count; the batcher runs equal-sized
+        # tiles together up to OCR_BATCH_MAX_PIXELS at a time
+        tiles = split_tiles(height, width, tile_size, settings.OCR_TILE_OVERLAP)
+        tile_results = self.batcher.readtext_many([image[y:y + h, x:x + w] for x, y, w, h in tiles])
+        return merge_tile_results(tiles, tile_results)
+    
+    def _recognize(self, image: Union[str, np.ndarray, Page]) -> Tuple[List[str], List[float], Dict[str, Any]]:
+        """Run OCR on a single page and return text blocks, confidences and the preprocessing used"""
+        check_cancelled()
+        page = Page.open(image)
         
-        # Preprocess image
-        processed_image = self.preprocess_image(image_path)
+        # Identical pages reuse earlier boxes and text without preprocessing again
+        page_hash = page.content_hash
+        ocr_key = stage_cache.make_key("easyocr", RECOGNIZER_VERSION, page_hash, {
+            "languages": ['en'],
+            "preprocess": PREPROCESS_VERSION,
+            "preprocess_mode": settings.PREPROCESS_MODE,
+            "tile_size": settings.OCR_TILE_SIZE,
+            "tile_overlap": settings.OCR_TILE_OVERLAP,
+            "target_text_height": settings.OCR_TARGET_TEXT_HEIGHT,
+            "min_scale": settings.OCR_MIN_SCALE
+        })
+        cached = stage_cache.get_json("easyocr", ocr_key)
         
-        # Perform OCR
-        results = self.reader.readtext(processed_image)
+        if cached is not None:
+            results, preprocessing = cached["results"], cached["preprocessing"]
+        else:
+            # Large handwriting is shrunk first, which also makes denoising cheaper
+            with stage_timer("quality"):
+                gray, scale, text_height = self.rescale_for_text(page)
+                preprocessing = self.choose_preprocessing(gray)
+            preprocessing.update(scale=scale, text_height=text_height)
+            
+            # Preprocess image
+            processed_image = self._preprocess_cached(gray, page_hash, preprocessing["denoise"], scale)
+            
+            # Perform OCR
+            check_cancelled()
+            with stage_timer("easyocr", input_bytes=processed_image.nbytes) as metrics:
+                # Boxes are reported in the original page's coordinates
+                results = [
+                    ([[float(x) / scale, float(y) / scale] for x, y in bbox], text, float(confidence))
+                    for bbox, text, confidence in self._readtext(processed_image)
+                ]
+                metrics["output_bytes"] = sum(len(text.encode('utf-8')) for _, text, _ in results)
+            
+            stage_cache.put_json("easyocr", ocr_key, {"results": results, "preprocessing": preprocessing})
         
         # Extract text and calculate confidence
         text_blocks = []
@@ -65,7 +198,11 @@ class OCREngine:
             text_blocks.append(text)
             confidence_scores.append(confidence)
         
-        full_text = ' '.join(text_blocks)
+        return text_blocks, confidence_scores, preprocessing
+    
+    def _build_result(self, full_text: str, confidence_scores: List[float],
+                      start_time: float, preprocessing: List[Dict[str, Any]], pages: int = 1) -> OCRResult:
+        """Assemble an OCRResult from recognized text"""
         avg_confidence = sum(confidence_scores) / len(confidence_scores) if confidence_scores else 0
         
         # Detect math
@@ -80,8 +217,80 @@ class OCREngine:
             processing_time=processing_time,
             detected_languages=['en'],
             has_math=has_math,
-            math_expressions=math_expressions if math_expressions else None
+            math_expressions=math_expressions if math_expressions else None,
+            pages=pages,
+            preprocessing=preprocessing
         )
+    
+    def process_image(self, image: Union[str, Page]) -> OCRResult:
+        """Process image and extract text"""
+        start_time = time.time()
+        
+        text_blocks, confidence_scores, preprocessing = self._recognize(image)
+        
+        return self._build_result(' '.join(text_blocks), confidence_scores, start_time, [preprocessing])
+    
+    def iter_pdf_pages(self, pdf_path: str) -> Iterator[Tuple[int, np.ndarray]]:
+        """Rasterize a PDF lazily, yielding one BGR page at a time"""
+        from pdf2image import convert_from_path, pdfinfo_from_path
+        
+        page_count = pdfinfo_from_path(pdf_path)["Pages"]
+        
+        for page_number in range(1, page_count + 1):
+            pages = convert_from_path(
+                pdf_path,
+                dpi=settings.PDF_DPI,
+                first_page=page_number,
+                last_page=page_number
+            )
+            if pages:
+                yield page_number, cv2.cvtColor(np.array(pages[0].convert('RGB')), cv2.COLOR_RGB2BGR)
+    
+    def process_pdf(self, pdf_path: str) -> OCRResult:
+        """OCR a multi-page PDF with pages fanned out across a worker pool"""
+        start_time = time.time()
+        page_results: Dict[int, Tuple[List[str], List[float], Dict[str, Any]]] = {}
+        # Pages share this process's thread budget; MAX_WORKERS counts processes
+        max_workers = max(1, thread_budget()["pdf_pages"])
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = {}
+            
+            for page_number, page in self.iter_pdf_pages(pdf_path):
+                check_cancelled()
+                
+                # Keep at most max_workers rasterized pages in memory
+                if len(pending) >= max_workers:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        page_results[pending.pop(future)] = future.result()
+                
+                # Copy the context so per-stage metrics reach this document's collector
+                context = contextvars.copy_context()
+                pending[executor.submit(context.run, self._recognize, page)] = page_number
+                del page
+            
+            for future in pending:
+                page_results[pending[future]] = future.result()
+        
+        # Merge pages in order
+        page_texts = []
+        confidence_scores = []
+        preprocessing = []
+        for page_number in sorted(page_results):
+            text_blocks, scores, page_preprocessing = page_results[page_number]
+            page_texts.append(' '.join(text_blocks))
+            confidence_scores.extend(scores)
+            preprocessing.append(page_preprocessing)
+        
+        return self._build_result('\n\n'.join(page_texts), confidence_scores, start_time,
+                                  preprocessing, pages=len(page_results))
+    
+    def process_file(self, file_path: str, page: Optional[Page] = None) -> OCRResult:
+        """Process an uploaded file, dispatching PDFs to the page pipeline"""
+        if os.path.splitext(file_path)[1].lower() == '.pdf':
+            return self.process_pdf(file_path)
+        return self.process_image(page or file_path)
 
 # Global OCR engine instance
 ocr_engine = OCREngine()
\ No newline at end of file
@@ -0,0 +1,108 @@
+import os
+import time
+import queue
+import threading
+from concurrent.futures import Future
+from typing import List, Tuple, Dict, Optional
+import numpy as np
+
+from app.config import settings
+
+class OCRBatcher:
+    """Collect concurrent OCR requests and run them through EasyOCR in batches"""
+
+    def __init__(self, reader, batch_size: Optional[int] = None, max_wait: Optional[float] = None,
+                 max_pixels: Optional[int] = None):
+        self.reader = reader
+        self.batch_size = batch_size or settings.OCR_BATCH_SIZE
+        if max_pixels is None:
+            # By default a full batch of tiles fits, so the tiles of one page run together
+            max_pixels = settings.OCR_BATCH_MAX_PIXELS or self.batch_size * settings.OCR_TILE_SIZE ** 2
+        self.max_pixels = max_pixels
+        self.max_wait = settings.OCR_BATCH_WAIT_MS / 1000 if max_wait is None else max_wait
+        self._pending: "queue.Queue[Tuple[np.ndarray, Future]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_pid: Optional[int] = None
+
+    def readtext(self, image: np.ndarray) -> List:
+        """OCR one image, blocking until its batch has run"""
+        # Nothing to amortize when batching is disabled
+        if self.batch_size <= 1:
+            return self.reader.readtext(image)
+
+        self._ensure_dispatcher()
+        future: Future = Future()
+        self._pending.put((image, future))
+        return future.result()
+
+    def readtext_many(self, images: List[np.ndarray]) -> List[List]:
+        """OCR several images (e.g. tiles of one page) together, in submission order"""
+        if self.batch_size <= 1:
+            return [self.reader.readtext(image) for image in images]
+
+        self._ensure_dispatcher()
+        futures = []
+        for image in images:
+            future: Future = Future()
+            self._pending.put((image, future))
+            futures.append(future)
+        return [future.result() for future in futures]
+
+    def _ensure_dispatcher(self):
+        """Start the dispatcher thread (threads do not survive a fork)"""
+        if self._thread is None or self._thread_pid != os.getpid() or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or self._thread_pid != os.getpid() or not self._thread.is_alive():
+                    if self._thread_pid != os.getpid():
+                        self._pending = queue.Queue()
+                    self._thread = threading.Thread(target=self._dispatch_loop, name="ocr-batcher", daemon=True)
+                    self._thread_pid = os.getpid()
+                    self._thread.start()
+
+    def _dispatch_loop(self):
+        """Gather up to batch_size requests within max_wait and run them together"""
+        while True:
+            batch = [self._pending.get()]
+            deadline = time.monotonic() + self.max_wait
+
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self._run_batch(batch)
+
+    def _chunks(self, items: List[Tuple[np.ndarray, Future]]) -> List[List[Tuple[np.ndarray, Future]]]:
+        """Split same-sized images so no chunk exceeds the pixel budget (one image always fits)"""
+        pixels = items[0][0].shape[0] * items[0][0].shape[1]
+        per_chunk = max(1, self.max_pixels // pixels) if self.max_pixels else len(items)
+        return [items[i:i + per_chunk] for i in range(0, len(items), per_chunk)]
+
+    def _run_batch(self, batch: List[Tuple[np.ndarray, Future]]):
+        """Run a batch, grouping same-sized images for readtext_batched"""
+        groups: Dict[tuple, List[Tuple[np.ndarray, Future]]] = {}
+        for image, future in batch:
+            groups.setdefault(image.shape, []).append((image, future))
+
+        for items in [chunk for group in groups.values() for chunk in self._chunks(group)]:
+            try:
+                if len(items) == 1:
+                    # Text-line crops within the page are still recognized in batches
+                    results = [self.reader.readtext(items[0][0], batch_size=self.batch_size)]
+                else:
+                    results = self.reader.readtext_batched(
+                        [image for image, _ in items],
+                        batch_size=self.batch_size
+                    )
+
+                for (_, future), result in zip(items, results):
+                    future.set_result(result)
+            except Exception as e:
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
@@ -0,0 +1,152 @@
+import io
+import threading
+from typing import Any, Callable, Dict, Optional, Union
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from app.config import settings
+from app.services.stage_cache import hash_bytes, hash_array
+
+# libjpeg scales by 1/2, 1/4 or 1/8 while decoding, skipping most of the IDCT work
+REDUCED_DECODE_FLAGS = {
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8
+}
+
+class Page:
+    """One decoded page image shared by all stages, with lazily derived views.
+
+    The file is read and decoded once per document; grayscale, edges, binary
+    and PIL views are computed on first use and cached, so OCR, math OCR,
+    diagram detection and vision do not each decode the image or rerun Canny.
+    Views are shared between stages and must not be modified in place.
+    """
+
+    def __init__(self, path: Optional[str] = None, bgr: Optional[np.ndarray] = None):
+        self.path = path
+        self._views: Dict[str, Any] = {}
+        # Reentrant: views are built from other views (gray from bgr, hash from raw bytes)
+        self._lock = threading.RLock()
+        if bgr is not None:
+            self._views["bgr"] = bgr
+
+    @classmethod
+    def open(cls, source: Union[str, np.ndarray, "Page"]) -> "Page":
+        """Wrap a path or BGR array; pages pass through unchanged"""
+        if isinstance(source, Page):
+            return source
+        if isinstance(source, np.ndarray):
+            return cls(bgr=source)
+        return cls(path=source)
+
+    def _view(self, name: str, compute: Callable[[], Any]) -> Any:
+        """Compute a view once, even when stages ask for it concurrently"""
+        views = self._views
+        if name in views:
+            return views[name]
+        with self._lock:
+            if name not in self._views:
+                self._views[name] = compute()
+            return self._views[name]
+
+    def _read(self) -> bytes:
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    @property
+    def raw_bytes(self) -> Optional[bytes]:
+        """Encoded file contents, or None for pages rasterized in memory"""
+        if self.path is None:
+            return None
+        return self._view("raw_bytes", self._read)
+
+    @property
+    def content_hash(self) -> str:
+        """Hash of the file contents (matching compute_file_hash) or of the pixels"""
+        if self.path is None:
+            return self._view("content_hash", lambda: hash_array(self.bgr))
+        return self._view("content_hash", lambda: hash_bytes(self.raw_bytes))
+
+    def _decode(self) -> np.ndarray:
+        image = cv2.imdecode(np.frombuffer(self.raw_bytes, np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError(f"Could not decode image {self.path}")
+        return image
+
+    @property
+    def bgr(self) -> np.ndarray:
+        return self._view("bgr", self._decode)
+
+    @property
+    def gray(self) -> np.ndarray:
+        return self._view("gray", lambda: cv2.cvtColor(self.bgr, cv2.COLOR_BGR2GRAY))
+
+    @property
+    def edges(self) -> np.ndarray:
+        """Canny edges with the thresholds the region detectors use"""
+        return self._view("edges", lambda: cv2.Canny(self.gray, 50, 150))
+
+    @property
+    def binary(self) -> np.ndarray:
+        """Otsu-thresholded ink mask (ink is white)"""
+        return self._view("binary", lambda: cv2.threshold(self.gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)[1])
+
+    @property
+    def pil(self) -> Image.Image:
+        """RGB PIL image for models that take one"""
+        return self._view("pil", lambda: Image.fromarray(cv2.cvtColor(self.bgr, cv2.COLOR_BGR2RGB)))
+
+    @property
+    def shape(self):
+        return self.bgr.shape
+
+    def release(self):
+        """Drop the decoded views once no stage needs pixels; the content hash is kept"""
+        # Pages rasterized in memory cannot decode their pixels again
+        keep = {"content_hash"} if self.path is not None else {"content_hash", "bgr"}
+        with self._lock:
+            self._views = {name: view for name, view in self._views.items() if name in keep}
+
+    def _long_side(self) -> int:
+        if self.path is None or "bgr" in self._views:
+            return max(self.bgr.shape[:2])
+        # PIL only parses the header here
+        return max(Image.open(io.BytesIO(self.raw_bytes)).size)
+
+    def _reduction(self) -> int:
+        if not settings.DETECTION_MAX_SIDE:
+            return 1
+        long_side = self._long_side()
+        factor = 1
+        while factor < 8 and long_side / (factor * 2) >= settings.DETECTION_MAX_SIDE:
+            factor *= 2
+        return factor
+
+    @property
+    def reduction(self) -> int:
+        """Downscale factor (1, 2, 4 or 8) of the reduced views; multiply their coordinates by it"""
+        return self._view("reduction", self._reduction)
+
+    def _decode_reduced(self) -> np.ndarray:
+        factor = self.reduction
+        if factor == 1:
+            return self.gray
+        # Resizing beats a second decode once the full image is in memory
+        if self.path is None or "gray" in self._views or "bgr" in self._views:
+            return cv2.resize(self.gray, None, fx=1 / factor, fy=1 / factor, interpolation=cv2.INTER_AREA)
+        image = cv2.imdecode(np.frombuffer(self.raw_bytes, np.uint8), REDUCED_DECODE_FLAGS[factor])
+        if image is None:
+            raise ValueError(f"Could not decode image {self.path}")
+        return image
+
+    @property
+    def reduced_gray(self) -> np.ndarray:
+        """Grayscale at reduced resolution for detectors that only need coarse structure"""
+        return self._view("reduced_gray", self._decode_reduced)
+
+    @property
+    def reduced_edges(self) -> np.ndarray:
+        return self._view("reduced_edges", lambda: cv2.Canny(self.reduced_gray, 50, 150))
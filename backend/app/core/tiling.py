@@ -0,0 +1,64 @@
+import math
+from typing import Any, List, Tuple
+
+Box = Tuple[float, float, float, float]
+
+def _spans(length: int, tile_size: int, overlap: int) -> List[Tuple[int, int]]:
+    """Evenly spaced (start, size) spans covering length with at least overlap pixels shared"""
+    if length <= tile_size:
+        return [(0, length)]
+    count = math.ceil((length - overlap) / (tile_size - overlap))
+    # All tiles share one size, so they still batch together, and the overlap
+    # is spread over every seam instead of piling up in a full-size edge tile
+    size = math.ceil((length + (count - 1) * overlap) / count)
+    return [(round(i * (length - size) / (count - 1)), size) for i in range(count)]
+
+def split_tiles(height: int, width: int, tile_size: int, overlap: int) -> List[Box]:
+    """Cover an image with equal tiles of at most tile_size pixels that overlap by at least overlap pixels"""
+    if not 0 <= overlap < tile_size:
+        raise ValueError(f"Tile overlap {overlap} must be non-negative and smaller than the tile size {tile_size}")
+
+    return [
+        (x, y, w, h)
+        for y, h in _spans(height, tile_size, overlap)
+        for x, w in _spans(width, tile_size, overlap)
+    ]
+
+def _bounds(points: List[List[float]]) -> Box:
+    xs = [x for x, _ in points]
+    ys = [y for _, y in points]
+    return min(xs), min(ys), max(xs), max(ys)
+
+def _overlap_ratio(a: Box, b: Box) -> float:
+    """Intersection over the smaller box, so a word cut at a seam matches its whole copy"""
+    width = min(a[2], b[2]) - max(a[0], b[0])
+    height = min(a[3], b[3]) - max(a[1], b[1])
+    if width <= 0 or height <= 0:
+        return 0.0
+    smaller = min((a[2] - a[0]) * (a[3] - a[1]), (b[2] - b[0]) * (b[3] - b[1]))
+    return width * height / smaller if smaller > 0 else 0.0
+
+def merge_tile_results(tiles: List[Box], tile_results: List[List[Any]], min_overlap: float = 0.5) -> List[Any]:
+    """Shift tile detections back to page coordinates and drop duplicates from the overlaps"""
+    detections = []
+    for tile_index, ((tile_x, tile_y, _, _), results) in enumerate(zip(tiles, tile_results)):
+        for bbox, text, confidence in results:
+            points = [[float(x) + tile_x, float(y) + tile_y] for x, y in bbox]
+            detections.append((tile_index, _bounds(points), points, text, float(confidence)))
+
+    # Larger boxes first: a word whole in one tile beats the fragment cut off by another
+    detections.sort(key=lambda d: (d[1][2] - d[1][0]) * (d[1][3] - d[1][1]), reverse=True)
+
+    kept = []
+    for detection in detections:
+        tile_index, bounds = detection[0], detection[1]
+        if any(other[0] != tile_index and _overlap_ratio(bounds, other[1]) >= min_overlap for other in kept):
+            continue
+        kept.append(detection)
+
+    # Restore reading order: rows of roughly one line height, then left to right
+    heights = sorted(d[1][3] - d[1][1] for d in kept)
+    line_height = max(1.0, heights[len(heights) // 2]) if heights else 1.0
+    kept.sort(key=lambda d: (round(d[1][1] / line_height), d[1][0]))
+
+    return [(points, text, confidence) for _, _, points, text, confidence in kept]
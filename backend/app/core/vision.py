@@ -1,21 +1,37 @@
 import base64
-from openai import OpenAI
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Union
 import json
 
 from app.config import settings
+from app.utils.concurrency import run_in_thread, run_io
+from app.core.model_registry import model_registry
+from app.core.page import Page
+from app.services.stage_cache import stage_cache, hash_bytes
+
+VISION_MODEL = "gpt-4-vision-preview"
+# Bump when the prompt or response parsing changes, to invalidate cached responses
+VISION_VERSION = 1
 
 class VisionAnalyzer:
     def __init__(self):
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        self._client = model_registry.register("openai", self._create_client)
+    
+    @staticmethod
+    def _create_client():
+        from openai import OpenAI
+        return OpenAI(api_key=settings.OPENAI_API_KEY)
     
-    def encode_image(self, image_path: str) -> str:
+    @property
+    def client(self):
+        return self._client.get()
+    
+    def encode_image(self, image: Union[str, Page]) -> str:
         """Encode image to base64"""
-        with open(image_path, "rb") as image_file:
-            return base64.b64encode(image_file.read()).decode('utf-8')
+        return base64.b64encode(Page.open(image).raw_bytes).decode('utf-8')
     
-    async def analyze_image(self, image_path: str, ocr_text: str) -> Dict[str, Any]:
+    async def analyze_image(self, image: Union[str, Page], ocr_text: str) -> Dict[str, Any]:
         """Use GPT-4V to understand the image better"""
+        page = Page.open(image)
         
         # For now, return a placeholder if API key is not set
         if settings.OPENAI_API_KEY == "placeholder-openai-key":
@@ -30,11 +46,22 @@ class VisionAnalyzer:
                 "suggestions": []
             }
         
+        # The same image and OCR text get the same analysis; skip the paid request
+        cache_key = stage_cache.make_key("vision", VISION_VERSION, await run_in_thread(lambda: page.content_hash), {
+            "model": VISION_MODEL,
+            "ocr_text": hash_bytes(ocr_text.encode('utf-8'))
+        })
+        cached = await run_in_thread(stage_cache.get_json, "vision", cache_key)
+        if cached is not None:
+            return cached
+        
         try:
-            base64_image = self.encode_image(image_path)
+            base64_image = await run_in_thread(self.encode_image, page)
             
-            response = self.client.chat.completions.create(
-                model="gpt-4-vision-preview",
+            # The OpenAI client is synchronous; keep the request off the event loop
+            response = await run_io(
+                self.client.chat.completions.create,
+                model=VISION_MODEL,
                 messages=[
                     {
                         "role": "system",
@@ -63,7 +90,9 @@ class VisionAnalyzer:
             result = response.choices[0].message.content
             
             # Try to extract structured data
-            return self._parse_vision_response(result, ocr_text)
+            parsed = self._parse_vision_response(result, ocr_text)
+            await run_in_thread(stage_cache.put_json, "vision", cache_key, parsed)
+            return parsed
             
         except Exception as e:
             print(f"Vision API error: {str(e)}")
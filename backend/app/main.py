@@ -1,4 +1,5 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import uvicorn
@@ -6,6 +7,12 @@ import uvicorn
 from app.config import settings
 from app.api import upload, process, documents, search, chat
 from app.services.rag import rag_service
+from app.services.workers import worker_pool
+from app.services import monitoring
+from app.services.admission import admission_controller
+from app.core.model_registry import model_registry
+from app.utils.metrics import metrics_registry
+from app.utils.limits import BodySizeLimitMiddleware
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -13,9 +20,15 @@ async def lifespan(app: FastAPI):
     print("Starting up OCR-RAG API...")
     # Initialize RAG service
     await rag_service.initialize_r2r()
+    # Load the models this process serves requests with without blocking startup
+    model_registry.warm_up(settings.API_WARMUP_MODELS)
+    # Start processing workers
+    if settings.WORKER_POOL_ENABLED:
+        worker_pool.start()
     yield
     # Shutdown
     print("Shutting down...")
+    worker_pool.stop()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -23,6 +36,17 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Reject oversized uploads before their bodies are received; the multipart
+# envelope adds a little to the file itself. Added before CORS so that CORS
+# wraps it and 413 responses still reach the browser
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    limits={
+        f"{settings.API_V1_STR}/upload/single": settings.MAX_UPLOAD_SIZE + 64 * 1024,
+        f"{settings.API_V1_STR}/upload/batch": settings.MAX_BATCH_UPLOAD_SIZE
+    }
+)
+
 # Set up CORS
 app.add_middleware(
     CORSMiddleware,
@@ -49,13 +73,40 @@ async def root():
 
 @app.get("/health")
 async def health_check():
+    """Liveness, service status and current capacity; stays 200 while saturated so the process is not restarted"""
     return {
         "status": "healthy",
         "services": {
             "api": "running",
-            "r2r": "connected" if rag_service.r2r_base_url else "not configured"
-        }
+            "r2r": "connected" if rag_service.r2r_base_url else "not configured",
+            "workers": worker_pool.alive()
+        },
+        "models": model_registry.status(),
+        "capacity": admission_controller.capacity()
     }
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness and capacity; answers 503 while warming up or saturated so load balancers shed load"""
+    capacity = admission_controller.capacity()
+    models_ready = model_registry.ready(settings.API_WARMUP_MODELS)
+    ready = capacity["accepting"] and models_ready
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else ("saturated" if models_ready else "warming_up"),
+            "models_ready": models_ready,
+            "capacity": capacity
+        }
+    )
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics"""
+    return PlainTextResponse(
+        metrics_registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
 if __name__ == "__main__":
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
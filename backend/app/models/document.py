@@ -1,13 +1,15 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from enum import Enum
 
 class ProcessingStatus(str, Enum):
     PENDING = "pending"
+    QUEUED = "queued"
     PROCESSING = "processing"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
 
 class DocumentBase(BaseModel):
     title: str
@@ -38,6 +40,9 @@ class OCRResult(BaseModel):
     detected_languages: List[str]
     has_math: bool
     math_expressions: Optional[List[str]] = None
+    pages: int = 1
+    # Per page: the denoising chain used and the quality estimate behind it
+    preprocessing: Optional[List[Dict[str, Any]]] = None
 
 class SearchQuery(BaseModel):
     query: str
@@ -0,0 +1,54 @@
+from typing import Any, Dict, Optional
+from fastapi import HTTPException
+
+from app.config import settings
+from app.services.job_queue import job_queue, JobStatus
+
+def available_memory_mb() -> Optional[float]:
+    """Memory available to new work, from /proc/meminfo (None when unavailable)"""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+class AdmissionController:
+    """Reject new work while the queue is full or memory headroom is low"""
+
+    def capacity(self) -> Dict[str, Any]:
+        """Current load against the configured limits"""
+        counts = job_queue.active_counts()
+        memory_mb = available_memory_mb()
+
+        reason = None
+        if settings.MAX_QUEUE_DEPTH > 0 and counts[JobStatus.QUEUED.value] >= settings.MAX_QUEUE_DEPTH:
+            reason = "Processing queue is full"
+        elif settings.MIN_FREE_MEMORY_MB > 0 and memory_mb is not None and memory_mb < settings.MIN_FREE_MEMORY_MB:
+            reason = "Insufficient memory headroom"
+
+        return {
+            "accepting": reason is None,
+            "reason": reason,
+            "queue_depth": counts[JobStatus.QUEUED.value],
+            "max_queue_depth": settings.MAX_QUEUE_DEPTH,
+            "in_flight": counts[JobStatus.RUNNING.value],
+            "max_in_flight": settings.MAX_IN_FLIGHT_JOBS or settings.MAX_WORKERS,
+            "available_memory_mb": round(memory_mb) if memory_mb is not None else None,
+            "min_free_memory_mb": settings.MIN_FREE_MEMORY_MB
+        }
+
+    def admit(self):
+        """Raise 429 with Retry-After when the service is saturated"""
+        capacity = self.capacity()
+        if not capacity["accepting"]:
+            raise HTTPException(
+                429,
+                capacity["reason"],
+                headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER)}
+            )
+
+# Global admission controller instance
+admission_controller = AdmissionController()
@@ -0,0 +1,64 @@
+import os
+import json
+import shutil
+import hashlib
+from typing import Any, Dict, Optional
+
+from app.config import settings
+
+class CheckpointStore:
+    """Persist each pipeline stage's output keyed by its input hash and stage version"""
+
+    def __init__(self):
+        self.root = os.path.join(settings.PROCESSED_DIR, "checkpoints")
+
+    @staticmethod
+    def hash_inputs(inputs: Dict[str, Any]) -> str:
+        """Stable hash of a stage's inputs"""
+        payload = json.dumps(inputs, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, document_id: str, stage: str) -> str:
+        return os.path.join(self.root, document_id, f"{stage}.json")
+
+    def load(self, document_id: str, stage: str, input_hash: str, version: int) -> Optional[Dict[str, Any]]:
+        """Get a stage checkpoint if its inputs and version still match"""
+        path = self._path(document_id, stage)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with open(path, 'r') as f:
+                checkpoint = json.load(f)
+        except Exception as e:
+            print(f"Unreadable checkpoint {path}: {str(e)}")
+            return None
+
+        if checkpoint.get("input_hash") != input_hash or checkpoint.get("version") != version:
+            return None
+
+        return checkpoint
+
+    def save(self, document_id: str, stage: str, input_hash: str, version: int,
+             output: Any, step: Dict[str, Any]):
+        """Atomically write a stage checkpoint"""
+        path = self._path(document_id, stage)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                "stage": stage,
+                "version": version,
+                "input_hash": input_hash,
+                "output": output,
+                "step": step
+            }, f)
+        os.replace(tmp_path, path)
+
+    def clear(self, document_id: str):
+        """Remove all checkpoints of a document"""
+        shutil.rmtree(os.path.join(self.root, document_id), ignore_errors=True)
+
+# Global checkpoint store instance
+checkpoint_store = CheckpointStore()
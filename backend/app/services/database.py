@@ -0,0 +1,76 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from app.config import settings
+
+class Database:
+    """Shared SQLite database in WAL mode with one connection per process"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or settings.DATABASE_PATH
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._initializers: List[Callable[[], None]] = []
+
+    def add_initializer(self, initializer: Callable[[], None]):
+        """Register a schema initializer run whenever a process opens the database"""
+        self._initializers.append(initializer)
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Get a connection for the current process, creating schemas on first use"""
+        # Connections must not be shared across forked or spawned worker processes
+        if self._conn is None or self._pid != os.getpid():
+            with self._lock:
+                if self._conn is None or self._pid != os.getpid():
+                    self._conn = self._connect()
+                    self._pid = os.getpid()
+                    for initializer in self._initializers:
+                        initializer()
+        return self._conn
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database in WAL mode"""
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30.0, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def execute(self, sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        """Run a write statement"""
+        with self._lock:
+            return self.conn.execute(sql, params)
+
+    def executescript(self, script: str):
+        """Run a multi-statement script"""
+        with self._lock:
+            self.conn.executescript(script)
+
+    def query(self, sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        """Run a read query and return rows as dicts"""
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [dict(row) for row in rows]
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run statements atomically, holding the write lock across processes"""
+        with self._lock:
+            conn = self.conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+# Global database instance
+database = Database()
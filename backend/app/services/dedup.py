@@ -0,0 +1,40 @@
+import os
+import hashlib
+from typing import Optional
+
+from app.models.document import ProcessingStatus
+from app.services.registry import document_registry
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+def compute_file_hash(file_path: str) -> str:
+    """Compute SHA-256 of a file without loading it into memory"""
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+class DedupRegistry:
+    """Content-hash lookups mapping identical uploads to one processed artifact set"""
+
+    def get_hash(self, document_id: str) -> Optional[str]:
+        """Get the recorded content hash of a document"""
+        document = document_registry.get(document_id)
+        return document["content_hash"] if document else None
+
+    def find_processed(self, content_hash: str, exclude_id: Optional[str] = None) -> Optional[str]:
+        """Find a completed document with identical content"""
+        for document in document_registry.find_by_hash(content_hash, ProcessingStatus.COMPLETED):
+            if document["id"] == exclude_id:
+                continue
+
+            # Only alias documents whose artifacts are still on disk
+            if (document["ocr_path"] and os.path.exists(document["ocr_path"]) and
+                    document["result_path"] and os.path.exists(document["result_path"])):
+                return document["id"]
+
+        return None
+
+# Global dedup registry instance
+dedup_registry = DedupRegistry()
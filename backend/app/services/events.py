@@ -0,0 +1,61 @@
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+EventCallback = Callable[[str, Dict[str, Any]], None]
+
+class EventBus:
+    """Publish pipeline events to subscribers, across worker processes if needed"""
+
+    def __init__(self):
+        self._subscribers: List[EventCallback] = []
+        self._forward_queue = None
+        self._pump: Optional[threading.Thread] = None
+
+    def subscribe(self, callback: EventCallback):
+        """Register a callback receiving (kind, payload)"""
+        self._subscribers.append(callback)
+
+    def publish(self, kind: str, payload: Dict[str, Any]):
+        """Publish an event, forwarding it to the API process from workers"""
+        if self._forward_queue is not None:
+            try:
+                self._forward_queue.put((kind, payload))
+            except Exception as e:
+                print(f"Event forwarding error: {str(e)}")
+            return
+
+        self.dispatch(kind, payload)
+
+    def dispatch(self, kind: str, payload: Dict[str, Any]):
+        """Deliver an event to local subscribers"""
+        for callback in self._subscribers:
+            try:
+                callback(kind, payload)
+            except Exception as e:
+                print(f"Event subscriber error for {kind}: {str(e)}")
+
+    def forward_to(self, event_queue):
+        """Send all events published in this process to a multiprocessing queue"""
+        self._forward_queue = event_queue
+
+    def start_pump(self, event_queue):
+        """Dispatch events arriving from worker processes in a background thread"""
+        def pump():
+            while True:
+                item = event_queue.get()
+                if item is None:
+                    break
+                self.dispatch(*item)
+
+        self._pump = threading.Thread(target=pump, name="event-pump", daemon=True)
+        self._pump.start()
+
+    def stop_pump(self, event_queue):
+        """Stop the pump thread after pending events are delivered"""
+        if self._pump:
+            event_queue.put(None)
+            self._pump.join(timeout=5)
+            self._pump = None
+
+# Global event bus instance
+event_bus = EventBus()
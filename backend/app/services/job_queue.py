@@ -0,0 +1,303 @@
+import os
+import time
+import socket
+from typing import Dict, Any, Optional, Tuple
+from enum import Enum
+
+from app.config import settings
+from app.services.database import database
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+class JobPriority(str, Enum):
+    INTERACTIVE = "interactive"
+    BULK = "bulk"
+
+ANONYMOUS_USER = "anonymous"
+
+def estimate_cost(file_path: str) -> float:
+    """Relative processing cost of a file, roughly one unit per MB"""
+    try:
+        return 1.0 + os.path.getsize(file_path) / (1024 * 1024)
+    except OSError:
+        return 1.0
+
+def worker_gone(worker_id: Optional[str]) -> bool:
+    """Whether a worker id ("host:pid:index") names a process on this host that has exited"""
+    if not worker_id:
+        return True
+    parts = worker_id.rsplit(":", 2)
+    if len(parts) != 3 or parts[0] != socket.gethostname() or not parts[1].isdigit():
+        # Workers on other hosts are only judged by their lease
+        return False
+    try:
+        os.kill(int(parts[1]), 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        pass
+    return False
+
+class JobQueue:
+    """Durable processing queue stored in SQLite with at-least-once delivery"""
+
+    def __init__(self):
+        database.add_initializer(self._create_schema)
+
+    def _create_schema(self):
+        """Create the jobs table"""
+        database.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                document_id TEXT NOT NULL,
+                file_path TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL,
+                worker_id TEXT,
+                lease_expires_at REAL,
+                last_error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, id);
+            CREATE INDEX IF NOT EXISTS idx_jobs_document ON jobs (document_id, status);
+            CREATE TABLE IF NOT EXISTS job_tenants (
+                user_id TEXT PRIMARY KEY,
+                last_finish_tag REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS job_scheduler (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                virtual_time REAL NOT NULL
+            );
+            INSERT OR IGNORE INTO job_scheduler (id, virtual_time) VALUES (1, 0);
+        """)
+
+        # Columns added after the table was first created
+        columns = {row["name"] for row in database.query("PRAGMA table_info(jobs)")}
+        for name, definition in (
+            ("user_id", f"TEXT NOT NULL DEFAULT '{ANONYMOUS_USER}'"),
+            ("priority", f"TEXT NOT NULL DEFAULT '{JobPriority.INTERACTIVE.value}'"),
+            ("start_tag", "REAL NOT NULL DEFAULT 0"),
+            ("cancel_requested", "INTEGER NOT NULL DEFAULT 0")
+        ):
+            if name not in columns:
+                database.execute(f"ALTER TABLE jobs ADD COLUMN {name} {definition}")
+
+    def enqueue(self, document_id: str, file_path: str, user_id: Optional[str] = None,
+                priority: JobPriority = JobPriority.INTERACTIVE) -> Tuple[int, bool]:
+        """Queue a document for processing, reusing an already active job.
+
+        Returns the job id and whether a new job was created.
+        """
+        now = time.time()
+        user_id = user_id or ANONYMOUS_USER
+        weight = settings.TENANT_WEIGHTS.get(user_id, 1.0)
+        cost = estimate_cost(file_path)
+
+        with database.transaction() as conn:
+            active = conn.execute(
+                "SELECT id FROM jobs WHERE document_id = ? AND status IN (?, ?) AND cancel_requested = 0",
+                (document_id, JobStatus.QUEUED.value, JobStatus.RUNNING.value)
+            ).fetchone()
+            if active:
+                return active["id"], False
+
+            # Start-time fair queuing: a job starts at the later of the virtual time and
+            # its user's last finish tag, and the user's finish tag advances by cost / weight
+            virtual_time = conn.execute("SELECT virtual_time FROM job_scheduler WHERE id = 1").fetchone()["virtual_time"]
+            tenant = conn.execute(
+                "SELECT last_finish_tag FROM job_tenants WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            start_tag = max(virtual_time, tenant["last_finish_tag"] if tenant else 0.0)
+            conn.execute(
+                """INSERT INTO job_tenants (user_id, last_finish_tag) VALUES (?, ?)
+                   ON CONFLICT(user_id) DO UPDATE SET last_finish_tag = excluded.last_finish_tag""",
+                (user_id, start_tag + cost / weight)
+            )
+
+            cursor = conn.execute(
+                """INSERT INTO jobs (document_id, file_path, status, max_attempts, user_id, priority,
+                   start_tag, created_at, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (document_id, file_path, JobStatus.QUEUED.value, settings.JOB_MAX_ATTEMPTS,
+                 user_id, priority.value, start_tag, now, now)
+            )
+            return cursor.lastrowid, True
+
+    def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """Lease the next job by priority class, then fair-queuing start tag"""
+        now = time.time()
+
+        with database.transaction() as conn:
+            # Jobs whose worker stopped renewing its lease are handed out again
+            conn.execute(
+                """UPDATE jobs SET status = CASE WHEN cancel_requested THEN ? ELSE ? END,
+                   worker_id = NULL, updated_at = ? WHERE status = ? AND lease_expires_at < ?""",
+                (JobStatus.CANCELLED.value, JobStatus.QUEUED.value, now, JobStatus.RUNNING.value, now)
+            )
+
+            # Cap concurrently running jobs across every pool sharing the database
+            if settings.MAX_IN_FLIGHT_JOBS > 0:
+                running = conn.execute(
+                    "SELECT COUNT(*) AS n FROM jobs WHERE status = ?", (JobStatus.RUNNING.value,)
+                ).fetchone()["n"]
+                if running >= settings.MAX_IN_FLIGHT_JOBS:
+                    return None
+
+            # Interactive jobs first (bulk jobs are promoted once they have waited
+            # BULK_AGING_SECONDS), then the lowest fair-queuing start tag
+            row = conn.execute(
+                """SELECT * FROM jobs WHERE status = ?
+                   ORDER BY CASE WHEN priority = ? OR created_at < ? THEN 0 ELSE 1 END, start_tag, id
+                   LIMIT 1""",
+                (JobStatus.QUEUED.value, JobPriority.INTERACTIVE.value, now - settings.BULK_AGING_SECONDS)
+            ).fetchone()
+            if not row:
+                return None
+
+            # Virtual time follows the start tag of the job entering service
+            conn.execute(
+                "UPDATE job_scheduler SET virtual_time = MAX(virtual_time, ?) WHERE id = 1",
+                (row["start_tag"],)
+            )
+
+            conn.execute(
+                """UPDATE jobs SET status = ?, worker_id = ?, attempts = attempts + 1,
+                   lease_expires_at = ?, updated_at = ? WHERE id = ?""",
+                (JobStatus.RUNNING.value, worker_id, now + settings.JOB_LEASE_SECONDS, now, row["id"])
+            )
+
+        job = dict(row)
+        job["attempts"] += 1
+        return job
+
+    def heartbeat(self, job_id: int, worker_id: str) -> bool:
+        """Extend the lease of a running job"""
+        now = time.time()
+        cursor = database.execute(
+            "UPDATE jobs SET lease_expires_at = ?, updated_at = ? WHERE id = ? AND worker_id = ? AND status = ?",
+            (now + settings.JOB_LEASE_SECONDS, now, job_id, worker_id, JobStatus.RUNNING.value)
+        )
+        return cursor.rowcount > 0
+
+    def complete(self, job_id: int, worker_id: str) -> bool:
+        """Mark a job as done, unless the worker's lease was lost and the job handed out again"""
+        cursor = database.execute(
+            """UPDATE jobs SET status = ?, lease_expires_at = NULL, updated_at = ?
+               WHERE id = ? AND worker_id = ? AND status = ?""",
+            (JobStatus.COMPLETED.value, time.time(), job_id, worker_id, JobStatus.RUNNING.value)
+        )
+        return cursor.rowcount > 0
+
+    def fail(self, job_id: int, worker_id: str, error: str) -> bool:
+        """Record a failed attempt, requeueing the job while attempts remain"""
+        now = time.time()
+
+        with database.transaction() as conn:
+            # A worker whose lease was lost no longer owns the job's outcome
+            row = conn.execute(
+                "SELECT attempts, max_attempts, cancel_requested FROM jobs WHERE id = ? AND worker_id = ? AND status = ?",
+                (job_id, worker_id, JobStatus.RUNNING.value)
+            ).fetchone()
+            if not row:
+                return False
+
+            retry = row["attempts"] < row["max_attempts"] and not row["cancel_requested"]
+            conn.execute(
+                """UPDATE jobs SET status = ?, worker_id = NULL, lease_expires_at = NULL,
+                   last_error = ?, updated_at = ? WHERE id = ?""",
+                (JobStatus.QUEUED.value if retry else JobStatus.FAILED.value, error, now, job_id)
+            )
+
+        return retry
+
+    def recover(self) -> int:
+        """Requeue jobs left running by a previous crash or restart.
+
+        Other pools may share the database, so a running job is only taken
+        back when its lease has expired or its worker process on this host
+        no longer exists.
+        """
+        now = time.time()
+
+        with database.transaction() as conn:
+            rows = conn.execute(
+                "SELECT id, worker_id, lease_expires_at FROM jobs WHERE status = ?",
+                (JobStatus.RUNNING.value,)
+            ).fetchall()
+            orphaned = [
+                row["id"] for row in rows
+                if row["lease_expires_at"] is None or row["lease_expires_at"] < now or worker_gone(row["worker_id"])
+            ]
+            for job_id in orphaned:
+                conn.execute(
+                    """UPDATE jobs SET status = CASE WHEN cancel_requested THEN ? ELSE ? END,
+                       worker_id = NULL, lease_expires_at = NULL, updated_at = ? WHERE id = ? AND status = ?""",
+                    (JobStatus.CANCELLED.value, JobStatus.QUEUED.value, now, job_id, JobStatus.RUNNING.value)
+                )
+
+        return len(orphaned)
+
+    def cancel(self, document_id: str) -> Dict[str, int]:
+        """Drop a document's queued jobs and ask its running job to stop"""
+        now = time.time()
+
+        with database.transaction() as conn:
+            queued = conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE document_id = ? AND status = ?",
+                (JobStatus.CANCELLED.value, now, document_id, JobStatus.QUEUED.value)
+            ).rowcount
+            running = conn.execute(
+                "UPDATE jobs SET cancel_requested = 1, updated_at = ? WHERE document_id = ? AND status = ?",
+                (now, document_id, JobStatus.RUNNING.value)
+            ).rowcount
+
+        return {"queued": queued, "running": running}
+
+    def cancel_requested(self, job_id: int) -> bool:
+        """Whether a running job was asked to stop"""
+        rows = database.query("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,))
+        return bool(rows and rows[0]["cancel_requested"])
+
+    def mark_cancelled(self, job_id: int, worker_id: str) -> bool:
+        """Record that a running job stopped after cancellation"""
+        cursor = database.execute(
+            """UPDATE jobs SET status = ?, lease_expires_at = NULL, updated_at = ?
+               WHERE id = ? AND worker_id = ? AND status = ?""",
+            (JobStatus.CANCELLED.value, time.time(), job_id, worker_id, JobStatus.RUNNING.value)
+        )
+        return cursor.rowcount > 0
+
+    def get_active(self, document_id: str) -> Optional[Dict[str, Any]]:
+        """Get the queued or running job for a document"""
+        rows = database.query(
+            "SELECT * FROM jobs WHERE document_id = ? AND status IN (?, ?) ORDER BY id DESC LIMIT 1",
+            (document_id, JobStatus.QUEUED.value, JobStatus.RUNNING.value)
+        )
+        return rows[0] if rows else None
+
+    def counts(self) -> Dict[str, int]:
+        """Count jobs per status"""
+        rows = database.query("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status")
+        counts = {status.value: 0 for status in JobStatus}
+        counts.update({row["status"]: row["n"] for row in rows})
+        return counts
+
+    def active_counts(self) -> Dict[str, int]:
+        """Count queued and running jobs"""
+        rows = database.query(
+            "SELECT status, COUNT(*) AS n FROM jobs WHERE status IN (?, ?) GROUP BY status",
+            (JobStatus.QUEUED.value, JobStatus.RUNNING.value)
+        )
+        counts = {JobStatus.QUEUED.value: 0, JobStatus.RUNNING.value: 0}
+        counts.update({row["status"]: row["n"] for row in rows})
+        return counts
+
+# Global job queue instance
+job_queue = JobQueue()
@@ -0,0 +1,31 @@
+import os
+from typing import Any, Dict
+
+from app.config import settings
+from app.services.events import event_bus
+from app.services.job_queue import job_queue
+from app.services.rag import rag_service
+from app.utils.metrics import metrics_registry, jobs, local_index_documents, local_index_bytes
+
+def _job_counts() -> Dict[tuple, float]:
+    """Current job counts per status"""
+    return {(status,): count for status, count in job_queue.counts().items()}
+
+def _local_index_bytes() -> Dict[tuple, float]:
+    """Size of the local index file"""
+    index_path = os.path.join(settings.PROCESSED_DIR, "document_index.json")
+    return {(): os.path.getsize(index_path) if os.path.exists(index_path) else 0}
+
+def _local_index_documents() -> Dict[tuple, float]:
+    """Documents in the local index file, which worker processes update"""
+    return {(): rag_service.local_document_count()}
+
+def _apply_forwarded_metric(kind: str, payload: Dict[str, Any]):
+    """Record metric updates sent by worker processes"""
+    if kind == "metric":
+        metrics_registry.apply(payload)
+
+jobs.set_function(_job_counts)
+local_index_bytes.set_function(_local_index_bytes)
+local_index_documents.set_function(_local_index_documents)
+event_bus.subscribe(_apply_forwarded_metric)
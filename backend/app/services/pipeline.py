@@ -0,0 +1,37 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Sequence
+
+StageFunction = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+class Stage:
+    """A pipeline stage and the stages whose outputs it consumes"""
+
+    def __init__(self, name: str, fn: StageFunction, deps: Sequence[str] = ()):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+
+async def run_pipeline(stages: List[Stage]) -> Dict[str, Any]:
+    """Run each stage as soon as its dependencies finish and return all outputs"""
+    tasks: Dict[str, asyncio.Task] = {}
+
+    async def run(stage: Stage) -> Any:
+        inputs = {dep: await tasks[dep] for dep in stage.deps}
+        return await stage.fn(inputs)
+
+    for stage in stages:
+        missing = [dep for dep in stage.deps if dep not in tasks]
+        if missing:
+            raise ValueError(f"Stage {stage.name} depends on unknown or later stages: {missing}")
+        tasks[stage.name] = asyncio.ensure_future(run(stage))
+
+    try:
+        outputs = await asyncio.gather(*tasks.values())
+    except BaseException:
+        # Do not leave sibling stages running after a failure
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        raise
+
+    return dict(zip(tasks.keys(), outputs))
@@ -1,23 +1,113 @@
 import os
-import asyncio
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Tuple, Sequence, Callable, Awaitable
 from datetime import datetime
 import json
+import shutil
+import threading
 
 from app.config import settings
 from app.core.ocr import ocr_engine
 from app.core.vision import vision_analyzer
 from app.core.latex import latex_generator
 from app.core.pdf import pdf_generator
+from app.core.diagram_detector import diagram_detector
+from app.core.math_ocr import math_ocr
+from app.core.page import Page
 from app.services.rag import rag_service
 from app.services.storage import storage_service
-from app.models.document import ProcessingStatus
+from app.services.dedup import dedup_registry, compute_file_hash
+from app.services.registry import document_registry
+from app.services.job_queue import job_queue
+from app.services.checkpoints import checkpoint_store
+from app.services.pipeline import Stage, run_pipeline
+from app.models.document import ProcessingStatus, OCRResult
+from app.services.events import event_bus
+from app.utils.concurrency import run_in_thread
+from app.utils.cancellation import cancellation_scope, check_cancelled, is_cancelled, ProcessingCancelled
+from app.utils.profiling import collect_stages, stage_timer
+from app.utils.metrics import stage_duration, documents_processed, cache_requests
+
+# Bump a stage's version when its output changes so existing checkpoints are re-run
+STAGE_VERSIONS = {
+    "storage": 1,
+    "ocr": 2,
+    "math_ocr": 2,
+    "vision": 2,
+    "diagrams": 2,
+    "pdf": 1,
+    "rag_indexing": 1
+}
+
+class PipelineRun:
+    """State shared by the stages of one pipeline run"""
+    
+    def __init__(self, document_id: str, file_path: str, content_hash: str):
+        self.document_id = document_id
+        self.file_path = file_path
+        self.content_hash = content_hash
+        self.file_size = os.path.getsize(file_path)
+        self.is_multipage = file_path.lower().endswith('.pdf')
+        self.title = os.path.basename(file_path).split('.')[0]
+        self.ocr_path = os.path.join(settings.PROCESSED_DIR, f"{document_id}_ocr.txt")
+        self.pdf_path = os.path.join(settings.PROCESSED_DIR, f"{document_id}.pdf")
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        # Single images are decoded once, on first use, for every stage that reads pixels
+        self.page = None if self.is_multipage else Page(file_path)
 
 class DocumentProcessor:
-    def __init__(self):
-        self.processing_queue = asyncio.Queue()
+    async def process_document(self, document_id: str, file_path: str,
+                               cancel_event: Optional[threading.Event] = None) -> Dict[str, Any]:
+        """Run the pipeline and record per-stage timing and resource usage"""
+        document_registry.set_status(document_id, ProcessingStatus.PROCESSING)
+        event_bus.publish("document_started", {"document_id": document_id})
+        
+        with cancellation_scope(cancel_event), collect_stages() as collector:
+            result = await self._process(document_id, file_path)
+            
+            # A cancellation that lands after the last cancellation point still wins
+            if is_cancelled():
+                result["status"] = ProcessingStatus.CANCELLED
+        
+        # Attach stage metrics to the steps they belong to
+        collector.attach(result["steps"])
+        
+        if document_registry.get(document_id) is None:
+            # Drop whatever the run wrote for a document deleted while it was processing
+            result["status"] = ProcessingStatus.CANCELLED
+            await self._discard_artifacts(document_id)
+        else:
+            result_path = os.path.join(settings.PROCESSED_DIR, f"{document_id}_result.json")
+            with open(result_path, 'w') as f:
+                json.dump(result, f, indent=2)
+            
+            if result["status"] == ProcessingStatus.COMPLETED:
+                document_registry.set_status(
+                    document_id, ProcessingStatus.COMPLETED,
+                    content_hash=result.get("content_hash"),
+                    ocr_path=os.path.join(settings.PROCESSED_DIR, f"{document_id}_ocr.txt"),
+                    pdf_path=os.path.join(settings.PROCESSED_DIR, f"{document_id}.pdf"),
+                    result_path=result_path
+                )
+            else:
+                document_registry.set_status(document_id, result["status"], result_path=result_path)
+        
+        document_class = result.get("document_class", "unknown")
+        for stage, metrics in collector.stages.items():
+            stage_duration.observe(metrics["wall_time"], stage=stage, document_class=document_class)
+        documents_processed.inc(status=result["status"].value, document_class=document_class)
+        
+        event_bus.publish("document_finished", {
+            "document_id": document_id,
+            "document_class": document_class,
+            "status": result["status"],
+            "stages": collector.stages,
+            "summary": result.get("summary"),
+            "error": result.get("error")
+        })
+        
+        return result
     
-    async def process_document(self, document_id: str, file_path: str) -> Dict[str, Any]:
+    async def _process(self, document_id: str, file_path: str) -> Dict[str, Any]:
         """Main processing pipeline with RAG indexing"""
         result = {
             "document_id": document_id,
@@ -26,133 +116,167 @@ class DocumentProcessor:
         }
         
         try:
-            # Step 1: Upload original to storage
-            print(f"Step 1: Uploading original file for {document_id}")
-            upload_success, storage_url = await storage_service.upload_file(file_path)
-            if upload_success:
-                result["steps"]["storage"] = {
-                    "status": "completed",
-                    "url": storage_url
-                }
+            # Identical content that was already processed is aliased instead of reprocessed
+            content_hash = dedup_registry.get_hash(document_id) or await run_in_thread(compute_file_hash, file_path)
+            source_id = dedup_registry.find_processed(content_hash, exclude_id=document_id)
+            cache_requests.inc(cache="dedup", result="hit" if source_id else "miss")
+            if source_id:
+                print(f"Document {document_id} duplicates {source_id}, reusing artifacts")
+                return await self._alias_document(document_id, file_path, source_id, content_hash)
             
-            # Step 2: OCR Processing
-            print(f"Step 2: OCR processing for {document_id}")
-            ocr_result = ocr_engine.process_image(file_path)
-            result["steps"]["ocr"] = {
-                "status": "completed",
-                "text": ocr_result.text,
-                "confidence": ocr_result.confidence
-            }
-            
-            # Save OCR text
-            ocr_path = os.path.join(settings.PROCESSED_DIR, f"{document_id}_ocr.txt")
-            with open(ocr_path, 'w', encoding='utf-8') as f:
-                f.write(ocr_result.text)
+            result["content_hash"] = content_hash
+            run = PipelineRun(document_id, file_path, content_hash)
+            result["steps"] = run.steps
             
-            # ============= ADD MATH OCR HERE =============
-            # Step 2.5: Math OCR (if math detected)
-            enhanced_text = ocr_result.text  # Initialize enhanced_text
+            # Storage, OCR and diagram detection only need the original file; vision and
+            # math OCR only need the OCR text, so their round-trips overlap local CPU work
+            async def storage(deps):
+                print(f"Uploading original file for {document_id}")
+                output = await self._run_stage(
+                    run, "storage", {"content_hash": content_hash},
+                    self._storage_stage, input_bytes=run.file_size
+                )
+                return output["url"] if output["success"] else None
             
-            if ocr_result.has_math:
-                print(f"Step 2.5: Math OCR processing for {document_id}")
-                from app.core.math_ocr import math_ocr
+            async def ocr(deps):
+                print(f"OCR processing for {document_id}")
+                output = await self._run_stage(
+                    run, "ocr", {
+                        "content_hash": content_hash,
+                        "pdf_dpi": settings.PDF_DPI,
+                        "preprocess_mode": settings.PREPROCESS_MODE,
+                        "tile_size": settings.OCR_TILE_SIZE,
+                        "tile_overlap": settings.OCR_TILE_OVERLAP,
+                        "target_text_height": settings.OCR_TARGET_TEXT_HEIGHT,
+                        "min_scale": settings.OCR_MIN_SCALE
+                    },
+                    self._ocr_stage, input_bytes=run.file_size, artifacts=[run.ocr_path]
+                )
+                ocr_result = OCRResult(**output)
                 
-                math_result = math_ocr.process_math_image(file_path, ocr_result.text)
-                
-                result["steps"]["math_ocr"] = {
-                    "status": "completed",
-                    "latex_expressions": math_result.get("latex_expressions", []),
-                    "pix2tex_success": math_result.get("pix2tex_success", False)
-                }
-                
-                # If we found LaTeX expressions, append them to the text
-                if math_result.get("latex_expressions"):
-                    enhanced_text += "\n\nMathematical Expressions:\n"
-                    for expr in math_result["latex_expressions"]:
-                        enhanced_text += f"\n{expr}"
-            # ============= END OF MATH OCR ADDITION =============
-            
-            # Step 3: Vision Analysis (if API key is set)
-            if settings.OPENAI_API_KEY != "placeholder-openai-key":
-                print(f"Step 3: Vision analysis for {document_id}")
-                vision_result = await vision_analyzer.analyze_image(file_path, ocr_result.text)
-                result["steps"]["vision"] = {
-                    "status": "completed",
-                    "enhanced_text": vision_result.get("enhanced_text", ocr_result.text)
-                }
-                enhanced_text = vision_result.get("enhanced_text", enhanced_text)  # Use enhanced_text
-            else:
-                result["steps"]["vision"] = {"status": "skipped", "reason": "No API key"}
+                # Math OCR, vision and diagram detection work on single page images
+                if run.is_multipage:
+                    result["document_class"] = "pdf"
+                else:
+                    result["document_class"] = "math" if ocr_result.has_math else "image"
+                return ocr_result
             
-            # Step 4: Generate PDF
-            print(f"Step 4: PDF generation for {document_id}")
-            pdf_path = os.path.join(settings.PROCESSED_DIR, f"{document_id}.pdf")
+            async def diagrams(deps):
+                if run.is_multipage:
+                    self._record_step(run, "diagrams", {"status": "skipped", "reason": "Multi-page PDF"})
+                    return []
+                print(f"Diagram detection for {document_id}")
+                return await self._run_stage(
+                    run, "diagrams", {"content_hash": content_hash, "detection_max_side": settings.DETECTION_MAX_SIDE},
+                    self._diagram_stage, input_bytes=run.file_size
+                )
             
-            # Extract title from filename or first line
-            title = os.path.basename(file_path).split('.')[0]
+            async def math(deps):
+                ocr_result = deps["ocr"]
+                if not ocr_result.has_math or run.is_multipage:
+                    return []
+                print(f"Math OCR processing for {document_id}")
+                return await self._run_stage(
+                    run, "math_ocr", {
+                        "content_hash": content_hash,
+                        "text": ocr_result.text,
+                        "detection_max_side": settings.DETECTION_MAX_SIDE
+                    },
+                    lambda run, metrics: self._math_ocr_stage(run, metrics, ocr_result.text),
+                    input_bytes=run.file_size
+                )
             
-            metadata = {
-                "document_id": document_id,
-                "processed_date": datetime.now().strftime("%Y-%m-%d %H:%M"),
-                "ocr_confidence": f"{ocr_result.confidence:.1%}",
-                "has_math": str(ocr_result.has_math),
-                "original_file": os.path.basename(file_path)
-            }
+            async def vision(deps):
+                ocr_result = deps["ocr"]
+                if run.is_multipage:
+                    self._record_step(run, "vision", {"status": "skipped", "reason": "Multi-page PDF"})
+                    return None
+                if settings.OPENAI_API_KEY == "placeholder-openai-key":
+                    self._record_step(run, "vision", {"status": "skipped", "reason": "No API key"})
+                    return None
+                print(f"Vision analysis for {document_id}")
+                return await self._run_stage(
+                    run, "vision", {"content_hash": content_hash, "text": ocr_result.text},
+                    lambda run, metrics: self._vision_stage(run, metrics, ocr_result.text),
+                    input_bytes=run.file_size
+                )
             
-            pdf_generator.create_pdf(
-                output_path=pdf_path,
-                title=title,
-                content=enhanced_text,
-                metadata=metadata
-            )
-            
-            # Upload PDF to storage
-            pdf_upload_success, pdf_url = await storage_service.upload_file(pdf_path)
+            async def text(deps):
+                # Vision output supersedes the OCR text; otherwise append recognized LaTeX
+                if deps["vision"]:
+                    return deps["vision"]
+                enhanced_text = deps["ocr"].text
+                if deps["math_ocr"]:
+                    enhanced_text += "\n\nMathematical Expressions:\n"
+                    for expr in deps["math_ocr"]:
+                        enhanced_text += f"\n{expr}"
+                return enhanced_text
             
-            result["steps"]["pdf"] = {
-                "status": "completed",
-                "path": pdf_path,
-                "url": pdf_url if pdf_upload_success else pdf_path
-            }
+            async def release_page(deps):
+                # A 12 MP photo holds ~100 MB of decoded views; the remaining stages only need text
+                if run.page is not None:
+                    run.page.release()
             
-            # Step 5: RAG Indexing
-            print(f"Step 5: RAG indexing for {document_id}")
-            index_metadata = {
-                "title": title,
-                "document_id": document_id,
-                "confidence": ocr_result.confidence,
-                "has_math": ocr_result.has_math,
-                "processed_date": datetime.now().isoformat(),
-                "original_url": storage_url if upload_success else file_path,
-                "pdf_url": pdf_url if pdf_upload_success else pdf_path
-            }
+            async def pdf(deps):
+                ocr_result, enhanced_text = deps["ocr"], deps["text"]
+                print(f"PDF generation for {document_id}")
+                metadata = {
+                    "document_id": document_id,
+                    "ocr_confidence": f"{ocr_result.confidence:.1%}",
+                    "has_math": str(ocr_result.has_math),
+                    "original_file": os.path.basename(file_path)
+                }
+                output = await self._run_stage(
+                    run, "pdf", {"content": enhanced_text, "title": run.title, "metadata": metadata},
+                    lambda run, metrics: self._pdf_stage(run, metrics, enhanced_text, metadata),
+                    input_bytes=len(enhanced_text.encode('utf-8')), artifacts=[run.pdf_path]
+                )
+                return output["url"]
             
-            index_success = await rag_service.index_document(
-                document_id=document_id,
-                content=enhanced_text,
-                metadata=index_metadata
-            )
+            async def rag_indexing(deps):
+                ocr_result, enhanced_text = deps["ocr"], deps["text"]
+                print(f"RAG indexing for {document_id}")
+                index_metadata = {
+                    "title": run.title,
+                    "document_id": document_id,
+                    "confidence": ocr_result.confidence,
+                    "has_math": ocr_result.has_math,
+                    "original_url": deps["storage"] or file_path,
+                    "pdf_url": deps["pdf"] or run.pdf_path
+                }
+                return await self._run_stage(
+                    run, "rag_indexing", {"content": enhanced_text, "metadata": index_metadata},
+                    lambda run, metrics: self._index_stage(run, metrics, enhanced_text, index_metadata),
+                    input_bytes=len(enhanced_text.encode('utf-8'))
+                )
             
-            result["steps"]["rag_indexing"] = {
-                "status": "completed" if index_success else "failed",
-                "indexed": index_success
-            }
+            outputs = await run_pipeline([
+                Stage("storage", storage),
+                Stage("ocr", ocr),
+                Stage("diagrams", diagrams),
+                Stage("math_ocr", math, deps=["ocr"]),
+                Stage("vision", vision, deps=["ocr"]),
+                Stage("text", text, deps=["ocr", "math_ocr", "vision"]),
+                Stage("release_page", release_page, deps=["diagrams", "text"]),
+                Stage("pdf", pdf, deps=["ocr", "text"]),
+                Stage("rag_indexing", rag_indexing, deps=["ocr", "text", "storage", "pdf"])
+            ])
             
             # Update final status
+            ocr_result = outputs["ocr"]
             result["status"] = ProcessingStatus.COMPLETED
             result["summary"] = {
-                "text_length": len(enhanced_text),
+                "text_length": len(outputs["text"]),
                 "confidence": ocr_result.confidence,
                 "has_math": ocr_result.has_math,
-                "storage_url": storage_url if upload_success else None,
-                "pdf_url": pdf_url if pdf_upload_success else None
+                "diagrams": len(outputs["diagrams"]),
+                "storage_url": outputs["storage"],
+                "pdf_url": outputs["pdf"]
             }
             
-            # Save processing result
-            result_path = os.path.join(settings.PROCESSED_DIR, f"{document_id}_result.json")
-            with open(result_path, 'w') as f:
-                json.dump(result, f, indent=2)
-            
+        except ProcessingCancelled:
+            print(f"Processing cancelled for {document_id}")
+            result["status"] = ProcessingStatus.CANCELLED
         except Exception as e:
             print(f"Processing error for {document_id}: {str(e)}")
             result["status"] = ProcessingStatus.FAILED
@@ -160,6 +284,217 @@ class DocumentProcessor:
         
         return result
     
+    async def _run_stage(self, run: PipelineRun, name: str, inputs: Dict[str, Any],
+                         stage: Callable[[PipelineRun, Dict[str, Any]], Awaitable[Tuple[Any, Dict[str, Any]]]],
+                         input_bytes: int = 0, artifacts: Sequence[str] = ()) -> Any:
+        """Run a stage, or reuse its checkpoint when inputs and version are unchanged"""
+        check_cancelled()
+        
+        version = STAGE_VERSIONS[name]
+        input_hash = checkpoint_store.hash_inputs(inputs)
+        
+        checkpoint = checkpoint_store.load(run.document_id, name, input_hash, version)
+        if checkpoint is not None and all(os.path.exists(path) for path in artifacts):
+            cache_requests.inc(cache="checkpoint", result="hit")
+            print(f"Reusing {name} checkpoint for {run.document_id}")
+            self._record_step(run, name, {**checkpoint["step"], "checkpoint": True})
+            return checkpoint["output"]
+        cache_requests.inc(cache="checkpoint", result="miss")
+        
+        event_bus.publish("stage_started", {"document_id": run.document_id, "stage": name})
+        with stage_timer(name, input_bytes=input_bytes) as metrics:
+            output, step = await stage(run, metrics)
+        self._record_step(run, name, step)
+        
+        # Failed stages are not checkpointed so the next run retries them
+        if step.get("status") == "completed":
+            checkpoint_store.save(run.document_id, name, input_hash, version, output, step)
+        
+        return output
+    
+    def _record_step(self, run: PipelineRun, name: str, step: Dict[str, Any]):
+        """Store a step's outcome and stream it to progress subscribers"""
+        run.steps[name] = step
+        event_bus.publish("stage_finished", {"document_id": run.document_id, "stage": name, "step": step})
+    
+    async def _storage_stage(self, run: PipelineRun, metrics: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Upload the original file"""
+        upload_success, storage_url = await storage_service.upload_file(run.file_path)
+        step = {"status": "completed", "url": storage_url} if upload_success else {"status": "failed"}
+        return {"success": upload_success, "url": storage_url}, step
+    
+    async def _ocr_stage(self, run: PipelineRun, metrics: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Extract text and save it next to the other artifacts"""
+        ocr_result = await run_in_thread(ocr_engine.process_file, run.file_path, run.page)
+        metrics["output_bytes"] = len(ocr_result.text.encode('utf-8'))
+        
+        with open(run.ocr_path, 'w', encoding='utf-8') as f:
+            f.write(ocr_result.text)
+        
+        step = {
+            "status": "completed",
+            "text": ocr_result.text,
+            "confidence": ocr_result.confidence,
+            "pages": ocr_result.pages,
+            "preprocessing": ocr_result.preprocessing
+        }
+        return ocr_result.model_dump(), step
+    
+    async def _math_ocr_stage(self, run: PipelineRun, metrics: Dict[str, Any],
+                              text: str) -> Tuple[List[str], Dict[str, Any]]:
+        """Recognize LaTeX expressions with pix2tex"""
+        math_result = await run_in_thread(math_ocr.process_math_image, run.page, text)
+        latex_expressions = math_result.get("latex_expressions", [])
+        metrics["output_bytes"] = sum(len(e) for e in latex_expressions)
+        
+        step = {
+            "status": "completed",
+            "latex_expressions": latex_expressions,
+            "pix2tex_success": math_result.get("pix2tex_success", False)
+        }
+        return latex_expressions, step
+    
+    async def _vision_stage(self, run: PipelineRun, metrics: Dict[str, Any],
+                            ocr_text: str) -> Tuple[Optional[str], Dict[str, Any]]:
+        """Enhance the text with the vision model"""
+        vision_result = await vision_analyzer.analyze_image(run.page, ocr_text)
+        enhanced_text = vision_result.get("enhanced_text")
+        metrics["output_bytes"] = len((enhanced_text or "").encode('utf-8'))
+        
+        step = {
+            "status": "completed",
+            "enhanced_text": enhanced_text or ocr_text
+        }
+        return enhanced_text, step
+    
+    async def _diagram_stage(self, run: PipelineRun, metrics: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Locate diagrams, tables and graphs on the page"""
+        detected = await run_in_thread(diagram_detector.detect_diagrams, run.page)
+        diagrams = [{**d, "bbox": [int(v) for v in d["bbox"]]} for d in detected]
+        
+        step = {
+            "status": "completed",
+            "diagrams": diagrams
+        }
+        return diagrams, step
+    
+    async def _pdf_stage(self, run: PipelineRun, metrics: Dict[str, Any], content: str,
+                         metadata: Dict[str, str]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Generate the searchable PDF and upload it"""
+        await run_in_thread(
+            pdf_generator.create_pdf,
+            output_path=run.pdf_path,
+            title=run.title,
+            content=content,
+            metadata={**metadata, "processed_date": datetime.now().strftime("%Y-%m-%d %H:%M")}
+        )
+        metrics["output_bytes"] = os.path.getsize(run.pdf_path)
+        
+        # Upload PDF to storage
+        pdf_upload_success, pdf_url = await storage_service.upload_file(run.pdf_path)
+        
+        step = {
+            "status": "completed",
+            "path": run.pdf_path,
+            "url": pdf_url if pdf_upload_success else run.pdf_path
+        }
+        return {"url": pdf_url if pdf_upload_success else None}, step
+    
+    async def _index_stage(self, run: PipelineRun, metrics: Dict[str, Any], content: str,
+                           metadata: Dict[str, Any]) -> Tuple[bool, Dict[str, Any]]:
+        """Index the final text for search"""
+        index_success = await rag_service.index_document(
+            document_id=run.document_id,
+            content=content,
+            metadata={**metadata, "processed_date": datetime.now().isoformat()}
+        )
+        
+        step = {
+            "status": "completed" if index_success else "failed",
+            "indexed": index_success
+        }
+        return index_success, step
+    
+    async def _alias_document(self, document_id: str, file_path: str,
+                              source_id: str, content_hash: str) -> Dict[str, Any]:
+        """Reuse the processed artifacts of an identical document"""
+        source = await self.get_processing_result(source_id)
+        
+        # Link OCR text and PDF so the alias survives deletion of the source
+        for suffix in ("_ocr.txt", ".pdf"):
+            source_path = os.path.join(settings.PROCESSED_DIR, f"{source_id}{suffix}")
+            alias_path = os.path.join(settings.PROCESSED_DIR, f"{document_id}{suffix}")
+            if os.path.exists(source_path) and not os.path.exists(alias_path):
+                try:
+                    os.link(source_path, alias_path)
+                except OSError:
+                    shutil.copyfile(source_path, alias_path)
+        
+        pdf_path = os.path.join(settings.PROCESSED_DIR, f"{document_id}.pdf")
+        title = os.path.basename(file_path).split('.')[0]
+        index_metadata = {
+            "title": title,
+            "document_id": document_id,
+            "duplicate_of": source_id,
+            "processed_date": datetime.now().isoformat(),
+            "original_url": file_path,
+            "pdf_url": pdf_path
+        }
+        
+        # Reuse the source's embeddings; fall back to indexing its text
+        index_success = await rag_service.alias_document(source_id, document_id, index_metadata)
+        if not index_success:
+            ocr_path = os.path.join(settings.PROCESSED_DIR, f"{document_id}_ocr.txt")
+            with open(ocr_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            index_success = await rag_service.index_document(
+                document_id=document_id,
+                content=content,
+                metadata=index_metadata
+            )
+        
+        # Stage metrics describe the source's run, not this one
+        steps = {
+            name: {k: v for k, v in step.items() if k not in ("metrics", "substages")}
+            for name, step in source.get("steps", {}).items()
+        }
+        steps["pdf"] = {**steps.get("pdf", {}), "path": pdf_path, "url": pdf_path}
+        steps["rag_indexing"] = {
+            "status": "completed" if index_success else "failed",
+            "indexed": index_success
+        }
+        steps["dedup"] = {
+            "status": "completed",
+            "source_document_id": source_id,
+            "content_hash": content_hash
+        }
+        
+        result = {
+            "document_id": document_id,
+            "status": ProcessingStatus.COMPLETED,
+            "document_class": "duplicate",
+            "content_hash": content_hash,
+            "steps": steps,
+            "summary": {
+                **source.get("summary", {}),
+                "original_file": os.path.basename(file_path),
+                "pdf_url": pdf_path,
+                "duplicate_of": source_id
+            }
+        }
+        
+        return result
+    
+    async def _discard_artifacts(self, document_id: str):
+        """Remove the outputs and index entry of a deleted document"""
+        for suffix in ("_ocr.txt", ".pdf", "_result.json"):
+            path = os.path.join(settings.PROCESSED_DIR, f"{document_id}{suffix}")
+            if os.path.exists(path):
+                os.remove(path)
+        
+        checkpoint_store.clear(document_id)
+        await rag_service.delete_document(document_id)
+    
     async def get_processing_result(self, document_id: str) -> Optional[Dict[str, Any]]:
         """Get processing result for a document"""
         result_path = os.path.join(settings.PROCESSED_DIR, f"{document_id}_result.json")
@@ -169,6 +504,19 @@ class DocumentProcessor:
                 return json.load(f)
         
         return None
+    
+    def cancel_document(self, document_id: str) -> Dict[str, int]:
+        """Cancel a document's jobs; running ones report back when they stop"""
+        cancelled = job_queue.cancel(document_id)
+        
+        if cancelled["queued"] and not cancelled["running"]:
+            document_registry.set_status(document_id, ProcessingStatus.CANCELLED)
+            event_bus.publish("document_finished", {
+                "document_id": document_id,
+                "status": ProcessingStatus.CANCELLED
+            })
+        
+        return cancelled
 
 # Global processor instance
 document_processor = DocumentProcessor()
\ No newline at end of file
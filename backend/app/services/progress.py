@@ -0,0 +1,85 @@
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from app.services.events import event_bus
+
+PROGRESS_EVENTS = ("document_queued", "document_started", "stage_started", "stage_finished", "document_finished")
+
+ProgressEvent = Tuple[str, Dict[str, Any]]
+
+class ProgressBroker:
+    """Fan pipeline progress events out to per-document stream subscribers"""
+
+    def __init__(self, max_documents: int = 1000):
+        self.max_documents = max_documents
+        # Events of each document's latest run, replayed to late subscribers
+        self._history: "OrderedDict[str, List[ProgressEvent]]" = OrderedDict()
+        self._subscribers: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._lock = threading.Lock()
+
+    def record_event(self, kind: str, payload: Dict[str, Any]):
+        """Store a progress event and push it to the document's subscribers"""
+        if kind not in PROGRESS_EVENTS:
+            return
+
+        document_id = payload.get("document_id")
+        if not document_id:
+            return
+
+        with self._lock:
+            # A new run starts a fresh history
+            if kind == "document_queued" or (kind == "document_started" and not self._queued(document_id)):
+                self._history.pop(document_id, None)
+
+            history = self._history.setdefault(document_id, [])
+            history.append((kind, payload))
+            self._history.move_to_end(document_id)
+            while len(self._history) > self.max_documents:
+                self._history.popitem(last=False)
+
+            subscribers = list(self._subscribers.get(document_id, []))
+
+        # Events arrive on the event pump thread; hand them to each subscriber's loop
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, (kind, payload))
+            except RuntimeError:
+                # The subscriber's loop has already shut down
+                pass
+
+    def _queued(self, document_id: str) -> bool:
+        history = self._history.get(document_id)
+        return bool(history) and history[-1][0] == "document_queued"
+
+    async def stream(self, document_id: str, keepalive: float = 15.0) -> AsyncIterator[Optional[ProgressEvent]]:
+        """Replay the current run's events, then yield new ones (None on keepalive timeouts)"""
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        subscriber = (loop, queue)
+
+        with self._lock:
+            replay = list(self._history.get(document_id, []))
+            self._subscribers.setdefault(document_id, []).append(subscriber)
+
+        try:
+            for event in replay:
+                yield event
+
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(document_id, [])
+                if subscriber in subscribers:
+                    subscribers.remove(subscriber)
+                if not subscribers:
+                    self._subscribers.pop(document_id, None)
+
+# Global progress broker instance
+progress_broker = ProgressBroker()
+event_bus.subscribe(progress_broker.record_event)
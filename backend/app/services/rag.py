@@ -1,17 +1,40 @@
 import os
 import json
-from typing import List, Dict, Any, Optional
+import time
+import fcntl
+import threading
+from typing import List, Dict, Any, Callable, Optional
 import httpx
-from sentence_transformers import SentenceTransformer
 import numpy as np
 
 from app.config import settings
+from app.utils.concurrency import run_in_thread
+from app.utils.profiling import stage_timer
+from app.utils.metrics import search_duration
+from app.core.model_registry import model_registry
+from app.services.stage_cache import stage_cache, hash_bytes
+
+EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
+# Bump when embedding extraction changes, to invalidate cached embeddings
+EMBEDDING_VERSION = 1
 
 class RAGService:
     def __init__(self):
         self.r2r_base_url = os.getenv("R2R_BASE_URL", "http://localhost:8001")
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+        self._embedding_model = model_registry.register("sentence_transformer", self._load_embedding_model)
         self.documents_index = {}
+        # Identity of the index file last loaded, to notice rewrites by other processes
+        self._index_version: Optional[tuple] = None
+    
+    @staticmethod
+    def _load_embedding_model():
+        """Load the sentence embedding model"""
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(EMBEDDING_MODEL)
+    
+    @property
+    def embedding_model(self):
+        return self._embedding_model.get()
         
     async def initialize_r2r(self):
         """Initialize R2R connection"""
@@ -34,7 +57,7 @@ class RAGService:
                 return True
             
             # Fallback to local indexing
-            return self._index_locally(document_id, content, metadata)
+            return await run_in_thread(self._index_locally, document_id, content, metadata)
             
         except Exception as e:
             print(f"Indexing error: {str(e)}")
@@ -65,34 +88,141 @@ class RAGService:
     def _index_locally(self, document_id: str, content: str, metadata: Dict[str, Any] = None) -> bool:
         """Local indexing using sentence transformers"""
         try:
-            # Generate embeddings
-            embeddings = self.embedding_model.encode(content)
+            # Generate embeddings, reusing those of identical content
+            content_bytes = content.encode('utf-8')
+            cache_key = stage_cache.make_key("embedding", EMBEDDING_VERSION, hash_bytes(content_bytes), {"model": EMBEDDING_MODEL})
+            embeddings = stage_cache.get_array("embedding", cache_key)
+            if embeddings is None:
+                with stage_timer("embedding", input_bytes=len(content_bytes)) as metrics:
+                    embeddings = self.embedding_model.encode(content)
+                    metrics["output_bytes"] = embeddings.nbytes
+                stage_cache.put_array("embedding", cache_key, embeddings)
             
             # Store in local index
-            self.documents_index[document_id] = {
-                "content": content,
-                "metadata": metadata or {},
-                "embeddings": embeddings.tolist()
-            }
-            
-            # Save to disk
-            index_path = os.path.join(settings.PROCESSED_DIR, "document_index.json")
-            with open(index_path, 'w') as f:
-                # Convert numpy arrays to lists for JSON serialization
-                serializable_index = {}
-                for doc_id, doc_data in self.documents_index.items():
-                    serializable_index[doc_id] = {
-                        "content": doc_data["content"],
-                        "metadata": doc_data["metadata"],
-                        "embeddings": doc_data["embeddings"]
-                    }
-                json.dump(serializable_index, f)
-            
-            return True
+            def add(index: Dict[str, Any]) -> bool:
+                index[document_id] = {
+                    "content": content,
+                    "metadata": metadata or {},
+                    "embeddings": embeddings.tolist()
+                }
+                return True
             
+            return self._update_local_index(add)
+
         except Exception as e:
             print(f"Local indexing error: {str(e)}")
             return False
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(settings.PROCESSED_DIR, "document_index.json")
+
+    def _load_local_index(self):
+        """Load the local index from disk unless the copy in memory is current"""
+        try:
+            f = open(self.index_path, 'r')
+        except FileNotFoundError:
+            self.documents_index = {}
+            self._index_version = None
+            return
+
+        with f:
+            stat = os.fstat(f.fileno())
+            # Writers replace the file, so a new inode or mtime means another process changed it
+            version = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            if version != self._index_version:
+                self.documents_index = json.load(f)
+                self._index_version = version
+
+    def _update_local_index(self, update: Callable[[Dict[str, Any]], bool]) -> bool:
+        """Apply an update to the on-disk index under a cross-process lock.
+
+        API and worker processes all write the index, so each update re-reads
+        the latest file while holding the lock and replaces it atomically;
+        otherwise concurrent writers would drop each other's entries.
+        """
+        with open(self.index_path + ".lock", 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._load_local_index()
+                # Update a copy: searches may be iterating the current dict
+                index = dict(self.documents_index)
+                if not update(index):
+                    return False
+                self._save_local_index(index)
+                return True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @property
+    def count_path(self) -> str:
+        return self.index_path + ".count"
+
+    def _save_local_index(self, index: Dict[str, Any]):
+        """Persist the local index and its document count to disk atomically"""
+        tmp_path = f"{self.index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self.index_path)
+
+        # Metrics read the count from this sidecar instead of parsing the embeddings
+        with open(tmp_path, 'w') as f:
+            f.write(str(len(index)))
+        os.replace(tmp_path, self.count_path)
+
+        stat = os.stat(self.index_path)
+        self.documents_index = index
+        self._index_version = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def local_document_count(self) -> int:
+        """Documents in the shared on-disk index, including those indexed by workers"""
+        try:
+            with open(self.count_path, 'r') as f:
+                return int(f.read())
+        except (FileNotFoundError, ValueError):
+            # Indexes written before the count sidecar existed
+            return len(self.documents_index)
+
+    async def alias_document(self, source_id: str, document_id: str, metadata: Dict[str, Any] = None) -> bool:
+        """Index a duplicate document by reusing the source document's entry"""
+        try:
+            def alias(index: Dict[str, Any]) -> bool:
+                source = index.get(source_id)
+                if not source:
+                    return False
+
+                # Reuse stored embeddings instead of re-encoding
+                index[document_id] = {
+                    "content": source["content"],
+                    "metadata": {**source["metadata"], **(metadata or {})},
+                    "embeddings": source["embeddings"]
+                }
+                return True
+
+            return await run_in_thread(self._update_local_index, alias)
+
+        except Exception as e:
+            print(f"Alias indexing error: {str(e)}")
+            return False
+    
+    async def delete_document(self, document_id: str) -> bool:
+        """Remove a document from R2R and the local index"""
+        try:
+            async with httpx.AsyncClient() as client:
+                await client.delete(f"{self.r2r_base_url}/api/v1/documents/{document_id}", timeout=30.0)
+        except Exception as e:
+            print(f"R2R delete failed: {str(e)}")
+        
+        return await run_in_thread(self._remove_locally, document_id)
+    
+    def _remove_locally(self, document_id: str) -> bool:
+        """Drop a document from the local index"""
+        try:
+            return self._update_local_index(lambda index: index.pop(document_id, None) is not None)
+        
+        except Exception as e:
+            print(f"Local index removal error: {str(e)}")
+            return False
     
     async def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
         """Search documents using R2R or local search"""
@@ -103,7 +233,7 @@ class RAGService:
                 return r2r_results
             
             # Fallback to local search
-            return self._search_locally(query, limit)
+            return await run_in_thread(self._search_locally, query, limit)
             
         except Exception as e:
             print(f"Search error: {str(e)}")
@@ -111,6 +241,7 @@ class RAGService:
     
     async def _search_r2r(self, query: str, limit: int) -> List[Dict[str, Any]]:
         """Search using R2R"""
+        start = time.perf_counter()
         try:
             async with httpx.AsyncClient() as client:
                 response = await client.post(
@@ -124,20 +255,20 @@ class RAGService:
                     
         except Exception as e:
             print(f"R2R search failed: {str(e)}")
+        finally:
+            search_duration.observe(time.perf_counter() - start, backend="r2r")
         
         return []
     
     def _search_locally(self, query: str, limit: int) -> List[Dict[str, Any]]:
         """Local semantic search"""
+        start = time.perf_counter()
         try:
-            # Load index if not in memory
-            if not self.documents_index:
-                index_path = os.path.join(settings.PROCESSED_DIR, "document_index.json")
-                if os.path.exists(index_path):
-                    with open(index_path, 'r') as f:
-                        self.documents_index = json.load(f)
-            
-            if not self.documents_index:
+            # Reload the index if a worker has updated it
+            self._load_local_index()
+            index = self.documents_index
+
+            if not index:
                 return []
             
             # Generate query embedding
@@ -145,7 +276,7 @@ class RAGService:
             
             # Calculate similarities
             results = []
-            for doc_id, doc_data in self.documents_index.items():
+            for doc_id, doc_data in index.items():
                 doc_embedding = np.array(doc_data["embeddings"])
                 
                 # Cosine similarity
@@ -171,6 +302,8 @@ class RAGService:
         except Exception as e:
             print(f"Local search error: {str(e)}")
             return []
+        finally:
+            search_duration.observe(time.perf_counter() - start, backend="local")
     
     def _extract_snippet(self, content: str, query: str, context_length: int = 150) -> str:
         """Extract relevant snippet from content"""
@@ -0,0 +1,185 @@
+import os
+from typing import Dict, Any, List, Optional
+from datetime import datetime
+
+from app.config import settings
+from app.models.document import ProcessingStatus
+from app.services.database import database
+
+DOCUMENT_COLUMNS = [
+    "id", "title", "original_file_path", "status", "content_hash", "size",
+    "ocr_path", "pdf_path", "result_path", "user_id", "created_at", "updated_at"
+]
+
+class DocumentRegistry:
+    """Indexed document metadata store backed by the shared SQLite database"""
+
+    def __init__(self):
+        database.add_initializer(self._create_schema)
+
+    def _create_schema(self):
+        """Create tables and indexes"""
+        database.executescript("""
+            CREATE TABLE IF NOT EXISTS documents (
+                id TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                original_file_path TEXT NOT NULL,
+                status TEXT NOT NULL,
+                content_hash TEXT,
+                size INTEGER,
+                ocr_path TEXT,
+                pdf_path TEXT,
+                result_path TEXT,
+                user_id TEXT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_documents_created ON documents (created_at, id);
+            CREATE INDEX IF NOT EXISTS idx_documents_hash ON documents (content_hash, status);
+        """)
+
+        count = database.query("SELECT COUNT(*) AS n FROM documents")[0]["n"]
+        if count == 0:
+            self._backfill()
+
+    def _backfill(self):
+        """One-time import of documents uploaded before the registry existed"""
+        if not os.path.isdir(settings.UPLOAD_DIR):
+            return
+
+        from app.services.dedup import compute_file_hash
+
+        imported = 0
+        for file in os.listdir(settings.UPLOAD_DIR):
+            if file.startswith('.') or file.endswith('.part'):
+                continue
+
+            file_path = os.path.join(settings.UPLOAD_DIR, file)
+            document_id = file.split('.')[0]
+            ocr_path = os.path.join(settings.PROCESSED_DIR, f"{document_id}_ocr.txt")
+            pdf_path = os.path.join(settings.PROCESSED_DIR, f"{document_id}.pdf")
+            result_path = os.path.join(settings.PROCESSED_DIR, f"{document_id}_result.json")
+            created_at = datetime.utcfromtimestamp(os.path.getctime(file_path)).isoformat()
+
+            try:
+                self._insert({
+                    "id": document_id,
+                    "title": file,
+                    "original_file_path": file_path,
+                    "status": ProcessingStatus.COMPLETED.value if os.path.exists(ocr_path) else ProcessingStatus.PENDING.value,
+                    "content_hash": compute_file_hash(file_path),
+                    "size": os.path.getsize(file_path),
+                    "ocr_path": ocr_path if os.path.exists(ocr_path) else None,
+                    "pdf_path": pdf_path if os.path.exists(pdf_path) else None,
+                    "result_path": result_path if os.path.exists(result_path) else None,
+                    "user_id": None,
+                    "created_at": created_at,
+                    "updated_at": created_at
+                })
+                imported += 1
+            except Exception as e:
+                print(f"Registry backfill error for {file}: {str(e)}")
+
+        if imported:
+            print(f"Imported {imported} existing documents into the registry")
+
+    def _insert(self, record: Dict[str, Any]):
+        """Insert a full document row"""
+        placeholders = ", ".join("?" for _ in DOCUMENT_COLUMNS)
+        database.execute(
+            f"INSERT OR REPLACE INTO documents ({', '.join(DOCUMENT_COLUMNS)}) VALUES ({placeholders})",
+            [record.get(column) for column in DOCUMENT_COLUMNS]
+        )
+
+    def create(self, document_id: str, title: str, original_file_path: str,
+               content_hash: Optional[str] = None, size: Optional[int] = None,
+               user_id: Optional[str] = None) -> Dict[str, Any]:
+        """Register a newly uploaded document"""
+        now = datetime.utcnow().isoformat()
+        record = {
+            "id": document_id,
+            "title": title,
+            "original_file_path": original_file_path,
+            "status": ProcessingStatus.PENDING.value,
+            "content_hash": content_hash,
+            "size": size,
+            "user_id": user_id,
+            "created_at": now,
+            "updated_at": now
+        }
+
+        self._insert(record)
+
+        return record
+
+    def get(self, document_id: str) -> Optional[Dict[str, Any]]:
+        """Look up a document by id"""
+        rows = database.query("SELECT * FROM documents WHERE id = ?", (document_id,))
+        return rows[0] if rows else None
+
+    def list_page(self, limit: int, order_by: str = "created_at",
+                  after: Optional[Dict[str, Any]] = None,
+                  columns: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """List one keyset-paginated page of documents after the given row"""
+        columns = [c for c in (columns or DOCUMENT_COLUMNS) if c in DOCUMENT_COLUMNS]
+        # The ordering keys are always needed to build the next cursor
+        for key in ("id", "created_at"):
+            if key not in columns:
+                columns.append(key)
+
+        sql = f"SELECT {', '.join(columns)} FROM documents"
+        params: tuple = ()
+
+        if order_by == "id":
+            if after:
+                sql += " WHERE id > ?"
+                params = (after["id"],)
+            sql += " ORDER BY id ASC"
+        else:
+            # Newest first, ties broken by id
+
+            if after:
+                sql += " WHERE created_at < ? OR (created_at = ? AND id < ?)"
+                params = (after["created_at"], after["created_at"], after["id"])
+            sql += " ORDER BY created_at DESC, id DESC"
+
+        sql += " LIMIT ?"
+        return database.query(sql, params + (limit,))
+
+    def update(self, document_id: str, **fields) -> bool:
+        """Update document fields"""
+        fields = {k: v for k, v in fields.items() if k in DOCUMENT_COLUMNS and k != "id"}
+        fields["updated_at"] = datetime.utcnow().isoformat()
+
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        values = [v.value if isinstance(v, ProcessingStatus) else v for v in fields.values()]
+
+        cursor = database.execute(
+            f"UPDATE documents SET {assignments} WHERE id = ?",
+            tuple(values + [document_id])
+        )
+        return cursor.rowcount > 0
+
+    def set_status(self, document_id: str, status: ProcessingStatus, **fields) -> bool:
+        """Update a document's processing status"""
+        return self.update(document_id, status=status, **fields)
+
+    def delete(self, document_id: str) -> bool:
+        """Remove a document from the registry"""
+        cursor = database.execute("DELETE FROM documents WHERE id = ?", (document_id,))
+        return cursor.rowcount > 0
+
+    def find_by_hash(self, content_hash: str, status: Optional[ProcessingStatus] = None) -> List[Dict[str, Any]]:
+        """Find documents with identical content, oldest first"""
+        if status:
+            return database.query(
+                "SELECT * FROM documents WHERE content_hash = ? AND status = ? ORDER BY created_at",
+                (content_hash, status.value)
+            )
+        return database.query(
+            "SELECT * FROM documents WHERE content_hash = ? ORDER BY created_at",
+            (content_hash,)
+        )
+
+# Global document registry instance
+document_registry = DocumentRegistry()
@@ -0,0 +1,171 @@
+import io
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from app.config import settings
+from app.services.database import Database
+from app.utils.metrics import cache_requests
+
+def hash_bytes(data: bytes) -> str:
+    """Content hash of raw bytes"""
+    return hashlib.sha256(data).hexdigest()
+
+def hash_array(array: np.ndarray) -> str:
+    """Content hash of an image or other array, including its shape and type"""
+    sha256 = hashlib.sha256(f"{array.shape}:{array.dtype}".encode('utf-8'))
+    sha256.update(np.ascontiguousarray(array).data)
+    return sha256.hexdigest()
+
+def hash_file(file_path: str) -> str:
+    """Content hash of a file"""
+    from app.services.dedup import compute_file_hash
+    return compute_file_hash(file_path)
+
+class StageCache:
+    """Content-addressed disk cache for expensive stage outputs with LRU eviction.
+
+    Entries are keyed by the content hash of a stage's input, the stage name,
+    its version and its parameters, so unchanged inputs are reused across
+    documents, retries and restarts while a config or version change misses.
+    Files live under CACHE_DIR and an SQLite index there tracks size and
+    last access across worker processes.
+    """
+
+    def __init__(self, root: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.root = root or os.path.join(settings.CACHE_DIR, "stages")
+        self.max_bytes = settings.STAGE_CACHE_MAX_MB * 1024 * 1024 if max_bytes is None else max_bytes
+        self._index = Database(os.path.join(self.root, "index.db"))
+        self._index.add_initializer(self._create_schema)
+        self._evict_lock = threading.Lock()
+
+    def _create_schema(self):
+        """Create the entry index"""
+        self._index.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                stage TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_entries_access ON entries (last_access);
+        """)
+
+    @property
+    def enabled(self) -> bool:
+        return settings.STAGE_CACHE_ENABLED and self.max_bytes > 0
+
+    @staticmethod
+    def make_key(stage: str, version: int, content_hash: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """Cache key for a stage run on some content with the given parameters"""
+        payload = json.dumps({
+            "stage": stage,
+            "version": version,
+            "content": content_hash,
+            "params": params or {}
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key)
+
+    def get(self, stage: str, key: str) -> Optional[bytes]:
+        """Read an entry, marking it as recently used"""
+        if not self.enabled:
+            return None
+
+        try:
+            with open(self._path(key), 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            data = None
+        except Exception as e:
+            print(f"Unreadable cache entry {key}: {str(e)}")
+            data = None
+
+        try:
+            if data is None:
+                # Evicted by another process or removed by hand
+                self._index.execute("DELETE FROM entries WHERE key = ?", (key,))
+            else:
+                self._index.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+        except Exception as e:
+            print(f"Cache index error: {str(e)}")
+
+        cache_requests.inc(cache=f"stage_{stage}", result="hit" if data is not None else "miss")
+        return data
+
+    def put(self, stage: str, key: str, data: bytes):
+        """Atomically write an entry and evict the least recently used ones beyond the size bound"""
+        if not self.enabled or len(data) > self.max_bytes:
+            return
+
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+            now = time.time()
+            self._index.execute(
+                "INSERT OR REPLACE INTO entries (key, stage, size, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, stage, len(data), now, now)
+            )
+            self._evict()
+        except Exception as e:
+            # The cache only saves work; a failed write must not fail the stage
+            print(f"Cache write failed for {stage}: {str(e)}")
+
+    def _evict(self):
+        """Remove least recently used entries until the cache fits its bound"""
+        with self._evict_lock:
+            total = self._index.query("SELECT COALESCE(SUM(size), 0) AS total FROM entries")[0]["total"]
+            while total > self.max_bytes:
+                victims = self._index.query("SELECT key, size FROM entries ORDER BY last_access LIMIT 100")
+                if not victims:
+                    break
+                for victim in victims:
+                    try:
+                        os.remove(self._path(victim["key"]))
+                    except FileNotFoundError:
+                        pass
+                    self._index.execute("DELETE FROM entries WHERE key = ?", (victim["key"],))
+                    total -= victim["size"]
+                    if total <= self.max_bytes:
+                        break
+
+    def get_json(self, stage: str, key: str) -> Optional[Any]:
+        data = self.get(stage, key)
+        return json.loads(data) if data is not None else None
+
+    def put_json(self, stage: str, key: str, value: Any):
+        self.put(stage, key, json.dumps(value).encode('utf-8'))
+
+    def get_array(self, stage: str, key: str) -> Optional[np.ndarray]:
+        data = self.get(stage, key)
+        return np.load(io.BytesIO(data), allow_pickle=False) if data is not None else None
+
+    def put_array(self, stage: str, key: str, array: np.ndarray):
+        buffer = io.BytesIO()
+        np.save(buffer, array, allow_pickle=False)
+        self.put(stage, key, buffer.getvalue())
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry counts and sizes per stage"""
+        rows = self._index.query("SELECT stage, COUNT(*) AS entries, SUM(size) AS bytes FROM entries GROUP BY stage")
+        return {
+            "max_bytes": self.max_bytes,
+            "total_bytes": sum(row["bytes"] for row in rows),
+            "stages": {row["stage"]: {"entries": row["entries"], "bytes": row["bytes"]} for row in rows}
+        }
+
+# Global stage cache instance
+stage_cache = StageCache()
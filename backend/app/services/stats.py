@@ -0,0 +1,64 @@
+import threading
+from typing import Any, Dict
+
+from app.models.document import ProcessingStatus
+from app.services.events import event_bus
+
+class StageStats:
+    """In-memory aggregate of stage metrics per document class"""
+
+    def __init__(self):
+        self._stats: Dict[str, Dict[str, Dict[str, float]]] = {}
+        self._lock = threading.Lock()
+
+    def record_event(self, kind: str, payload: Dict[str, Any]):
+        """Aggregate the stage metrics of a finished document"""
+        # Cancelled runs stop partway and would skew the averages
+        if kind != "document_finished" or payload.get("status") == ProcessingStatus.CANCELLED:
+            return
+
+        doc_class = payload.get("document_class", "unknown")
+        with self._lock:
+            class_stats = self._stats.setdefault(doc_class, {})
+            for stage, metrics in payload.get("stages", {}).items():
+                entry = class_stats.setdefault(stage, {
+                    "parent": metrics.get("parent"),
+                    "count": 0,
+                    "total_wall_time": 0.0,
+                    "max_wall_time": 0.0,
+                    "total_cpu_time": 0.0,
+                    "max_peak_rss_delta_kb": 0,
+                    "total_input_bytes": 0,
+                    "total_output_bytes": 0
+                })
+                entry["count"] += 1
+                entry["total_wall_time"] += metrics.get("wall_time", 0.0)
+                entry["max_wall_time"] = max(entry["max_wall_time"], metrics.get("wall_time", 0.0))
+                entry["total_cpu_time"] += metrics.get("cpu_time", 0.0)
+                entry["max_peak_rss_delta_kb"] = max(entry["max_peak_rss_delta_kb"], metrics.get("peak_rss_delta_kb", 0))
+                entry["total_input_bytes"] += metrics.get("input_bytes") or 0
+                entry["total_output_bytes"] += metrics.get("output_bytes") or 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Per-class stage averages, with the share of wall time each stage takes"""
+        with self._lock:
+            snapshot = {}
+            for doc_class, class_stats in self._stats.items():
+                # Nested stages are already counted in their parent's time
+                total_wall = sum(
+                    entry["total_wall_time"] for entry in class_stats.values() if not entry["parent"]
+                ) or 1.0
+                snapshot[doc_class] = {
+                    stage: {
+                        **entry,
+                        "avg_wall_time": entry["total_wall_time"] / entry["count"],
+                        "avg_cpu_time": entry["total_cpu_time"] / entry["count"],
+                        "wall_time_share": entry["total_wall_time"] / total_wall
+                    }
+                    for stage, entry in class_stats.items()
+                }
+            return snapshot
+
+# Global stage statistics instance
+stage_stats = StageStats()
+event_bus.subscribe(stage_stats.record_event)
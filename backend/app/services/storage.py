@@ -1,51 +1,54 @@
-from supabase import create_client, Client
 from typing import Optional, Tuple, BinaryIO
 import os
 from datetime import datetime
 import mimetypes
 
 from app.config import settings
+from app.utils.concurrency import run_io
+from app.core.model_registry import model_registry
 
 class StorageService:
     def __init__(self):
-        self.supabase: Optional[Client] = None
         self.bucket_name = "documents"
-        self._initialize_client()
+        # The client connects on first use
+        self._client = model_registry.register("supabase", self._initialize_client)
+    
+    @property
+    def supabase(self):
+        """Supabase client, or None when storage is local"""
+        try:
+            return self._client.get()
+        except Exception:
+            return None
     
     def _initialize_client(self):
         """Initialize Supabase client"""
-        try:
-            if (settings.SUPABASE_URL != "https://placeholder.supabase.co" and 
-                settings.SUPABASE_SERVICE_KEY != "placeholder-service-key"):
-                
-                self.supabase = create_client(
-                    settings.SUPABASE_URL,
-                    settings.SUPABASE_SERVICE_KEY
-                )
-                
-                # Ensure bucket exists
-                self._ensure_bucket_exists()
-                print("Supabase storage initialized")
-            else:
-                print("Supabase credentials not configured, using local storage")
-                
-        except Exception as e:
-            print(f"Supabase initialization error: {str(e)}")
-            self.supabase = None
+        if (settings.SUPABASE_URL == "https://placeholder.supabase.co" or
+                settings.SUPABASE_SERVICE_KEY == "placeholder-service-key"):
+            print("Supabase credentials not configured, using local storage")
+            return None
+        
+        from supabase import create_client
+        client = create_client(
+            settings.SUPABASE_URL,
+            settings.SUPABASE_SERVICE_KEY
+        )
+        
+        # Ensure bucket exists
+        self._ensure_bucket_exists(client)
+        print("Supabase storage initialized")
+        return client
     
-    def _ensure_bucket_exists(self):
+    def _ensure_bucket_exists(self, client):
         """Ensure the storage bucket exists"""
-        if not self.supabase:
-            return
-        
         try:
             # Check if bucket exists
-            buckets = self.supabase.storage.list_buckets()
+            buckets = client.storage.list_buckets()
             bucket_names = [b['name'] for b in buckets]
             
             if self.bucket_name not in bucket_names:
                 # Create bucket
-                self.supabase.storage.create_bucket(
+                client.storage.create_bucket(
                     self.bucket_name,
                     options={"public": True}
                 )
@@ -65,13 +68,8 @@ class StorageService:
             unique_name = f"{timestamp}_{file_name}"
             
             if self.supabase:
-                # Upload to Supabase
-                with open(file_path, 'rb') as f:
-                    response = self.supabase.storage.from_(self.bucket_name).upload(
-                        path=unique_name,
-                        file=f,
-                        file_options={"content-type": self._get_content_type(file_path)}
-                    )
+                # Upload to Supabase without blocking the event loop
+                response = await run_io(self._upload_sync, file_path, unique_name)
                 
                 if response.error:
                     print(f"Supabase upload error: {response.error}")
@@ -88,6 +86,15 @@ class StorageService:
             print(f"Upload error: {str(e)}")
             return False, ""
     
+    def _upload_sync(self, file_path: str, unique_name: str):
+        """Blocking Supabase upload"""
+        with open(file_path, 'rb') as f:
+            return self.supabase.storage.from_(self.bucket_name).upload(
+                path=unique_name,
+                file=f,
+                file_options={"content-type": self._get_content_type(file_path)}
+            )
+    
     async def download_file(self, file_path: str, destination: str) -> bool:
         """Download file from Supabase"""
         try:
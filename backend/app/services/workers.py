@@ -0,0 +1,245 @@
+import os
+import gc
+import time
+import signal
+import socket
+import asyncio
+import threading
+import multiprocessing
+from typing import List, Optional
+
+from app.config import settings
+from app.models.document import ProcessingStatus
+from app.services.job_queue import job_queue
+from app.services.registry import document_registry
+from app.services.events import event_bus
+from app.utils.metrics import metrics_registry
+from app.utils.threads import thread_budget, apply_thread_env, apply_thread_budget
+
+def _heartbeat_loop(job_id: int, worker_id: str, stop: threading.Event, cancel: threading.Event):
+    """Keep a job's lease alive and watch for cancellation while it is being processed"""
+    interval = max(1.0, settings.JOB_LEASE_SECONDS / 3)
+    next_heartbeat = time.monotonic() + interval
+    while not stop.wait(settings.CANCEL_POLL_INTERVAL):
+        if not cancel.is_set() and job_queue.cancel_requested(job_id):
+            print(f"Cancelling job {job_id}")
+            cancel.set()
+        if time.monotonic() >= next_heartbeat:
+            job_queue.heartbeat(job_id, worker_id)
+            next_heartbeat += interval
+
+def _init_worker_process(event_queue):
+    """Common setup for processes that run pipeline work"""
+    # The pool owner decides when to stop; finish the current job on Ctrl+C
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    # Pipeline events and metric updates are delivered to the pool owner's process
+    event_bus.forward_to(event_queue)
+    metrics_registry.forward_to(lambda update: event_bus.publish("metric", update))
+
+def _load_models():
+    """Import the pipeline and load its models"""
+    from app.services.processor import document_processor
+    from app.core.model_registry import model_registry
+    model_registry.warm_up(settings.WORKER_WARMUP_MODELS, background=False)
+    return document_processor
+
+def worker_main(worker_index: int, shutdown_event, event_queue):
+    """Spawned worker process: load models, then claim jobs until asked to drain"""
+    _init_worker_process(event_queue)
+    apply_thread_budget(thread_budget())
+    # Models are loaded in the worker, not in the API process
+    document_processor = _load_models()
+    _run_jobs(worker_index, shutdown_event, document_processor)
+
+def _run_jobs(worker_index: int, shutdown_event, document_processor):
+    """Worker loop: claim jobs until asked to drain"""
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{worker_index}"
+    print(f"Worker {worker_id} started")
+
+    while not shutdown_event.is_set():
+        job = job_queue.claim(worker_id)
+        if not job:
+            shutdown_event.wait(settings.WORKER_POLL_INTERVAL)
+            continue
+
+        stop_heartbeat = threading.Event()
+        cancel = threading.Event()
+        heartbeat = threading.Thread(
+            target=_heartbeat_loop,
+            args=(job["id"], worker_id, stop_heartbeat, cancel),
+            daemon=True
+        )
+        heartbeat.start()
+
+        try:
+            result = asyncio.run(document_processor.process_document(job["document_id"], job["file_path"], cancel))
+            if result["status"] == ProcessingStatus.COMPLETED:
+                if not job_queue.complete(job["id"], worker_id):
+                    print(f"Job {job['id']} finished after its lease was lost; leaving it to its new worker")
+            elif result["status"] == ProcessingStatus.CANCELLED:
+                job_queue.mark_cancelled(job["id"], worker_id)
+            else:
+                retry = job_queue.fail(job["id"], worker_id, result.get("error", "Processing failed"))
+                if retry:
+                    document_registry.set_status(job["document_id"], ProcessingStatus.QUEUED)
+                    event_bus.publish("document_queued", {"document_id": job["document_id"], "job_id": job["id"]})
+                print(f"Job {job['id']} failed (attempt {job['attempts']}), {'retrying' if retry else 'giving up'}")
+        except Exception as e:
+            print(f"Worker {worker_id} error on job {job['id']}: {str(e)}")
+            job_queue.fail(job["id"], worker_id, str(e))
+        finally:
+            stop_heartbeat.set()
+            heartbeat.join()
+
+    print(f"Worker {worker_id} stopped")
+
+def _forked_worker(worker_index: int, shutdown_event, document_processor):
+    """Worker forked from the supervisor, sharing its loaded models"""
+    apply_thread_budget(thread_budget())
+    _run_jobs(worker_index, shutdown_event, document_processor)
+
+def supervisor_main(size: int, shutdown_event, event_queue, alive):
+    """Load models once, then fork workers that share the weights copy-on-write"""
+    _init_worker_process(event_queue)
+    # Torch must not start its thread pools before forking
+    try:
+        import torch
+        torch.set_num_threads(1)
+    except ImportError:
+        pass
+    document_processor = _load_models()
+
+    # Move everything loaded so far out of the cyclic GC's reach; collections
+    # would otherwise write to those objects' headers and un-share their pages
+    gc.collect()
+    gc.freeze()
+
+    fork_context = multiprocessing.get_context("fork")
+    workers = {}
+
+    def fork_worker(index: int):
+        process = fork_context.Process(
+            target=_forked_worker,
+            args=(index, shutdown_event, document_processor),
+            name=f"ocr-worker-{index}"
+        )
+        process.start()
+        workers[index] = process
+
+    for index in range(size):
+        fork_worker(index)
+    print(f"Forked {size} processing workers from supervisor {os.getpid()}")
+
+    # Replace workers that die until asked to drain
+    while not shutdown_event.wait(1.0):
+        for index, process in list(workers.items()):
+            if not process.is_alive():
+                print(f"Worker {process.name} exited with {process.exitcode}, restarting")
+                fork_worker(index)
+        alive.value = sum(1 for process in workers.values() if process.is_alive())
+
+    for process in workers.values():
+        process.join(settings.WORKER_SHUTDOWN_TIMEOUT)
+        if process.is_alive():
+            print(f"Worker {process.name} did not drain in time, terminating")
+            process.terminate()
+            process.join()
+    alive.value = 0
+
+class WorkerPool:
+    """Bounded pool of processing worker processes draining the job queue"""
+
+    def __init__(self, size: Optional[int] = None):
+        self.size = size or settings.MAX_WORKERS
+        self._context = multiprocessing.get_context("spawn")
+        self._shutdown_event = None
+        self._event_queue = None
+        self._alive = None
+        self._processes: List[multiprocessing.Process] = []
+
+    @property
+    def prefork(self) -> bool:
+        """Whether workers are forked from a model-loading supervisor"""
+        return settings.WORKER_MODE == "prefork" and "fork" in multiprocessing.get_all_start_methods()
+
+    def start(self):
+        """Recover interrupted jobs and start the worker processes"""
+        recovered = job_queue.recover()
+        if recovered:
+            print(f"Requeued {recovered} interrupted jobs")
+
+        # Workers inherit the BLAS/OpenMP limits through their environment
+        budget = thread_budget()
+        apply_thread_env(budget)
+        print(f"Thread budget per worker: {budget}")
+
+        self._shutdown_event = self._context.Event()
+        self._event_queue = self._context.Queue()
+        event_bus.start_pump(self._event_queue)
+
+        if self.prefork:
+            # A freshly spawned supervisor has no API threads or state to carry into the forks
+            self._alive = self._context.Value('i', 0)
+            process = self._context.Process(
+                target=supervisor_main,
+                args=(self.size, self._shutdown_event, self._event_queue, self._alive),
+                name="ocr-supervisor"
+            )
+            process.start()
+            self._processes.append(process)
+            print(f"Started processing supervisor for {self.size} prefork workers")
+            return
+
+        for index in range(self.size):
+            process = self._context.Process(
+                target=worker_main,
+                args=(index, self._shutdown_event, self._event_queue),
+                name=f"ocr-worker-{index}"
+            )
+            process.start()
+            self._processes.append(process)
+
+        print(f"Started {self.size} processing workers")
+
+    def stop(self, timeout: Optional[float] = None):
+        """Drain gracefully: let workers finish their current job, then exit"""
+        if not self._processes:
+            return
+
+        timeout = settings.WORKER_SHUTDOWN_TIMEOUT if timeout is None else timeout
+        self._shutdown_event.set()
+
+        # The supervisor waits out its own workers' drain before exiting
+        if self.prefork:
+            timeout += 5
+
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                # The job's lease expires and it is picked up again on restart
+                print(f"Worker {process.name} did not drain in time, terminating")
+                process.terminate()
+                process.join()
+
+        event_bus.stop_pump(self._event_queue)
+        self._processes = []
+
+    def alive(self) -> int:
+        """Number of running worker processes"""
+        if self._alive is not None:
+            return self._alive.value if any(process.is_alive() for process in self._processes) else 0
+        return sum(1 for process in self._processes if process.is_alive())
+
+# Global worker pool instance
+worker_pool = WorkerPool()
+
+if __name__ == "__main__":
+    # Run a standalone pool when the API is started with WORKER_POOL_ENABLED=false
+    worker_pool.start()
+    try:
+        # Block only after the workers are spawned so they keep default handlers
+        signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGINT, signal.SIGTERM})
+        signal.sigwait({signal.SIGINT, signal.SIGTERM})
+    finally:
+        worker_pool.stop()
@@ -0,0 +1,32 @@
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+class ProcessingCancelled(BaseException):
+    """Raised at a cancellation point once a job's cancellation was requested.
+
+    Like asyncio.CancelledError it is not an Exception, so the broad
+    ``except Exception`` fallbacks inside the pipeline do not swallow it.
+    """
+
+_cancel_event: contextvars.ContextVar[Optional[threading.Event]] = contextvars.ContextVar("cancel_event", default=None)
+
+@contextmanager
+def cancellation_scope(event: Optional[threading.Event]) -> Iterator[None]:
+    """Make an event the cancellation signal for work started in this context"""
+    token = _cancel_event.set(event)
+    try:
+        yield
+    finally:
+        _cancel_event.reset(token)
+
+def is_cancelled() -> bool:
+    """Whether the current work has been asked to stop"""
+    event = _cancel_event.get()
+    return event is not None and event.is_set()
+
+def check_cancelled():
+    """Cancellation point: stop the current work if it was cancelled"""
+    if is_cancelled():
+        raise ProcessingCancelled()
@@ -0,0 +1,38 @@
+import asyncio
+import functools
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from app.config import settings
+
+T = TypeVar("T")
+
+# CPU-bound stages (torch, OpenCV, hashing) release the GIL while they work,
+# so a small thread pool keeps them off the event loop without pickling images
+cpu_executor = ThreadPoolExecutor(
+    max_workers=settings.STAGE_EXECUTOR_THREADS,
+    thread_name_prefix="stage"
+)
+
+# Blocking network calls mostly wait, so they get their own larger pool and a
+# slow LLM or upload request never holds a thread that a CPU stage needs
+io_executor = ThreadPoolExecutor(
+    max_workers=settings.IO_EXECUTOR_THREADS,
+    thread_name_prefix="io"
+)
+
+async def _run_in(executor: ThreadPoolExecutor, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    loop = asyncio.get_running_loop()
+    # Carry context variables over to the executor thread
+    context = contextvars.copy_context()
+    call = functools.partial(context.run, func, *args, **kwargs)
+    return await loop.run_in_executor(executor, call)
+
+async def run_in_thread(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking CPU-bound call on the stage executor and await its result"""
+    return await _run_in(cpu_executor, func, *args, **kwargs)
+
+async def run_io(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking network call on the I/O executor and await its result"""
+    return await _run_in(io_executor, func, *args, **kwargs)
@@ -1,9 +1,21 @@
 import cv2
 import numpy as np
 from PIL import Image, ImageEnhance, ImageFilter
-from typing import Tuple, Optional
+from typing import Tuple, Optional, Dict, Union
 import io
 
+from app.core.page import Page
+
+# Noise sigma (grey levels) up to which a page is treated as clean or lightly noisy
+NOISE_CLEAN = 2.0
+NOISE_LIGHT = 6.0
+# Laplacian variance below which a page is blurry; NLM would wash out its strokes
+BLUR_MIN = 100.0
+# Grey-level standard deviation below which a page is low contrast
+CONTRAST_MIN = 40.0
+# Components needed before a median glyph height is trusted
+MIN_GLYPHS = 20
+
 class ImageProcessor:
     """Image preprocessing utilities"""
     
@@ -36,21 +48,21 @@ class ImageProcessor:
         return output_path
     
     @staticmethod
-    def deskew_image(image_path: str) -> np.ndarray:
+    def deskew_image(image: Union[str, Page]) -> np.ndarray:
         """Deskew a scanned image"""
-        image = cv2.imread(image_path)
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        page = Page.open(image)
+        image = page.bgr
         
-        # Detect edges
-        edges = cv2.Canny(gray, 50, 150, apertureSize=3)
+        # Detect edges; angles survive downscaling, so a reduced decode is enough
+        edges = page.reduced_edges
         
-        # Detect lines using Hough transform
-        lines = cv2.HoughLines(edges, 1, np.pi/180, 200)
+        # Detect lines using Hough transform (votes scale with line length)
+        lines = cv2.HoughLines(edges, 1, np.pi/180, max(50, 200 // page.reduction))
         
         if lines is not None:
             # Calculate the average angle
             angles = []
-            for rho, theta in lines[:, 0]:
+            for rho, theta in lines.reshape(-1, 2):
                 angle = (theta * 180 / np.pi) - 90
                 if -45 < angle < 45:  # Filter out vertical lines
                     angles.append(angle)
@@ -70,9 +82,9 @@ class ImageProcessor:
         return image
     
     @staticmethod
-    def remove_shadows(image_path: str) -> np.ndarray:
+    def remove_shadows(image: Union[str, Page]) -> np.ndarray:
         """Remove shadows from image"""
-        image = cv2.imread(image_path)
+        image = Page.open(image).bgr
         
         # Convert to LAB color space
         lab = cv2.cvtColor(image, cv2.COLOR_BGR2LAB)
@@ -91,16 +103,36 @@ class ImageProcessor:
         return result
     
     @staticmethod
-    def segment_image(image_path: str) -> list:
-        """Segment image into regions (text, diagrams, etc.)"""
-        image = cv2.imread(image_path)
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        
-        # Apply threshold
-        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
-        
+    def component_stats(binary: np.ndarray) -> Tuple[int, np.ndarray, np.ndarray]:
+        """Connected components of an ink mask (Page.binary): count, stats and centroids"""
         # Find connected components
-        num_labels, labels, stats, centroids = cv2.connectedComponentsWithStats(binary, connectivity=8)
+        num_labels, _, stats, centroids = cv2.connectedComponentsWithStats(binary, connectivity=8)
+        return num_labels, stats, centroids
+    
+    @staticmethod
+    def estimate_text_height(image: Union[np.ndarray, Page]) -> Optional[float]:
+        """Median glyph height in pixels of a page or ink mask, or None when it has too little text"""
+        # Pages reuse their cached ink mask instead of thresholding again
+        binary = image.binary if isinstance(image, Page) else image
+        num_labels, stats, _ = ImageProcessor.component_stats(binary)
+        heights = stats[1:, cv2.CC_STAT_HEIGHT]
+        widths = stats[1:, cv2.CC_STAT_WIDTH]
+        areas = stats[1:, cv2.CC_STAT_AREA]
+        
+        # Skip specks, rules, frames and diagram strokes
+        glyphs = (
+            (heights >= 4) & (areas >= 10) &
+            (heights <= binary.shape[0] / 4) &
+            (widths <= heights * 10) & (heights <= widths * 10)
+        )
+        if glyphs.sum() < MIN_GLYPHS:
+            return None
+        return float(np.median(heights[glyphs]))
+    
+    @staticmethod
+    def segment_image(image: Union[str, Page]) -> list:
+        """Segment image into regions (text, diagrams, etc.)"""
+        num_labels, stats, centroids = ImageProcessor.component_stats(Page.open(image).binary)
         
         regions = []
         for i in range(1, num_labels):  # Skip background (label 0)
@@ -115,6 +147,35 @@ class ImageProcessor:
         
         return regions
     
+    @staticmethod
+    def estimate_quality(gray: np.ndarray) -> Dict[str, float]:
+        """Estimate noise, blur and contrast of a grayscale image in a few filter passes"""
+        gray = gray.astype(np.float32)
+        
+        # Immerkaer's fast noise estimate: the mask cancels image structure up to second
+        # order, so its response is mostly noise. Strong edges (text strokes) are excluded.
+        mask = np.array([[1, -2, 1], [-2, 4, -2], [1, -2, 1]], dtype=np.float32)
+        response = np.abs(cv2.filter2D(gray, -1, mask)[1:-1, 1:-1])
+        
+        gradient = cv2.magnitude(cv2.Sobel(gray, cv2.CV_32F, 1, 0), cv2.Sobel(gray, cv2.CV_32F, 0, 1))[1:-1, 1:-1]
+        flat = gradient < np.percentile(gradient[::4, ::4], 90)
+        noise = float(np.sqrt(np.pi / 2) * response[flat].mean() / 6) if flat.any() else 0.0
+        
+        return {
+            "noise": noise,
+            "blur": float(cv2.Laplacian(gray, cv2.CV_32F).var()),
+            "contrast": float(gray.std())
+        }
+    
+    @staticmethod
+    def choose_denoise(quality: Dict[str, float]) -> str:
+        """Pick the cheapest denoising chain that suits the image: none, light or full"""
+        if quality["noise"] <= NOISE_CLEAN and quality["contrast"] >= CONTRAST_MIN:
+            return "none"
+        if quality["noise"] <= NOISE_LIGHT or quality["blur"] < BLUR_MIN:
+            return "light"
+        return "full"
+    
     @staticmethod
     def resize_image(image_path: str, max_width: int = 2048) -> str:
         """Resize image if too large"""
@@ -0,0 +1,46 @@
+from typing import Dict, Optional
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+class BodySizeLimitMiddleware:
+    """Reject request bodies over a per-path limit while they are still arriving.
+
+    Starlette receives and spools a whole multipart body before the handler
+    runs, so size checks in the handler only fire after the upload finished.
+    This middleware answers 413 from the Content-Length header without reading
+    the body, and stops chunked bodies as soon as they cross the limit.
+    """
+
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        self.limits = {path.rstrip("/"): limit for path, limit in limits.items()}
+
+    def _limit(self, path: str) -> Optional[int]:
+        return self.limits.get(path.rstrip("/"))
+
+    async def __call__(self, scope, receive, send):
+        limit = self._limit(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            response = JSONResponse({"detail": "Request body exceeds maximum upload size"}, status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # FastAPI re-raises HTTPExceptions from body parsing, so this becomes a 413
+                    raise HTTPException(413, "Request body exceeds maximum upload size")
+            return message
+
+        await self.app(scope, limited_receive, send)
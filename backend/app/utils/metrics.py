@@ -0,0 +1,228 @@
+import abc
+import bisect
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+LabelKey = Tuple[str, ...]
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    """Render a Prometheus label set"""
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = [(k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for k, v in pairs]
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+def _format_value(value: float) -> str:
+    """Render a sample value"""
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+class Metric(abc.ABC):
+    """Base class for in-process metrics with labels"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._registry: Optional["MetricsRegistry"] = None
+
+    def _key(self, labels: Dict[str, Any]) -> LabelKey:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _forward(self, op: str, value: float, labels: Dict[str, Any]) -> bool:
+        """Hand the update to the forwarder when running in a worker process"""
+        if self._registry is not None and self._registry.forwarder is not None:
+            self._registry.forwarder({"metric": self.name, "op": op, "value": value, "labels": labels})
+            return True
+        return False
+
+    @abc.abstractmethod
+    def samples(self) -> List[str]:
+        """Exposition lines for every label set"""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        if self._forward("inc", amount, labels):
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            return [
+                f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in self._values.items()
+            ]
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelKey, float] = {}
+        self._function: Optional[Callable[[], Dict[LabelKey, float]]] = None
+
+    def set(self, value: float, **labels):
+        if self._forward("set", value, labels):
+            return
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def set_function(self, function: Callable[[], Dict[LabelKey, float]]):
+        """Compute the gauge's values at scrape time"""
+        self._function = function
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        if self._function is not None:
+            try:
+                values.update(self._function())
+            except Exception as e:
+                print(f"Metric {self.name} collection error: {str(e)}")
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in values.items()
+        ]
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._counts: Dict[LabelKey, List[int]] = {}
+        self._sums: Dict[LabelKey, float] = {}
+
+    def observe(self, value: float, **labels):
+        if self._forward("observe", value, labels):
+            return
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * len(self.buckets))
+            counts[index] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, counts in self._counts.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {_format_value(self._sums[key])}")
+                lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    """Holds metrics and renders them in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self.forwarder: Optional[Callable[[Dict[str, Any]], None]] = None
+
+    def register(self, metric: Metric) -> Metric:
+        metric._registry = self
+        self._metrics[metric.name] = metric
+        return metric
+
+    def forward_to(self, forwarder: Callable[[Dict[str, Any]], None]):
+        """Send updates elsewhere instead of recording them (used by worker processes)"""
+        self.forwarder = forwarder
+
+    def apply(self, update: Dict[str, Any]):
+        """Apply an update forwarded from another process"""
+        metric = self._metrics.get(update["metric"])
+        if metric is None:
+            return
+        getattr(metric, update["op"])(update["value"], **update["labels"])
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+metrics_registry = MetricsRegistry()
+
+# Pipeline
+stage_duration = metrics_registry.register(Histogram(
+    "ocr_rag_stage_duration_seconds", "Wall time of each pipeline stage",
+    ["stage", "document_class"]
+))
+documents_processed = metrics_registry.register(Counter(
+    "ocr_rag_documents_processed_total", "Documents finished by the pipeline",
+    ["status", "document_class"]
+))
+
+# Search and chat
+search_duration = metrics_registry.register(Histogram(
+    "ocr_rag_search_duration_seconds", "Latency of each search backend", ["backend"]
+))
+chat_duration = metrics_registry.register(Histogram(
+    "ocr_rag_chat_duration_seconds", "Latency of chat requests"
+))
+
+# Queue
+jobs = metrics_registry.register(Gauge(
+    "ocr_rag_jobs", "Processing jobs by status (queued is the queue depth, running is in flight)", ["status"]
+))
+
+# Models
+model_load_seconds = metrics_registry.register(Gauge(
+    "ocr_rag_model_load_seconds", "Time taken to load each model", ["model"]
+))
+
+# Caches
+cache_requests = metrics_registry.register(Counter(
+    "ocr_rag_cache_requests_total", "Cache lookups by cache and outcome", ["cache", "result"]
+))
+cache_hit_ratio = metrics_registry.register(Gauge(
+    "ocr_rag_cache_hit_ratio", "Share of cache lookups that hit", ["cache"]
+))
+
+# Local index
+local_index_documents = metrics_registry.register(Gauge(
+    "ocr_rag_local_index_documents", "Documents in the local embedding index"
+))
+local_index_bytes = metrics_registry.register(Gauge(
+    "ocr_rag_local_index_bytes", "Size of the local embedding index on disk"
+))
+
+def _cache_hit_ratios() -> Dict[LabelKey, float]:
+    """Derive hit ratios from the cache request counter"""
+    totals: Dict[str, List[float]] = {}
+    for (cache, result), value in list(cache_requests._values.items()):
+        entry = totals.setdefault(cache, [0.0, 0.0])
+        entry[1] += value
+        if result == "hit":
+            entry[0] += value
+    return {(cache,): hits / total for cache, (hits, total) in totals.items() if total}
+
+cache_hit_ratio.set_function(_cache_hit_ratios)
@@ -0,0 +1,88 @@
+import time
+import resource
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+class StageCollector:
+    """Accumulates stage metrics for one document run"""
+
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, metrics: Dict[str, Any]):
+        """Merge metrics for a stage, summing repeated runs such as per-page OCR"""
+        with self._lock:
+            current = self.stages.get(name)
+            if current is None:
+                self.stages[name] = {**metrics, "calls": 1}
+                return
+
+            current["calls"] += 1
+            for key in ("wall_time", "cpu_time", "input_bytes", "output_bytes"):
+                if metrics.get(key) is not None:
+                    current[key] = (current.get(key) or 0) + metrics[key]
+            current["peak_rss_delta_kb"] = max(current["peak_rss_delta_kb"], metrics["peak_rss_delta_kb"])
+
+    def attach(self, steps: Dict[str, Dict[str, Any]]):
+        """Add metrics to the recorded steps, nesting sub-stage timers under their step.
+
+        Stages without a step (cancelled before recording one, or timers outside
+        any step) are left out rather than reported as completed.
+        """
+        for name, metrics in self.stages.items():
+            step = name
+            # Walk up nested timers (easyocr inside ocr) to the step that owns them
+            while step not in steps and step in self.stages:
+                step = self.stages[step].get("parent")
+            if step is None or step not in steps:
+                continue
+            if step == name:
+                steps[step]["metrics"] = metrics
+            else:
+                steps[step].setdefault("substages", {})[name] = metrics
+
+_collector: ContextVar[Optional[StageCollector]] = ContextVar("stage_collector", default=None)
+_current_stage: ContextVar[Optional[str]] = ContextVar("current_stage", default=None)
+
+@contextmanager
+def collect_stages() -> Iterator[StageCollector]:
+    """Collect metrics from every stage_timer run in this context"""
+    collector = StageCollector()
+    token = _collector.set(collector)
+    try:
+        yield collector
+    finally:
+        _collector.reset(token)
+
+def _peak_rss_kb() -> int:
+    """High-water mark of this process's resident set size in KB"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+@contextmanager
+def stage_timer(name: str, input_bytes: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Measure wall time, CPU time and peak RSS growth of a stage"""
+    # Callers may fill in output_bytes; CPU time is process-wide, so overlapping stages share it
+    metrics: Dict[str, Any] = {"input_bytes": input_bytes, "output_bytes": None}
+    # Stages timed inside another stage are already part of its time
+    parent = _current_stage.get()
+    if parent:
+        metrics["parent"] = parent
+    stage_token = _current_stage.set(name)
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    rss_start = _peak_rss_kb()
+
+    try:
+        yield metrics
+    finally:
+        _current_stage.reset(stage_token)
+        metrics["wall_time"] = round(time.perf_counter() - wall_start, 4)
+        metrics["cpu_time"] = round(time.process_time() - cpu_start, 4)
+        metrics["peak_rss_delta_kb"] = _peak_rss_kb() - rss_start
+
+        collector = _collector.get()
+        if collector is not None:
+            collector.add(name, metrics)
@@ -3,22 +3,24 @@ from typing import List, Dict, Tuple, Optional
 import nltk
 from collections import Counter
 
-# Download required NLTK data (run once)
-try:
-    nltk.download('punkt', quiet=True)
-    nltk.download('stopwords', quiet=True)
-except:
-    pass
-
 class TextProcessor:
     """Text processing and analysis utilities"""
     
     def __init__(self):
-        try:
-            from nltk.corpus import stopwords
-            self.stop_words = set(stopwords.words('english'))
-        except:
-            self.stop_words = set()
+        self._stop_words = None
+    
+    @property
+    def stop_words(self) -> set:
+        """English stopwords, downloading the NLTK data on first use"""
+        if self._stop_words is None:
+            try:
+                nltk.download('punkt', quiet=True)
+                nltk.download('stopwords', quiet=True)
+                from nltk.corpus import stopwords
+                self._stop_words = set(stopwords.words('english'))
+            except:
+                self._stop_words = set()
+        return self._stop_words
     
     def clean_text(self, text: str) -> str:
         """Clean and normalize text"""
@@ -0,0 +1,41 @@
+import os
+from typing import Dict
+
+from app.config import settings
+
+# Read once when the BLAS/OpenMP runtimes initialize, so they must be set before a process imports numpy or torch
+BLAS_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "NUMEXPR_NUM_THREADS", "VECLIB_MAXIMUM_THREADS")
+
+def thread_budget() -> Dict[str, int]:
+    """Threads each worker process may use per library, so workers together fill the cores once"""
+    cores = os.cpu_count() or 1
+    per_worker = settings.THREADS_PER_WORKER or max(1, cores // max(1, settings.MAX_WORKERS))
+    return {
+        "cores": cores,
+        "workers": settings.MAX_WORKERS,
+        "torch": per_worker,
+        "blas": per_worker,
+        # OCR pages and pipeline stages already run OpenCV calls from several threads
+        "opencv": settings.OPENCV_THREADS,
+        # Each page in flight also holds a rasterized page in memory
+        "pdf_pages": settings.PDF_PAGE_THREADS or per_worker
+    }
+
+def apply_thread_env(budget: Dict[str, int]):
+    """Export BLAS/OpenMP limits for processes started after this call (explicit settings win)"""
+    for name in BLAS_ENV_VARS:
+        os.environ.setdefault(name, str(budget["blas"]))
+
+def apply_thread_budget(budget: Dict[str, int]):
+    """Limit torch and OpenCV thread pools in the current process"""
+    try:
+        import torch
+        torch.set_num_threads(budget["torch"])
+    except ImportError:
+        pass
+
+    try:
+        import cv2
+        cv2.setNumThreads(budget["opencv"])
+    except ImportError:
+        pass
@@ -0,0 +1,14 @@
+import os
+import tempfile
+
+# Settings are read when app.config is first imported; give the required keys
+# placeholder values and keep data out of the working tree
+_data_dir = tempfile.mkdtemp(prefix="ocr-rag-tests-")
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_ANON_KEY", "test")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "test")
+os.environ.setdefault("OPENAI_API_KEY", "placeholder-openai-key")
+os.environ.setdefault("UPLOAD_DIR", os.path.join(_data_dir, "uploads"))
+os.environ.setdefault("PROCESSED_DIR", os.path.join(_data_dir, "processed"))
+os.environ.setdefault("CACHE_DIR", os.path.join(_data_dir, "cache"))
+os.environ.setdefault("DATABASE_PATH", os.path.join(_data_dir, "ocr_rag.db"))
@@ -0,0 +1,66 @@
+import asyncio
+import os
+
+import pytest
+
+from app.services import processor as processor_module
+from app.services.checkpoints import checkpoint_store
+from app.services.processor import DocumentProcessor, PipelineRun
+
+@pytest.fixture
+def run(tmp_path, monkeypatch):
+    monkeypatch.setattr(checkpoint_store, "root", str(tmp_path / "checkpoints"))
+    source = tmp_path / "note.png"
+    source.write_bytes(b"not really a png")
+    return PipelineRun("checkpoint-doc", str(source), "content-hash")
+
+@pytest.fixture
+def artifact(tmp_path):
+    path = tmp_path / "note.pdf"
+    path.write_bytes(b"%PDF")
+    return str(path)
+
+class CountingStage:
+    def __init__(self, status="completed"):
+        self.calls = 0
+        self.status = status
+
+    async def __call__(self, run, metrics):
+        self.calls += 1
+        return {"call": self.calls}, {"status": self.status}
+
+def _run_stage(run, stage, inputs, artifacts=()):
+    return asyncio.run(DocumentProcessor()._run_stage(run, "pdf", inputs, stage, artifacts=artifacts))
+
+def test_unchanged_inputs_reuse_the_checkpoint(run, artifact):
+    stage = CountingStage()
+    assert _run_stage(run, stage, {"dpi": 200}, [artifact]) == {"call": 1}
+    assert _run_stage(run, stage, {"dpi": 200}, [artifact]) == {"call": 1}
+
+    assert stage.calls == 1
+    assert run.steps["pdf"]["checkpoint"] is True
+
+def test_changed_inputs_rerun_the_stage(run, artifact):
+    stage = CountingStage()
+    _run_stage(run, stage, {"dpi": 200}, [artifact])
+    assert _run_stage(run, stage, {"dpi": 300}, [artifact]) == {"call": 2}
+
+def test_stage_version_bump_reruns_the_stage(run, artifact, monkeypatch):
+    stage = CountingStage()
+    _run_stage(run, stage, {"dpi": 200}, [artifact])
+
+    monkeypatch.setitem(processor_module.STAGE_VERSIONS, "pdf", processor_module.STAGE_VERSIONS["pdf"] + 1)
+    assert _run_stage(run, stage, {"dpi": 200}, [artifact]) == {"call": 2}
+
+def test_missing_artifact_reruns_the_stage(run, artifact):
+    stage = CountingStage()
+    _run_stage(run, stage, {"dpi": 200}, [artifact])
+
+    os.remove(artifact)
+    assert _run_stage(run, stage, {"dpi": 200}, [artifact]) == {"call": 2}
+
+def test_failed_stages_are_not_checkpointed(run):
+    stage = CountingStage(status="failed")
+    _run_stage(run, stage, {"dpi": 200})
+    _run_stage(run, stage, {"dpi": 200})
+    assert stage.calls == 2
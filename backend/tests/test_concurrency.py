@@ -0,0 +1,22 @@
+import asyncio
+import threading
+
+from app.utils.concurrency import run_in_thread, run_io
+
+def test_network_calls_do_not_occupy_stage_threads():
+    release = threading.Event()
+
+    def slow_request():
+        # Stands in for an LLM call that outlasts the stage work below
+        release.wait(10)
+        return threading.current_thread().name
+
+    async def main():
+        requests = [asyncio.ensure_future(run_io(slow_request)) for _ in range(4)]
+        stage_thread = await asyncio.wait_for(run_in_thread(lambda: threading.current_thread().name), 5)
+        release.set()
+        return stage_thread, await asyncio.gather(*requests)
+
+    stage_thread, request_threads = asyncio.run(main())
+    assert stage_thread.startswith("stage")
+    assert all(name.startswith("io") for name in request_threads)
@@ -0,0 +1,56 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from app.services.database import database
+from app.services.job_queue import JobStatus, job_queue
+
+def _running_job(document_id, worker_id, lease_expires_at):
+    job_id, _ = job_queue.enqueue(document_id, "/nonexistent")
+    database.execute(
+        "UPDATE jobs SET status = ?, worker_id = ?, lease_expires_at = ? WHERE id = ?",
+        (JobStatus.RUNNING.value, worker_id, lease_expires_at, job_id)
+    )
+    return job_id
+
+def _status(job_id):
+    return database.query("SELECT status FROM jobs WHERE id = ?", (job_id,))[0]["status"]
+
+def test_recover_leaves_live_leases_alone():
+    host = socket.gethostname()
+    exited = subprocess.Popen([sys.executable, "-c", "pass"])
+    exited.wait()
+    future = time.time() + 600
+
+    live = _running_job("recover-live", f"{host}:{os.getpid()}:0", future)
+    other_pool = _running_job("recover-other-host", "elsewhere:12345:0", future)
+    dead = _running_job("recover-dead", f"{host}:{exited.pid}:0", future)
+    expired = _running_job("recover-expired", "elsewhere:12345:1", time.time() - 1)
+
+    assert job_queue.recover() == 2
+
+    assert _status(live) == JobStatus.RUNNING.value
+    assert _status(other_pool) == JobStatus.RUNNING.value
+    assert _status(dead) == JobStatus.QUEUED.value
+    assert _status(expired) == JobStatus.QUEUED.value
+
+def test_enqueue_reports_whether_a_job_was_created():
+    job_id, created = job_queue.enqueue("enqueue-twice", "/nonexistent")
+    again, created_again = job_queue.enqueue("enqueue-twice", "/nonexistent")
+    assert created and not created_again
+    assert again == job_id
+
+def test_only_the_lease_holder_can_finish_a_job():
+    host = socket.gethostname()
+    job_id = _running_job("lease-owner", f"{host}:{os.getpid()}:1", time.time() + 600)
+
+    # The first worker lost its lease and the job was handed to another one
+    assert not job_queue.complete(job_id, "elsewhere:1:0")
+    assert not job_queue.fail(job_id, "elsewhere:1:0", "late failure")
+    assert not job_queue.mark_cancelled(job_id, "elsewhere:1:0")
+    assert _status(job_id) == JobStatus.RUNNING.value
+
+    assert job_queue.complete(job_id, f"{host}:{os.getpid()}:1")
+    assert _status(job_id) == JobStatus.COMPLETED.value
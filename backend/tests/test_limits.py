@@ -0,0 +1,43 @@
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.utils.limits import BodySizeLimitMiddleware
+
+def _client(received):
+    app = FastAPI()
+    app.add_middleware(BodySizeLimitMiddleware, limits={"/upload": 1000})
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        body = await request.body()
+        received.append(len(body))
+        return {"size": len(body)}
+
+    @app.post("/other")
+    async def other(request: Request):
+        return {"size": len(await request.body())}
+
+    return TestClient(app)
+
+def test_declared_oversized_body_is_rejected_before_the_handler():
+    received = []
+    response = _client(received).post("/upload", content=b"x" * 2000)
+    assert response.status_code == 413
+    assert received == []
+
+def test_chunked_body_is_stopped_once_over_the_limit():
+    received = []
+
+    def chunks():
+        for _ in range(10):
+            yield b"x" * 400
+
+    response = _client(received).post("/upload", content=chunks())
+    assert response.status_code == 413
+    assert received == []
+
+def test_bodies_within_limit_and_other_paths_pass():
+    received = []
+    client = _client(received)
+    assert client.post("/upload", content=b"x" * 900).json() == {"size": 900}
+    assert client.post("/other", content=b"x" * 5000).json() == {"size": 5000}
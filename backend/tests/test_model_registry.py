@@ -0,0 +1,37 @@
+import pytest
+
+from app.core import model_registry as registry_module
+from app.core.model_registry import LazyModel
+
+def test_failed_load_is_retried_after_backoff(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(registry_module.time, "time", lambda: now[0])
+    monkeypatch.setattr(registry_module.settings, "MODEL_RETRY_SECONDS", 30.0)
+
+    attempts = []
+
+    def loader():
+        attempts.append(now[0])
+        if len(attempts) < 3:
+            raise OSError("download failed")
+        return "model"
+
+    model = LazyModel("flaky", loader)
+
+    with pytest.raises(OSError):
+        model.get()
+    # Within the backoff the stored failure is reported without reloading
+    with pytest.raises(RuntimeError):
+        model.get()
+    assert len(attempts) == 1
+
+    now[0] += 31
+    with pytest.raises(OSError):
+        model.get()
+    # The second failure doubles the wait
+    assert model.retry_at == now[0] + 60
+
+    now[0] += 61
+    assert model.get() == "model"
+    assert model.status()["state"] == "ready"
+    assert model.failures == 0
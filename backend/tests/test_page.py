@@ -0,0 +1,133 @@
+import hashlib
+import threading
+
+import cv2
+import numpy as np
+import pytest
+
+from app.core.page import Page
+
+def _with_timeout(fn, timeout=10.0):
+    """Run fn in a thread so a deadlock fails the test instead of hanging it"""
+    result = {}
+
+    def target():
+        result["value"] = fn()
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "view computation did not return (deadlock?)"
+    return result["value"]
+
+@pytest.fixture
+def jpeg_path(tmp_path):
+    image = np.full((600, 800, 3), 255, dtype=np.uint8)
+    cv2.rectangle(image, (100, 100), (300, 250), (0, 0, 0), 3)
+    cv2.putText(image, "Page test", (120, 400), cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 0, 0), 3)
+    path = str(tmp_path / "page.jpg")
+    cv2.imwrite(path, image)
+    return path
+
+def test_file_backed_views(jpeg_path):
+    page = Page(jpeg_path)
+
+    with open(jpeg_path, 'rb') as f:
+        expected_hash = hashlib.sha256(f.read()).hexdigest()
+
+    assert _with_timeout(lambda: page.content_hash) == expected_hash
+    assert _with_timeout(lambda: page.gray).shape == (600, 800)
+    assert _with_timeout(lambda: page.edges).any()
+    assert _with_timeout(lambda: page.pil).size == (800, 600)
+
+def test_views_are_computed_once_across_threads(jpeg_path):
+    page = Page(jpeg_path)
+    grays = []
+    threads = [threading.Thread(target=lambda: grays.append(page.gray)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10.0)
+
+    assert len(grays) == 4
+    assert all(gray is grays[0] for gray in grays)
+
+def test_array_backed_page_hashes_pixels():
+    image = np.zeros((10, 20, 3), dtype=np.uint8)
+    page = Page.open(image)
+
+    assert page.raw_bytes is None
+    assert _with_timeout(lambda: page.content_hash) == Page.open(image.copy()).content_hash
+    assert page.gray.shape == (10, 20)
+
+@pytest.fixture
+def large_jpeg_path(tmp_path):
+    # A flowchart of three boxes on a 12 MP page
+    image = np.full((3000, 4000, 3), 255, dtype=np.uint8)
+    for top in (400, 1200, 2000):
+        cv2.rectangle(image, (1000, top), (1800, top + 500), (0, 0, 0), 8)
+    path = str(tmp_path / "large.jpg")
+    cv2.imwrite(path, image)
+    return path
+
+def test_reduced_decode_skips_full_decode(large_jpeg_path, monkeypatch):
+    from app.config import settings
+    monkeypatch.setattr(settings, "DETECTION_MAX_SIDE", 1600)
+    page = Page(large_jpeg_path)
+
+    assert _with_timeout(lambda: page.reduction) == 2
+    reduced = _with_timeout(lambda: page.reduced_gray)
+    assert reduced.shape == (1500, 2000)
+    assert _with_timeout(lambda: page.reduced_edges).any()
+    # Libjpeg decoded at half scale; the full-resolution image was never built
+    assert "bgr" not in page._views
+
+def test_reduced_detection_reports_full_resolution_boxes(large_jpeg_path, monkeypatch):
+    from app.config import settings
+    from app.core.diagram_detector import diagram_detector
+
+    monkeypatch.setattr(settings, "DETECTION_MAX_SIDE", 0)
+    full = [d for d in diagram_detector.detect_diagrams(Page(large_jpeg_path)) if d['type'] == 'flowchart']
+
+    monkeypatch.setattr(settings, "DETECTION_MAX_SIDE", 1600)
+    reduced = [d for d in diagram_detector.detect_diagrams(Page(large_jpeg_path)) if d['type'] == 'flowchart']
+
+    assert full and reduced
+    for a, b in zip(full[0]['bbox'], reduced[0]['bbox']):
+        assert abs(a - b) <= 8
+
+def test_release_drops_decoded_views(jpeg_path):
+    page = Page(jpeg_path)
+    content_hash = page.content_hash
+    page.gray, page.edges, page.binary, page.pil
+
+    page.release()
+
+    assert set(page._views) == {"content_hash"}
+    assert page.content_hash == content_hash
+    # Views are rebuilt on demand after a release
+    assert page.gray.shape == (600, 800)
+
+def test_text_height_uses_binary_view(tmp_path, monkeypatch):
+    from app.core import page as page_module
+    from app.utils.image import image_processor
+
+    # 40 glyph-like marks, each 24 px tall
+    image = np.full((400, 800, 3), 255, dtype=np.uint8)
+    for i in range(40):
+        x, y = 20 + (i % 20) * 38, 60 + (i // 20) * 120
+        cv2.rectangle(image, (x, y), (x + 14, y + 23), (0, 0, 0), -1)
+    path = str(tmp_path / "glyphs.png")
+    cv2.imwrite(path, image)
+    page = Page(path)
+
+    thresholds = []
+    real_threshold = page_module.cv2.threshold
+    monkeypatch.setattr(page_module.cv2, "threshold", lambda *args: thresholds.append(1) or real_threshold(*args))
+
+    binary = page.binary
+    assert image_processor.estimate_text_height(page) == 24
+    assert image_processor.segment_image(page)
+    # Both share the one cached ink mask
+    assert len(thresholds) == 1
+    assert page.binary is binary
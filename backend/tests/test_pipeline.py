@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from app.services.pipeline import Stage, run_pipeline
+
+def test_stages_start_after_their_dependencies():
+    events = []
+
+    def stage(name, delay=0.0):
+        async def fn(inputs):
+            events.append(f"start {name}")
+            await asyncio.sleep(delay)
+            events.append(f"end {name}")
+            return {"name": name, "inputs": sorted(inputs)}
+        return fn
+
+    outputs = asyncio.run(run_pipeline([
+        Stage("ocr", stage("ocr", 0.05)),
+        Stage("diagrams", stage("diagrams", 0.01)),
+        Stage("vision", stage("vision"), deps=["ocr"]),
+        Stage("pdf", stage("pdf"), deps=["vision", "diagrams"])
+    ]))
+
+    assert outputs["pdf"]["inputs"] == ["diagrams", "vision"]
+    # Independent stages overlap; dependents wait for every dependency
+    assert events.index("start diagrams") < events.index("end ocr")
+    assert events.index("end ocr") < events.index("start vision")
+    assert events.index("end vision") < events.index("start pdf")
+    assert events.index("end diagrams") < events.index("start pdf")
+
+def test_unknown_dependency_is_rejected():
+    async def noop(inputs):
+        return None
+
+    with pytest.raises(ValueError):
+        asyncio.run(run_pipeline([Stage("pdf", noop, deps=["ocr"])]))
+
+def test_failure_cancels_sibling_stages():
+    cancelled = []
+
+    async def failing(inputs):
+        await asyncio.sleep(0.01)
+        raise RuntimeError("ocr failed")
+
+    async def slow(inputs):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append("diagrams")
+            raise
+
+    async def dependent(inputs):
+        cancelled.append("vision ran")
+
+    with pytest.raises(RuntimeError, match="ocr failed"):
+        asyncio.run(asyncio.wait_for(run_pipeline([
+            Stage("ocr", failing),
+            Stage("diagrams", slow),
+            Stage("vision", dependent, deps=["ocr"])
+        ]), 5))
+
+    assert cancelled == ["diagrams"]
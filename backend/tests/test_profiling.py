@@ -0,0 +1,21 @@
+from app.utils.profiling import collect_stages, stage_timer
+
+def test_metrics_attach_only_to_recorded_steps():
+    with collect_stages() as collector:
+        with stage_timer("ocr"):
+            with stage_timer("easyocr"):
+                with stage_timer("preprocess"):
+                    pass
+        with stage_timer("vision"):
+            pass
+        with stage_timer("embedding"):
+            pass
+
+    # vision was cancelled before recording a step; embedding ran outside any step
+    steps = {"ocr": {"status": "failed"}}
+    collector.attach(steps)
+
+    assert steps["ocr"]["status"] == "failed"
+    assert steps["ocr"]["metrics"]["calls"] == 1
+    assert set(steps["ocr"]["substages"]) == {"easyocr", "preprocess"}
+    assert set(steps) == {"ocr"}
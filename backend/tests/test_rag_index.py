@@ -0,0 +1,78 @@
+import json
+import os
+import threading
+
+import pytest
+
+from app.services.rag import RAGService
+
+@pytest.fixture
+def services(tmp_path, monkeypatch):
+    """Two services standing in for the API process and a worker sharing one index file"""
+    monkeypatch.setattr(RAGService, "index_path", property(lambda self: str(tmp_path / "document_index.json")))
+    return RAGService(), RAGService()
+
+def _entry(text):
+    return {"content": text, "metadata": {}, "embeddings": [1.0, 0.0]}
+
+def _add(service, document_id):
+    def add(index):
+        index[document_id] = _entry(document_id)
+        return True
+    return service._update_local_index(add)
+
+def test_writers_merge_instead_of_overwriting(services):
+    api, worker = services
+    _add(api, "a")
+    _add(worker, "b")
+    # api still holds its copy from before the worker wrote
+    _add(api, "c")
+
+    with open(api.index_path) as f:
+        assert set(json.load(f)) == {"a", "b", "c"}
+
+def test_readers_reload_when_the_file_changes(services):
+    api, worker = services
+    _add(api, "a")
+    api._load_local_index()
+    assert set(api.documents_index) == {"a"}
+
+    _add(worker, "b")
+    api._load_local_index()
+    assert set(api.documents_index) == {"a", "b"}
+
+    assert worker._remove_locally("a")
+    api._load_local_index()
+    assert set(api.documents_index) == {"b"}
+
+def test_concurrent_writers_lose_no_entries(services):
+    threads = [
+        threading.Thread(target=_add, args=(services[i % 2], f"doc-{i}"))
+        for i in range(40)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    reader = services[0]
+    reader._load_local_index()
+    assert set(reader.documents_index) == {f"doc-{i}" for i in range(40)}
+    assert not [name for name in os.listdir(os.path.dirname(reader.index_path)) if name.endswith(".tmp")]
+
+def test_document_count_follows_other_writers(services):
+    api, worker = services
+    assert api.local_document_count() == 0
+    _add(worker, "a")
+    _add(worker, "b")
+    assert api.local_document_count() == 2
+
+def test_document_count_does_not_parse_the_index(services, monkeypatch):
+    api, worker = services
+    _add(worker, "a")
+
+    def fail(*args, **kwargs):
+        raise AssertionError("the count must not load the embedding index")
+
+    monkeypatch.setattr(json, "load", fail)
+    assert api.local_document_count() == 1
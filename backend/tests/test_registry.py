@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from app.services import registry as registry_module
+from app.services.database import Database
+from app.services.registry import DocumentRegistry
+
+# Three documents share each of the first two timestamps
+CREATED = {
+    "a": "2026-01-01T00:00:00", "b": "2026-01-01T00:00:00", "c": "2026-01-01T00:00:00",
+    "d": "2026-01-02T00:00:00", "e": "2026-01-02T00:00:00", "f": "2026-01-02T00:00:00",
+    "g": "2026-01-03T00:00:00"
+}
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    """A document registry on its own SQLite database"""
+    monkeypatch.setattr(registry_module, "database", Database(str(tmp_path / "documents.db")))
+    registry = DocumentRegistry()
+    for document_id, created_at in CREATED.items():
+        registry._insert({
+            "id": document_id,
+            "title": document_id,
+            "original_file_path": f"/uploads/{document_id}.png",
+            "status": "pending",
+            "created_at": created_at,
+            "updated_at": created_at
+        })
+    return registry
+
+def _pages(registry, order_by, limit):
+    pages, after = [], None
+    while True:
+        rows = registry.list_page(limit, order_by=order_by, after=after, columns=["title"])
+        if not rows:
+            return pages
+        pages.append([row["id"] for row in rows])
+        after = rows[-1]
+
+def test_newest_first_pages_split_timestamp_ties(registry):
+    # Ties on created_at are ordered by id, so no row is skipped or repeated at a page boundary
+    assert _pages(registry, "created_at", 2) == [["g", "f"], ["e", "d"], ["c", "b"], ["a"]]
+
+def test_id_order_pages(registry):
+    assert _pages(registry, "id", 3) == [["a", "b", "c"], ["d", "e", "f"], ["g"]]
+
+def test_projection_keeps_cursor_columns(registry):
+    row = registry.list_page(1, columns=["title"])[0]
+    assert set(row) == {"title", "id", "created_at"}
+
+def test_api_cursor_walks_to_the_last_page(registry):
+    from app.api.documents import list_documents
+
+    seen, cursor = [], None
+    while True:
+        page = asyncio.run(list_documents(limit=3, cursor=cursor, order_by="created_at", fields=None))
+        seen.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == ["g", "f", "e", "d", "c", "b", "a"]
+
+def test_full_last_page_has_no_next_cursor(registry):
+    from app.api.documents import list_documents
+
+    page = asyncio.run(list_documents(limit=len(CREATED), cursor=None, order_by="id", fields=None))
+    assert len(page["items"]) == len(CREATED)
+    assert page["next_cursor"] is None
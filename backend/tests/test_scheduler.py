@@ -0,0 +1,85 @@
+import time
+
+import pytest
+
+from app.services import job_queue as job_queue_module
+from app.services.database import Database
+from app.services.job_queue import JobPriority, JobQueue
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    """A job queue on its own SQLite database"""
+    monkeypatch.setattr(job_queue_module, "database", Database(str(tmp_path / "jobs.db")))
+    monkeypatch.setattr(job_queue_module.settings, "TENANT_WEIGHTS", {})
+    monkeypatch.setattr(job_queue_module.settings, "MAX_IN_FLIGHT_JOBS", 0)
+    return JobQueue()
+
+def _enqueue(queue, document_id, user_id, priority=JobPriority.INTERACTIVE):
+    # A missing file costs one unit, so start tags advance by 1 / weight
+    job_id, _ = queue.enqueue(document_id, "/nonexistent", user_id=user_id, priority=priority)
+    return job_id
+
+def _drain(queue):
+    order = []
+    while True:
+        job = queue.claim("test:1:0")
+        if not job:
+            return order
+        order.append(job["document_id"])
+        queue.complete(job["id"], "test:1:0")
+
+def test_tenants_interleave_instead_of_first_come_first_served(queue):
+    for i in range(3):
+        _enqueue(queue, f"a{i}", "alice")
+    _enqueue(queue, "b0", "bob")
+
+    assert _drain(queue) == ["a0", "b0", "a1", "a2"]
+
+def test_tenant_weights_scale_the_share_of_claims(queue, monkeypatch):
+    monkeypatch.setattr(job_queue_module.settings, "TENANT_WEIGHTS", {"heavy": 2.0})
+    for i in range(4):
+        _enqueue(queue, f"h{i}", "heavy")
+    for i in range(2):
+        _enqueue(queue, f"l{i}", "light")
+
+    # Start tags: heavy 0, 0.5, 1, 1.5 and light 0, 1; ties go to the older job
+    assert _drain(queue) == ["h0", "l0", "h1", "h2", "l1", "h3"]
+
+def test_new_tenant_starts_at_virtual_time(queue):
+    for i in range(3):
+        _enqueue(queue, f"a{i}", "alice")
+    assert queue.claim("test:1:0")["document_id"] == "a0"
+    assert queue.claim("test:1:1")["document_id"] == "a1"
+
+    # Carol gets no credit for the time she was idle, but is not behind alice either
+    _enqueue(queue, "c0", "carol")
+    _enqueue(queue, "c1", "carol")
+    assert _drain(queue) == ["c0", "a2", "c1"]
+
+def test_interactive_jobs_go_before_bulk(queue):
+    _enqueue(queue, "bulk", "alice", JobPriority.BULK)
+    _enqueue(queue, "interactive", "bob")
+
+    assert _drain(queue) == ["interactive", "bulk"]
+
+def test_bulk_jobs_are_promoted_after_aging(queue, monkeypatch):
+    monkeypatch.setattr(job_queue_module.settings, "BULK_AGING_SECONDS", 300.0)
+    bulk = _enqueue(queue, "bulk", "alice", JobPriority.BULK)
+    _enqueue(queue, "interactive", "bob")
+    job_queue_module.database.execute(
+        "UPDATE jobs SET created_at = ? WHERE id = ?", (time.time() - 301, bulk)
+    )
+
+    assert _drain(queue) == ["bulk", "interactive"]
+
+def test_in_flight_cap_is_enforced_at_claim(queue, monkeypatch):
+    monkeypatch.setattr(job_queue_module.settings, "MAX_IN_FLIGHT_JOBS", 1)
+    _enqueue(queue, "first", "alice")
+    _enqueue(queue, "second", "bob")
+
+    first = queue.claim("test:1:0")
+    assert first["document_id"] == "first"
+    assert queue.claim("test:1:1") is None
+
+    queue.complete(first["id"], "test:1:0")
+    assert queue.claim("test:1:1")["document_id"] == "second"
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from app.services import rag as rag_module
+from app.services import stage_cache as stage_cache_module
+from app.services.stage_cache import StageCache
+
+class FakeClock:
+    """Strictly increasing time so access order is unambiguous"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        self.now += 1
+        return self.now
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(stage_cache_module, "time", FakeClock())
+    monkeypatch.setattr(stage_cache_module.settings, "STAGE_CACHE_ENABLED", True)
+    return StageCache(root=str(tmp_path / "stages"), max_bytes=250)
+
+def test_least_recently_used_entries_are_evicted(cache):
+    cache.put("ocr", "k1", b"1" * 100)
+    cache.put("ocr", "k2", b"2" * 100)
+    # Reading k1 makes k2 the least recently used
+    assert cache.get("ocr", "k1") == b"1" * 100
+
+    cache.put("ocr", "k3", b"3" * 100)
+
+    assert cache.get("ocr", "k2") is None
+    assert cache.get("ocr", "k1") is not None
+    assert cache.get("ocr", "k3") is not None
+    assert cache.stats()["total_bytes"] <= 250
+
+def test_entries_larger_than_the_cache_are_not_stored(cache):
+    cache.put("ocr", "big", b"x" * 300)
+    assert cache.get("ocr", "big") is None
+
+def test_keys_change_with_version_and_parameters():
+    key = StageCache.make_key("embedding", 1, "hash", {"model": "a"})
+    assert key == StageCache.make_key("embedding", 1, "hash", {"model": "a"})
+    assert key != StageCache.make_key("embedding", 2, "hash", {"model": "a"})
+    assert key != StageCache.make_key("embedding", 1, "hash", {"model": "b"})
+
+class CountingEncoder:
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, content):
+        self.calls += 1
+        return np.ones(4, dtype=np.float32)
+
+class StaticModel:
+    def __init__(self, model):
+        self.model = model
+
+    def get(self):
+        return self.model
+
+def test_embedding_version_bump_recomputes_cached_embeddings(tmp_path, monkeypatch):
+    monkeypatch.setattr(stage_cache_module.settings, "STAGE_CACHE_ENABLED", True)
+    monkeypatch.setattr(rag_module, "stage_cache", StageCache(root=str(tmp_path / "stages"), max_bytes=10 ** 6))
+    monkeypatch.setattr(rag_module.RAGService, "index_path", property(lambda self: str(tmp_path / "index.json")))
+
+    encoder = CountingEncoder()
+    service = rag_module.RAGService()
+    service._embedding_model = StaticModel(encoder)
+
+    assert service._index_locally("doc-1", "same text")
+    assert service._index_locally("doc-2", "same text")
+    assert encoder.calls == 1
+
+    monkeypatch.setattr(rag_module, "EMBEDDING_VERSION", rag_module.EMBEDDING_VERSION + 1)
+    assert service._index_locally("doc-3", "same text")
+    assert encoder.calls == 2
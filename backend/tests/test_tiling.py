@@ -0,0 +1,72 @@
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+
+from app.core.ocr_batcher import OCRBatcher
+from app.core.tiling import split_tiles
+
+def _coverage(tiles, height, width):
+    covered = np.zeros((height, width), dtype=np.uint8)
+    for x, y, w, h in tiles:
+        covered[y:y + h, x:x + w] = 1
+    return covered
+
+def test_tiles_are_even_and_barely_inflate_pixels():
+    tiles = split_tiles(3000, 4000, 2560, 160)
+
+    assert len(tiles) == 4
+    # Equal tiles batch together, and none is a full-size edge tile
+    assert len({(w, h) for _, _, w, h in tiles}) == 1
+    assert all(w < 2560 and h < 2560 for _, _, w, h in tiles)
+    assert _coverage(tiles, 3000, 4000).all()
+    assert sum(w * h for _, _, w, h in tiles) / (3000 * 4000) < 1.15
+
+def test_tiles_overlap_by_at_least_the_requested_amount():
+    tiles = split_tiles(9000, 3000, 2000, 160)
+    rows = sorted({(y, h) for _, y, _, h in tiles})
+    assert all(rows[i][0] + rows[i][1] - rows[i + 1][0] >= 160 for i in range(len(rows) - 1))
+    assert _coverage(tiles, 9000, 3000).all()
+
+def test_small_image_is_one_tile():
+    assert split_tiles(1000, 800, 2560, 160) == [(0, 0, 800, 1000)]
+
+def test_overlap_must_be_smaller_than_tile():
+    with pytest.raises(ValueError):
+        split_tiles(4000, 4000, 100, 160)
+
+class _Reader:
+    def __init__(self):
+        self.batches = []
+
+    def readtext(self, image, **kwargs):
+        self.batches.append(1)
+        return []
+
+    def readtext_batched(self, images, **kwargs):
+        self.batches.append(len(images))
+        return [[] for _ in images]
+
+def test_batches_respect_pixel_budget():
+    reader = _Reader()
+    batcher = OCRBatcher(reader, batch_size=8, max_wait=0, max_pixels=3 * 100 * 100)
+    items = [(np.zeros((100, 100), dtype=np.uint8), Future()) for _ in range(7)]
+
+    batcher._run_batch(items)
+
+    assert reader.batches == [3, 3, 1]
+    assert all(future.done() for _, future in items)
+
+def test_default_budget_batches_page_tiles_and_pages_together():
+    reader = _Reader()
+    batcher = OCRBatcher(reader, batch_size=5, max_wait=0)
+    tiles = split_tiles(3000, 4000, 2560, 160)
+    items = [(np.zeros((h, w), dtype=np.uint8), Future()) for _, _, w, h in tiles]
+
+    batcher._run_batch(items)
+    assert reader.batches == [4]
+
+    # Five 200 DPI letter pages (about 3.7 MP each) still form one batch
+    reader.batches.clear()
+    batcher._run_batch([(np.zeros((2200, 1700), dtype=np.uint8), Future()) for _ in range(5)])
+    assert reader.batches == [5]
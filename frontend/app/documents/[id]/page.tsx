@@ -3,7 +3,7 @@
 import { useState, useEffect } from 'react'
 import { useParams, useRouter } from 'next/navigation'
 import { ArrowLeft, Download, FileText, Eye, CheckCircle, XCircle } from 'lucide-react'
-import { getDocument, getProcessingStatus } from '@/lib/api-client'
+import { cancelProcessing, getDocument, getProcessingStatus, subscribeToProcessing } from '@/lib/api-client'
 
 export default function DocumentDetailPage() {
   const params = useParams()
@@ -11,6 +11,7 @@ export default function DocumentDetailPage() {
   const [document, setDocument] = useState<any>(null)
   const [processingStatus, setProcessingStatus] = useState<any>(null)
   const [loading, setLoading] = useState(true)
+  const [cancelling, setCancelling] = useState(false)
 
   useEffect(() => {
     if (params.id) {
@@ -18,6 +19,30 @@ export default function DocumentDetailPage() {
     }
   }, [params.id])
 
+  const isRunning = processingStatus?.status === 'queued' || processingStatus?.status === 'processing'
+
+  // Stream stage updates while the document is being processed
+  useEffect(() => {
+    if (!params.id || !isRunning) return
+
+    const id = params.id as string
+    return subscribeToProcessing(id, (event, data) => {
+      if (event === 'stage_finished') {
+        setProcessingStatus((current: any) => ({
+          ...current,
+          status: 'processing',
+          steps: { ...(current?.steps || {}), [data.stage]: data.step }
+        }))
+        // Show OCR text as soon as it is ready
+        if (data.stage === 'ocr' && data.step?.text) {
+          setDocument((current: any) => ({ ...current, ocr_text: data.step.text }))
+        }
+      } else if (event === 'document_finished' || event === 'result') {
+        fetchDocumentDetails(id)
+      }
+    })
+  }, [params.id, isRunning])
+
   const fetchDocumentDetails = async (id: string) => {
     try {
       // Get document info
@@ -35,6 +60,20 @@ export default function DocumentDetailPage() {
     }
   }
 
+  const handleCancel = async () => {
+    const id = params.id as string
+    setCancelling(true)
+    try {
+      await cancelProcessing(id)
+      // A running job stops at its next stage; the stream reports when it has
+      await fetchDocumentDetails(id)
+    } catch (error) {
+      console.error('Error cancelling processing:', error)
+    } finally {
+      setCancelling(false)
+    }
+  }
+
   const getStepIcon = (status: string) => {
     if (status === 'completed') return <CheckCircle className="w-5 h-5 text-green-500" />
     if (status === 'failed') return <XCircle className="w-5 h-5 text-red-500" />
@@ -116,7 +155,18 @@ export default function DocumentDetailPage() {
         {/* Sidebar - Processing Status */}
         <div className="space-y-6">
           <div className="card">
-            <h2 className="text-lg font-semibold mb-4">Processing Status</h2>
+            <div className="flex items-center justify-between mb-4">
+              <h2 className="text-lg font-semibold">Processing Status</h2>
+              {isRunning && (
+                <button
+                  onClick={handleCancel}
+                  disabled={cancelling}
+                  className="btn-secondary text-sm"
+                >
+                  {cancelling ? 'Cancelling...' : 'Cancel'}
+                </button>
+              )}
+            </div>
             
             {processingStatus && (
               <div className="space-y-3">
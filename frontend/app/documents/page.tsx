@@ -9,6 +9,7 @@ import { getDocuments, deleteDocument } from '@/lib/api-client'
 export default function DocumentsPage() {
   const [documents, setDocuments] = useState<any[]>([])
   const [loading, setLoading] = useState(true)
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
 
   useEffect(() => {
     fetchDocuments()
@@ -16,8 +17,9 @@ export default function DocumentsPage() {
 
   const fetchDocuments = async () => {
     try {
-      const docs = await getDocuments()
-      setDocuments(docs)
+      const page = await getDocuments()
+      setDocuments(page.items)
+      setNextCursor(page.next_cursor)
     } catch (error) {
       console.error('Error fetching documents:', error)
     } finally {
@@ -25,6 +27,18 @@ export default function DocumentsPage() {
     }
   }
 
+  const loadMore = async () => {
+    if (!nextCursor) return
+    
+    try {
+      const page = await getDocuments(nextCursor)
+      setDocuments(prev => [...prev, ...page.items])
+      setNextCursor(page.next_cursor)
+    } catch (error) {
+      console.error('Error fetching documents:', error)
+    }
+  }
+
   const handleDelete = async (documentId: string) => {
     if (!confirm('Are you sure you want to delete this document?')) return
     
@@ -72,6 +86,14 @@ export default function DocumentsPage() {
           ))}
         </div>
       )}
+
+      {nextCursor && (
+        <div className="flex justify-center mt-8">
+          <button onClick={loadMore} className="btn-primary">
+            Load more
+          </button>
+        </div>
+      )}
     </div>
   )
 }
\ No newline at end of file
@@ -28,14 +28,41 @@ export const processDocument = async (documentId: string) => {
   return response.data
 }
 
+export const cancelProcessing = async (documentId: string) => {
+  const response = await apiClient.post(`/api/v1/process/${documentId}/cancel`)
+  return response.data
+}
+
 export const getProcessingStatus = async (documentId: string) => {
   const response = await apiClient.get(`/api/v1/process/${documentId}/status`)
   return response.data
 }
 
+// Follow processing progress over server-sent events; returns a function that closes the stream
+export const subscribeToProcessing = (
+  documentId: string,
+  onEvent: (event: string, data: any) => void
+) => {
+  const source = new EventSource(`${API_BASE_URL}/api/v1/process/${documentId}/events`)
+  const events = ['status', 'result', 'document_queued', 'document_started', 'stage_started', 'stage_finished', 'document_finished']
+  
+  events.forEach(event => {
+    source.addEventListener(event, (message) => {
+      onEvent(event, JSON.parse((message as MessageEvent).data))
+      if (event === 'document_finished' || event === 'result') {
+        source.close()
+      }
+    })
+  })
+  
+  return () => source.close()
+}
+
 // Document functions
-export const getDocuments = async () => {
-  const response = await apiClient.get('/api/v1/documents')
+export const getDocuments = async (cursor?: string, limit: number = 50) => {
+  const response = await apiClient.get('/api/v1/documents', {
+    params: { cursor, limit, fields: 'id,title,status,created_at' }
+  })
   return response.data
 }
 
@@ -2,8 +2,66 @@ import time
 import statistics
 import concurrent.futures
 import requests
+import json
 import os
 import sys
+import threading
+import subprocess
+import shutil
+import tempfile
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+class LatencyProbe(threading.Thread):
+    """Poll a lightweight endpoint to measure API responsiveness under load"""
+    
+    def __init__(self, url, interval=0.1):
+        super().__init__(daemon=True)
+        self.url = url
+        self.interval = interval
+        self.latencies = []
+        self.errors = 0
+        self._stop_event = threading.Event()
+    
+    def run(self):
+        while not self._stop_event.is_set():
+            start = time.perf_counter()
+            try:
+                requests.get(self.url, timeout=30)
+                self.latencies.append(time.perf_counter() - start)
+            except requests.RequestException:
+                self.errors += 1
+            self._stop_event.wait(self.interval)
+    
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+    
+    def summary(self):
+        return {
+            'samples': len(self.latencies),
+            'errors': self.errors,
+            'p50': percentile(self.latencies, 50),
+            'p95': percentile(self.latencies, 95),
+            'p99': percentile(self.latencies, 99),
+            'max': max(self.latencies) if self.latencies else 0.0
+        }
+
+def print_latency(label, summary):
+    """Print a latency probe summary in milliseconds"""
+    print(f"\n{label} ({summary['samples']} samples, {summary['errors']} errors):")
+    print(f"  p50: {summary['p50'] * 1000:.1f}ms")
+    print(f"  p95: {summary['p95'] * 1000:.1f}ms")
+    print(f"  p99: {summary['p99'] * 1000:.1f}ms")
+    print(f"  Max: {summary['max'] * 1000:.1f}ms")
 
 class OCRBenchmark:
     def __init__(self, api_base="http://localhost:8000"):
@@ -29,22 +87,8 @@ class OCRBenchmark:
         process_start = time.time()
         requests.post(f"{self.api_base}/api/v1/process/{document_id}")
         
-        # Wait for completion
-        max_wait = 60  # seconds
-        completed = False
-        
-        while (time.time() - process_start) < max_wait:
-            status_response = requests.get(f"{self.api_base}/api/v1/process/{document_id}/status")
-            
-            if status_response.status_code == 200:
-                status = status_response.json().get('status')
-                if status == 'completed':
-                    completed = True
-                    break
-                elif status == 'failed':
-                    break
-            
-            time.sleep(0.5)
+        # Wait for completion on the progress stream instead of polling
+        completed, first_text_time = self.wait_for_completion(document_id, process_start)
         
         process_time = time.time() - process_start
         total_time = time.time() - start_time
@@ -54,9 +98,39 @@ class OCRBenchmark:
             'upload_time': upload_time,
             'process_time': process_time,
             'total_time': total_time,
+            'first_text_time': first_text_time,
             'completed': completed
         }
     
+    def wait_for_completion(self, document_id, process_start, max_wait=60):
+        """Follow the document's server-sent events until processing finishes"""
+        first_text_time = None
+        event = None
+        
+        try:
+            with requests.get(
+                f"{self.api_base}/api/v1/process/{document_id}/events",
+                stream=True,
+                timeout=max_wait
+            ) as response:
+                for line in response.iter_lines(decode_unicode=True):
+                    if time.time() - process_start > max_wait:
+                        break
+                    if line.startswith('event:'):
+                        event = line[len('event:'):].strip()
+                    elif line.startswith('data:'):
+                        data = json.loads(line[len('data:'):])
+                        if event == 'stage_finished' and data.get('stage') == 'ocr' and first_text_time is None:
+                            first_text_time = time.time() - process_start
+                        elif event == 'document_finished':
+                            return data.get('status') == 'completed', first_text_time
+                        elif event in ('status', 'result') and data.get('status') in ('completed', 'failed'):
+                            return data.get('status') == 'completed', first_text_time
+        except requests.RequestException as e:
+            print(f"Progress stream error for {document_id}: {e}")
+        
+        return False, first_text_time
+    
     def benchmark_concurrent(self, file_paths, max_workers=4):
         """Benchmark concurrent processing"""
         print(f"Starting concurrent benchmark with {max_workers} workers...")
@@ -110,12 +184,105 @@ class OCRBenchmark:
         print(f"  Avg: {statistics.mean(process_times):.2f}s")
         print(f"  Median: {statistics.median(process_times):.2f}s")
         
+        first_text_times = [r['first_text_time'] for r in self.results if r.get('first_text_time') is not None]
+        if first_text_times:
+            print("\nTime to First Text:")
+            print(f"  Min: {min(first_text_times):.2f}s")
+            print(f"  Max: {max(first_text_times):.2f}s")
+            print(f"  Median: {statistics.median(first_text_times):.2f}s")
+        
         print("\nTotal Times:")
         print(f"  Min: {min(total_times):.2f}s")
         print(f"  Max: {max(total_times):.2f}s")
         print(f"  Avg: {statistics.mean(total_times):.2f}s")
         print(f"  Median: {statistics.median(total_times):.2f}s")
 
+def start_server(port, env_overrides, startup_timeout=300):
+    """Start the API with the given settings and wait until its workers are up"""
+    env = dict(os.environ, **env_overrides)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port)],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    
+    deadline = time.time() + startup_timeout
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with {server.returncode}")
+        try:
+            health = requests.get(f"http://localhost:{port}/health", timeout=2).json()
+            if health.get("services", {}).get("workers", 0) >= int(env_overrides["MAX_WORKERS"]):
+                return server
+        except (requests.RequestException, ValueError):
+            pass
+        time.sleep(1)
+    
+    server.terminate()
+    raise RuntimeError("Server did not become ready in time")
+
+def sweep_thread_budgets(file_paths, worker_counts, thread_counts, port, concurrency):
+    """Measure throughput for each workers x threads-per-worker combination"""
+    rows = []
+    
+    for workers in worker_counts:
+        for threads in thread_counts:
+            print(f"\n--- {workers} workers x {threads} threads ---")
+            # Fresh data directories, so earlier runs are not served from dedup or checkpoints
+            data_dir = tempfile.mkdtemp(prefix="ocr-sweep-")
+            try:
+                server = start_server(port, {
+                    "MAX_WORKERS": str(workers),
+                    "UPLOAD_DIR": os.path.join(data_dir, "uploads"),
+                    "PROCESSED_DIR": os.path.join(data_dir, "processed"),
+                    "CACHE_DIR": os.path.join(data_dir, "cache"),
+                    "DATABASE_PATH": os.path.join(data_dir, "ocr_rag.db"),
+                    "THREADS_PER_WORKER": str(threads),
+                    # BLAS limits are inherited, so they must not leak in from this shell
+                    **{name: str(threads) for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")}
+                })
+            except RuntimeError as e:
+                print(f"Skipping: {e}")
+                shutil.rmtree(data_dir, ignore_errors=True)
+                continue
+            
+            try:
+                api = f"http://localhost:{port}"
+                # Warm-up document so model loading is not measured; it is left out
+                # of the measured set because a second upload would be deduplicated
+                OCRBenchmark(api).benchmark_single_file(file_paths[0])
+                measured = file_paths[1:] or file_paths
+                
+                benchmark = OCRBenchmark(api)
+                summary = benchmark.benchmark_concurrent(measured, concurrency)
+                completed = sum(1 for r in benchmark.results if r['completed'])
+                rows.append({
+                    'workers': workers,
+                    'threads': threads,
+                    'docs_per_sec': completed / summary['total_time'] if summary['total_time'] else 0,
+                    'median_latency': statistics.median([r['total_time'] for r in benchmark.results]) if benchmark.results else 0
+                })
+            finally:
+                server.terminate()
+                server.wait()
+                shutil.rmtree(data_dir, ignore_errors=True)
+    
+    if not rows:
+        print("No configuration completed")
+        return
+    
+    print("\n" + "=" * 50)
+    print("THREAD BUDGET SWEEP")
+    print("=" * 50)
+    print(f"{'Workers':>8} {'Threads':>8} {'Docs/s':>8} {'Median':>8}")
+    for row in rows:
+        print(f"{row['workers']:>8} {row['threads']:>8} {row['docs_per_sec']:>8.2f} {row['median_latency']:>7.2f}s")
+    
+    best = max(rows, key=lambda row: row['docs_per_sec'])
+    print(f"\nBest: MAX_WORKERS={best['workers']} THREADS_PER_WORKER={best['threads']} ({best['docs_per_sec']:.2f} docs/s)")
+
 if __name__ == "__main__":
     import argparse
     
@@ -123,6 +290,13 @@ if __name__ == "__main__":
     parser.add_argument("files", nargs="+", help="Image files to process")
     parser.add_argument("--workers", type=int, default=4, help="Number of concurrent workers")
     parser.add_argument("--api", default="http://localhost:8000", help="API base URL")
+    parser.add_argument("--probe", action="store_true",
+                        help="Measure /health latency while documents process")
+    parser.add_argument("--baseline-seconds", type=float, default=5.0,
+                        help="Idle probing time before starting the load")
+    parser.add_argument("--sweep-workers", help="Comma-separated MAX_WORKERS values to sweep, e.g. 1,2,4")
+    parser.add_argument("--sweep-threads", help="Comma-separated THREADS_PER_WORKER values to sweep, e.g. 1,2,4,8")
+    parser.add_argument("--port", type=int, default=8100, help="Port for servers started by the sweep")
     
     args = parser.parse_args()
     
@@ -138,9 +312,31 @@ if __name__ == "__main__":
         print("No valid files to process")
         sys.exit(1)
     
+    if args.sweep_workers or args.sweep_threads:
+        # Starts its own server per configuration instead of using --api
+        sweep_thread_budgets(
+            valid_files,
+            [int(n) for n in (args.sweep_workers or "4").split(",")],
+            [int(n) for n in (args.sweep_threads or "1").split(",")],
+            args.port,
+            args.workers
+        )
+        sys.exit(0)
+    
     # Run benchmark
     benchmark = OCRBenchmark(args.api)
     
+    probe = None
+    if args.probe:
+        # Idle baseline first, so the loaded numbers have a reference
+        baseline = LatencyProbe(f"{args.api}/health")
+        baseline.start()
+        time.sleep(args.baseline_seconds)
+        baseline.stop()
+        
+        probe = LatencyProbe(f"{args.api}/health")
+        probe.start()
+    
     if len(valid_files) == 1:
         # Single file benchmark
         result = benchmark.benchmark_single_file(valid_files[0])
@@ -154,8 +350,13 @@ if __name__ == "__main__":
         summary = benchmark.benchmark_concurrent(valid_files, args.workers)
         benchmark.print_statistics()
         
-        print(f"\nConcurrent Processing Summary:")
+        print("\nConcurrent Processing Summary:")
         print(f"  Total files: {summary['total_files']}")
         print(f"  Successful: {summary['successful']}")
         print(f"  Total time: {summary['total_time']:.2f}s")
-        print(f"  Avg per file: {summary['avg_time_per_file']:.2f}s")
\ No newline at end of file
+        print(f"  Avg per file: {summary['avg_time_per_file']:.2f}s")
+    
+    if probe:
+        probe.stop()
+        print_latency("API latency idle", baseline.summary())
+        print_latency(f"API latency while processing {len(valid_files)} documents", probe.summary())
@@ -0,0 +1,105 @@
+import os
+import sys
+import time
+import random
+import tempfile
+import argparse
+import statistics
+
+import cv2
+import numpy as np
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(SCRIPTS_DIR), "backend"))
+sys.path.insert(0, SCRIPTS_DIR)
+
+# Measure the preprocessing itself, not earlier cached results
+os.environ["STAGE_CACHE_ENABLED"] = "false"
+
+from generate_test_data import generate_test_dataset
+from app.core.ocr import ocr_engine
+
+def add_noise(image_path, output_path, sigma):
+    """Write a copy of an image with Gaussian sensor-like noise"""
+    image = cv2.imread(image_path).astype(np.float32)
+    noisy = image + np.random.normal(0, sigma, image.shape)
+    cv2.imwrite(output_path, np.clip(noisy, 0, 255).astype(np.uint8))
+
+def run_chain(image, denoise):
+    """Preprocess with a chain and OCR the result"""
+    start = time.perf_counter()
+    processed = ocr_engine.preprocess_image(image, denoise)
+    preprocess_time = time.perf_counter() - start
+
+    results = ocr_engine.reader.readtext(processed)
+    confidences = [confidence for _, _, confidence in results]
+    return preprocess_time, statistics.mean(confidences) if confidences else 0.0
+
+def benchmark(image_paths):
+    """Compare always running NLM against the adaptive choice"""
+    rows = []
+
+    for image_path in image_paths:
+        image = cv2.imread(image_path)
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+        start = time.perf_counter()
+        decision = ocr_engine.choose_preprocessing(gray)
+        estimate_time = time.perf_counter() - start
+
+        full_time, full_confidence = run_chain(image, "full")
+        adaptive_time, adaptive_confidence = run_chain(image, decision["denoise"])
+
+        rows.append({
+            'file': os.path.basename(image_path),
+            'decision': decision,
+            'full_time': full_time,
+            'adaptive_time': adaptive_time + estimate_time,
+            'full_confidence': full_confidence,
+            'adaptive_confidence': adaptive_confidence
+        })
+
+    print("\n" + "=" * 96)
+    print("ADAPTIVE PREPROCESSING")
+    print("=" * 96)
+    print(f"{'Image':<28} {'Noise':>6} {'Blur':>8} {'Contr.':>6} {'Chain':>6} "
+          f"{'NLM s':>7} {'Adapt s':>8} {'NLM conf':>9} {'Adapt conf':>11}")
+    for row in rows:
+        decision = row['decision']
+        print(f"{row['file']:<28} {decision.get('noise', 0):>6.2f} {decision.get('blur', 0):>8.0f} "
+              f"{decision.get('contrast', 0):>6.1f} {decision['denoise']:>6} "
+              f"{row['full_time']:>7.3f} {row['adaptive_time']:>8.3f} "
+              f"{row['full_confidence']:>9.3f} {row['adaptive_confidence']:>11.3f}")
+
+    full_total = sum(row['full_time'] for row in rows)
+    adaptive_total = sum(row['adaptive_time'] for row in rows)
+    confidence_change = statistics.mean(row['adaptive_confidence'] - row['full_confidence'] for row in rows)
+
+    print(f"\nPreprocessing time: {full_total:.2f}s always-NLM vs {adaptive_total:.2f}s adaptive "
+          f"({(1 - adaptive_total / full_total) * 100 if full_total else 0:.0f}% saved)")
+    print(f"Mean confidence change: {confidence_change:+.4f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark adaptive OCR preprocessing")
+    parser.add_argument("images", nargs="*", help="Images to use instead of the generated test set")
+    parser.add_argument("--noise", type=float, nargs="*", default=[8.0, 20.0],
+                        help="Also test noisy copies of each image at these sigmas")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="preprocess-bench-")
+    image_paths = args.images
+    if not image_paths:
+        random.seed(0)
+        generate_test_dataset(work_dir)
+        image_paths = sorted(os.path.join(work_dir, f) for f in os.listdir(work_dir) if f.endswith('.jpg'))
+
+    np.random.seed(0)
+    noisy_paths = []
+    for image_path in image_paths:
+        for sigma in args.noise:
+            name = os.path.splitext(os.path.basename(image_path))[0]
+            noisy_path = os.path.join(work_dir, f"{name}_noise{sigma:g}.png")
+            add_noise(image_path, noisy_path, sigma)
+            noisy_paths.append(noisy_path)
+
+    benchmark(image_paths + noisy_paths)
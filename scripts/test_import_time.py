@@ -0,0 +1,47 @@
+import sys
+import os
+import json
+import subprocess
+import argparse
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+
+# Runs in a fresh interpreter so nothing is already imported
+PROBE = """
+import json, time
+start = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - start
+from app.core.model_registry import model_registry
+print(json.dumps({"seconds": elapsed, "models": model_registry.status()}))
+"""
+
+def test_import_time(budget: float) -> bool:
+    """Import app.main and check the time budget and that no model was loaded"""
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+
+    print(f"Importing app.main took {result['seconds']:.2f}s (budget {budget:.2f}s)")
+
+    loaded = [name for name, status in result["models"].items() if status["state"] != "not_loaded"]
+    if loaded:
+        print(f"Models loaded at import time: {', '.join(loaded)}")
+
+    return result["seconds"] <= budget and not loaded
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Guard API cold-start time")
+    parser.add_argument("--budget", type=float, default=3.0, help="Maximum import time in seconds")
+    args = parser.parse_args()
+
+    if not test_import_time(args.budget):
+        print("FAILED")
+        sys.exit(1)
+
+    print("OK")